@@ -9,16 +9,24 @@ Classes defined here are ->
     6.project -> Parent object/class representing a complete project.
     7.cssSelector -> a class to render css selectors
     8.renderFile -> used to render a page, only works if you are on the correct path
+    9.SelectorError -> Error class for css selectors that page.select can not read.
+    10.stylesheet -> a container of cssSelector objects, rendered (optimized) in one pass
+    11.cssPruner -> finds the css rules that can not match the elements of some pages
 '''
 
 
 
 import webbrowser as web
 import os, pickle,shutil, sys
+import multiprocessing
+import zipfile, zlib, bz2, lzma
 from zipfile import *
-from bs4 import BeautifulSoup
+import concurrent.futures
 import html.parser
-import datetime
+import hashlib, time
+from collections import OrderedDict, deque
+from array import array
+import re, weakref, difflib, copy, json, struct, mmap, sqlite3, bisect
 class BuilderError(Exception):
         pass
 class FileError(BuilderError):
@@ -37,6 +45,16 @@ class AcessError(BuilderError):
         '''
         Initialize a AcessError object with the given message.
         
+        Args:
+        message (str): The message to be shown as the error.
+        '''
+        self.message = message
+        super().__init__(message)
+class SelectorError(BuilderError):
+    def __init__(self, message:str):
+        '''
+        Initialize a SelectorError object with the given message, raised for css selectors that page.select can not read.
+        
         Args:
         message (str): The message to be shown as the error.
         '''
@@ -52,14 +70,228 @@ def __validate_chdir__(to:str):
         Raises:
         AcessError: If the settings could not be accesed, please be in the correct directory.
         '''
-        print(to)
         if not to == os.curdir:
             try:
                 os.chdir(to)
             except FileNotFoundError:
                 raise AcessError('The settings could not be accesed, please be in the correct directory')
-        else:
-            print('Not Possible. Cur dir->'+os.curdir)
+def __iter_inner__(innerhtml,pretty=False,depth=0,owner=None,cache=False):
+        '''
+        Yield the rendered chunks of an element's innerhtml, depth-first.
+        Children elements with a valid render cache are not walked, their cached output is yielded.
+        
+        Args:
+        innerhtml (str|list|elements): The content to render, a string, a builder element or a list of both.
+        pretty (bool): Indent the output, one tag or text per line.
+        depth (int): The indentation level of the content, only used when pretty.
+        owner (elements): The element holding innerhtml. When given, text is yielded as renderPlan slots
+            (owner, index, pretty, depth) instead of strings, used when compiling.
+        cache (bool): Render the children through elements.element.cached, filling their render cache.
+        '''
+        if type(innerhtml)==str:
+            if owner is not None:
+                yield (owner,None,pretty,depth)
+            else:
+                yield __pretty_text__(innerhtml,depth) if pretty else innerhtml
+            return
+        if not isinstance(innerhtml,list):
+            innerhtml = (innerhtml,)
+        if owner is not None:
+            for i,x in enumerate(innerhtml):
+                if type(x)==str:
+                    yield (owner,i,pretty,depth)
+                else:
+                    yield from x.iter_render(pretty,depth,True)
+            return
+        element = elements.element
+        cache = cache and element.caching
+        key = depth if pretty else -1
+        for x in innerhtml:
+            if type(x)==str:
+                yield __pretty_text__(x,depth) if pretty else x
+            elif cache:
+                yield x.cached(pretty,depth)
+            elif x._cache is not None and x._cacheKey == key:
+                element.hits += 1
+                yield x._cache
+            else:
+                yield from x.iter_render(pretty,depth)
+def __pretty_text__(text:str,depth:int):
+        '''
+        Format a text node the way the pretty printer lays it out: stripped, indented, on its own line.
+        Whitespace only text gives an empty string.
+        '''
+        text = text.strip()
+        if text == '':
+            return ''
+        return ' '*depth+text+'\n'
+def __render_attributes__(tag:str,attributes:dict):
+        '''
+        Render a start tag with it's attributes, used by elements.element.renderAttributes.
+        
+        Args:
+        tag (str): The start tag. Ex: '<p>'
+        attributes (dict): The attributes of the tag.
+        '''
+        line = [tag.replace('>',' ')]
+        for y in attributes:
+            value = attributes[y]
+            line.append(y+'="')
+            if type(value)==str:
+                line.append(value)
+            elif value is not None:
+                for z in value:
+                    line.append(z+';' if y=='style' else z+' ')
+            line.append('" ')
+        line.append('>')
+        return ''.join(line)
+def __pretty_attributes__(tag:str,attributes:dict):
+        '''
+        Render a start tag with it's attributes for the pretty printer.
+        Attributes are sorted by name and list values are joined (';' for style, ' ' otherwise), like the exported pages.
+        
+        Args:
+        tag (str): The start tag. Ex: '<p>'
+        attributes (dict): The attributes of the tag.
+        '''
+        line = [tag[:-1]]
+        for y in sorted(attributes):
+            value = attributes[y]
+            if value is None:
+                value = ''
+            elif type(value)!=str:
+                value = ';'.join(value)+';' if y=='style' else ' '.join(value)
+            line.append(' '+y+'="'+value+'"')
+        line.append('>')
+        return ''.join(line)
+def __iter_pretty__(tag:str,attributes:dict,innerhtml,depth:int,container:bool=True,owner=None,cache=False):
+        '''
+        Yield the pretty (indented) rendering of a tag. Used by the iter_render() of all elements.
+        The layout is one tag or text per line, indented by one space per level. Empty tags are closed as '<br/>'
+        and the content of <pre> and <textarea> is kept as it is.
+        
+        Args:
+        tag (str): The start tag. Ex: '<p>'
+        attributes (dict): The attributes of the tag.
+        innerhtml (str|list|elements): The content of the tag, ignored if not container.
+        depth (int): The indentation level of the tag.
+        container (bool): False for empty tags (that are not closed).
+        owner (elements): The element holding innerhtml, given when compiling (see __iter_inner__).
+        cache (bool): Render the children through their render cache (see __iter_inner__).
+        '''
+        indent = ' '*depth
+        start = __pretty_attributes__(tag,attributes) if attributes else tag
+        if not container:
+            yield indent+start[:-1]+'/>\n'
+            return
+        if tag in ('<pre>','<textarea>'):
+            yield indent+start
+            yield from __iter_inner__(innerhtml,False,0,owner,cache)
+            yield tag.replace('<','</')+'\n'
+            return
+        yield indent+start+'\n'
+        yield from __iter_inner__(innerhtml,True,depth+1,owner,cache)
+        yield indent+tag.replace('<','</')+'\n'
+def __make_element__(tag:str,tagType:str,children:list,attributes:dict):
+        '''
+        Make the Builder element for a tag, used by the Reader, TreeBuilder and compactDocument.toElements.
+        The factory of the tag is looked up in elements.registry (one dict lookup), tags that are not registered become elements.tag.
+        '''
+        factory = elements.registry.get(tag[1:-1])
+        if factory is None:
+            return elements.tag(tag,tagType,children,attributes)
+        return factory(tag,tagType,children,attributes)
+class instrumentation():
+    '''
+    The instrumentation of the Builder pipeline. Every stage (read, tokenize, parse, define, render, export...) is timed
+    and reported as an event dict to the subscribed callbacks, like::
+        {'stage':'parse','seconds':0.012,'nodes':1520,'bytes':48213}
+    Events may also carry 'file' or 'pretty'. Prettifying is part of the render stage (the event has pretty=True).
+    With the single pass Reader, tokenizing, parsing and defining are one 'parse' stage; with legacy=True they are reported apart.
+
+    It is silent by default: with no callback subscribed, a stage costs a method call and nothing is timed.
+
+    Usage::
+        stats = instrumentation.subscribe(stageCollector())
+        ... # parse, render, export
+        print(stats.report())
+        instrumentation.unsubscribe(stats)
+    '''
+    callbacks = []
+    @classmethod
+    def subscribe(cls,callback):
+        '''Subscribe a callback, called with every event dict. Returns the callback.'''
+        cls.callbacks.append(callback)
+        return callback
+    @classmethod
+    def unsubscribe(cls,callback):
+        '''Remove a subscribed callback.'''
+        cls.callbacks.remove(callback)
+    @classmethod
+    def enabled(cls) -> bool:
+        '''Returns True if any callback is subscribed.'''
+        return bool(cls.callbacks)
+    @classmethod
+    def stage(cls,name:str,**counters):
+        '''
+        Returns a context manager timing a stage, the event is sent when it exits. Counters can be given here
+        or set on the stage inside the with block::
+            with instrumentation.stage('render') as stage:
+                ...
+                stage.set(bytes=len(doc))
+        '''
+        if not cls.callbacks:
+            return silentStage
+        return stageTimer(name,counters)
+class stageTimer():
+    def __init__(self,name:str,counters:dict):
+        '''A running stage of instrumentation, see instrumentation.stage.'''
+        self.event = {'stage':name,'seconds':0.0}
+        self.event.update(counters)
+    def set(self,**counters):
+        '''Set counters (like nodes or bytes) of the event.'''
+        self.event.update(counters)
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    def __exit__(self,*exc):
+        self.event['seconds'] = time.perf_counter()-self.start
+        for callback in instrumentation.callbacks:
+            callback(self.event)
+        return False
+class __silentStage__():
+    '''The stage given by instrumentation.stage when nothing is subscribed, does nothing.'''
+    def set(self,**counters):
+        pass
+    def __enter__(self):
+        return self
+    def __exit__(self,*exc):
+        return False
+silentStage = __silentStage__()
+class stageCollector():
+    def __init__(self):
+        '''
+        A callback for instrumentation that adds up the events per stage: count, seconds, nodes and bytes.
+        '''
+        self.stages = {}
+    def __call__(self,event:dict):
+        stage = self.stages.get(event['stage'])
+        if stage is None:
+            stage = self.stages[event['stage']] = {'count':0,'seconds':0.0,'nodes':0,'bytes':0}
+        stage['count'] += 1
+        stage['seconds'] += event['seconds']
+        stage['nodes'] += event.get('nodes',0)
+        stage['bytes'] += event.get('bytes',0)
+    def reset(self):
+        '''Forget all the collected events.'''
+        self.stages = {}
+    def report(self) -> str:
+        '''Returns the totals per stage as a text table.'''
+        lines = [f'{"stage":<10}{"count":>8}{"seconds":>12}{"nodes":>12}{"bytes":>14}']
+        for name in self.stages:
+            x = self.stages[name]
+            lines.append(f'{name:<10}{x["count"]:>8}{x["seconds"]:>12.4f}{x["nodes"]:>12}{x["bytes"]:>14}')
+        return '\n'.join(lines)
 class Tag(html.parser.HTMLParser):
     def __init__(self):
         super().__init__()
@@ -79,11 +311,252 @@ class Tag(html.parser.HTMLParser):
         self.datal.append('</' + tag + '>')
         self.empty_tags.remove(tag)
 
+class TreeBuilder(html.parser.HTMLParser):
+    VOID = frozenset(('area','base','br','col','embed','hr','img','input','link','meta','param','source','track','wbr'))
+    HEAD = frozenset(('title','meta','link','style','base','script','noscript'))
+    AUTOCLOSE = frozenset(('p','li','dt','dd','option','tr','td','th'))
+    BLOCK = frozenset(('address','article','aside','blockquote','div','dl','fieldset','footer','form','h1','h2','h3','h4','h5','h6','header','hr','main','nav','ol','p','pre','section','table','ul'))
+    def __init__(self,raw:bool=False,compact:bool=False):
+        '''
+        A single pass html parser: the element tree is built inside the HTMLParser callbacks with a stack of the open tags,
+        in linear time and memory. Used by Reader.
+
+        Tags that are never closed (like a <p> or <li> before the end of it's parent) are closed with their parent,
+        by the next tag of the same kind, or for <p> by the next block tag (like <div> or <ul>);
+        end tags that do not match any open tag are ignored. Content outside <head> and <body> goes to the body
+        (or to the head for head tags like <title> seen before the body). Whitespace text holding a newline (the
+        formatting between tags) is dropped.
+
+        The number of nodes built is counted in the nodes attribute.
+
+        Args:
+        raw (bool): Build the Reader's ('tag_name',[attributes],[children],'tag_type') structure instead of Builder elements.
+        compact (bool): Write the tree straight into two compactDocuments (head and body).
+        '''
+        super().__init__()
+        self.raw = raw
+        self.compact = compact
+        self.sections = {}
+        self.stack = []
+        self.nodes = 0
+    def __section__(self,name:str,attrs=()):
+        '''Make the head or body section if needed and return it's frame.'''
+        if name not in self.sections:
+            self.nodes += 1
+            if self.compact:
+                doc = compactDocument()
+                doc.startTag('<'+name+'>',dict(attrs))
+                self.sections[name] = [name,doc,None]
+            else:
+                self.sections[name] = [name,list(attrs),[]]
+        return self.sections[name]
+    def __current__(self,tag:str=''):
+        '''Returns the frame new nodes go into.'''
+        if self.stack:
+            return self.stack[-1]
+        if 'body' not in self.sections and tag in TreeBuilder.HEAD:
+            frame = self.__section__('head')
+        else:
+            frame = self.__section__('body')
+        self.stack.append(frame)
+        return frame
+    def __add__(self,frame,node):
+        frame[2].append(node)
+    def __close__(self):
+        '''Close the tag on top of the stack.'''
+        frame = self.stack.pop()
+        if frame[0] in ('head','body') and self.sections.get(frame[0]) is frame:
+            return
+        if self.compact:
+            frame[1].endTag()
+            return
+        name, attrs, children = frame
+        if self.raw:
+            node = (name,attrs,children,'Container')
+        else:
+            node = __make_element__('<'+name+'>','Container',children,dict(attrs))
+        self.__add__(self.stack[-1],node)
+    def __leaf__(self,tag:str,attrs:list,container:bool=False):
+        self.nodes += 1
+        frame = self.__current__(tag)
+        if self.compact:
+            frame[1].startTag('<'+tag+'>',dict(attrs),container)
+            if container:
+                frame[1].endTag()
+        elif self.raw:
+            self.__add__(frame,(tag,attrs,[] if container else None,'Container' if container else 'Empty'))
+        else:
+            self.__add__(frame,__make_element__('<'+tag+'>','Container' if container else 'Empty',[],dict(attrs)))
+    def handle_starttag(self,tag,attrs):
+        if tag == 'html':
+            return
+        if tag in ('head','body'):
+            while self.stack:
+                self.__close__()
+            self.stack.append(self.__section__(tag,attrs))
+            return
+        if tag in TreeBuilder.VOID:
+            self.__leaf__(tag,attrs)
+            return
+        frame = self.__current__(tag)
+        if (frame[0] == tag and tag in TreeBuilder.AUTOCLOSE) or (frame[0] == 'p' and tag in TreeBuilder.BLOCK):
+            self.__close__()
+            frame = self.__current__(tag)
+        self.nodes += 1
+        if self.compact:
+            frame[1].startTag('<'+tag+'>',dict(attrs))
+            self.stack.append([tag,frame[1],None])
+        else:
+            self.stack.append([tag,attrs,[]])
+    def handle_startendtag(self,tag,attrs):
+        self.__leaf__(tag,attrs,tag not in TreeBuilder.VOID)
+    def handle_endtag(self,tag):
+        if tag == 'html' or tag in TreeBuilder.VOID:
+            return
+        for i in range(len(self.stack)-1,-1,-1):
+            if self.stack[i][0] == tag:
+                break
+        else:
+            return
+        while len(self.stack) > i:
+            self.__close__()
+    def handle_data(self,data):
+        if '\n' in data and data.isspace():
+            return
+        self.nodes += 1
+        frame = self.__current__()
+        if self.compact:
+            frame[1].addText(data)
+        else:
+            self.__add__(frame,data)
+    def handle_comment(self,data):
+        self.nodes += 1
+        frame = self.__current__()
+        if self.compact:
+            frame[1].addComment(data)
+        else:
+            self.__add__(frame,data if self.raw else elements.comment(data))
+    def close(self):
+        super().close()
+        while self.stack:
+            self.__close__()
+    def result(self) -> list:
+        '''Returns [head, body], in the form asked for (Builder elements, raw structure or compactDocuments).'''
+        result = []
+        for name in ('head','body'):
+            frame = self.__section__(name)
+            if self.compact:
+                frame[1].endTag()
+                result.append(frame[1])
+            elif self.raw:
+                result.append((name,frame[1],frame[2],'Container'))
+            else:
+                result.append(__make_element__('<'+name+'>','Container',frame[2],dict(frame[1])))
+        return result
+class parseCache():
+    def __init__(self,maxEntries:int=128,folder:str=None,maxDiskBytes:int=256*2**20):
+        '''
+        An opt-in cache for Reader.parse_code and Reader.parse_file, keyed by a hash of the source and Reader.VERSION.
+        A hit gives back the parsed tree without parsing the source again.
+        Entries are kept as compactDocuments, in an in-memory LRU tier and, if a folder is given, in an on-disk tier
+        (one '<hash>.RBCache' file per entry, the least recently used files are removed past maxDiskBytes).
+
+        Args:
+        maxEntries (int): The number of entries kept in memory. Defaults to 128.
+        folder (str): The folder of the on-disk tier, None for memory only. Defaults to None.
+        maxDiskBytes (int): The size bound of the on-disk tier. Defaults to 256 MiB.
+
+        Usage::
+            cache = parseCache(folder='ParseCache')
+            head, body = Reader('page.html',cache=cache).parse_file()
+            cache.stats() # {'hits':..,'diskHits':..,'misses':..,...}
+        '''
+        self.maxEntries = maxEntries
+        self.folder = folder
+        self.maxDiskBytes = maxDiskBytes
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.diskHits = 0
+        self.misses = 0
+        self.evictions = 0
+        if folder is not None:
+            os.makedirs(folder,exist_ok=True)
+    def key(self,source) -> str:
+        '''Returns the cache key of the source, a string or an iterable of string chunks.'''
+        digest = hashlib.sha256(('Reader '+Reader.VERSION+'\n').encode('utf-8'))
+        if type(source)==str:
+            source = (source,)
+        for chunk in source:
+            digest.update(chunk.encode('utf-8'))
+        return digest.hexdigest()
+    def get(self,key:str):
+        '''Returns the cached [head, body] compactDocuments for the key, or None.'''
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+        if self.folder is not None:
+            path = os.path.join(self.folder,key+'.RBCache')
+            try:
+                with open(path,'rb') as file:
+                    value = pickle.load(file)
+            except (OSError,pickle.UnpicklingError,EOFError):
+                pass
+            else:
+                os.utime(path)
+                self.diskHits += 1
+                self.__remember__(key,value)
+                return value
+        self.misses += 1
+        return None
+    def put(self,key:str,value:list):
+        '''Cache the [head, body] compactDocuments for the key.'''
+        self.__remember__(key,value)
+        if self.folder is not None:
+            path = os.path.join(self.folder,key+'.RBCache')
+            with open(path+'.tmp','wb') as file:
+                pickle.dump(value,file,pickle.HIGHEST_PROTOCOL)
+            os.replace(path+'.tmp',path)
+            self.__trim__()
+    def __remember__(self,key,value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxEntries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+    def __trim__(self):
+        files = []
+        size = 0
+        for x in os.scandir(self.folder):
+            if x.name.endswith('.RBCache'):
+                stat = x.stat()
+                files.append((stat.st_mtime,stat.st_size,x.path))
+                size += stat.st_size
+        files.sort()
+        while size > self.maxDiskBytes and files:
+            mtime, fileSize, path = files.pop(0)
+            os.remove(path)
+            size -= fileSize
+            self.evictions += 1
+    def clear(self):
+        '''Remove all the entries, in memory and on disk.'''
+        self.entries.clear()
+        if self.folder is not None:
+            for x in os.scandir(self.folder):
+                if x.name.endswith('.RBCache'):
+                    os.remove(x.path)
+    def stats(self) -> dict:
+        '''Returns the cache counters: hits (memory), diskHits, misses, evictions, entries (in memory) and hitRate.'''
+        lookups = self.hits+self.diskHits+self.misses
+        return {'hits':self.hits,'diskHits':self.diskHits,'misses':self.misses,'evictions':self.evictions,
+                'entries':len(self.entries),'hitRate':(self.hits+self.diskHits)/lookups if lookups else 0.0}
 class Reader:
-    def __init__(self,file_name='',code='',returnBuilder=True):
+    VERSION = '2'
+    def __init__(self,file_name='',code='',returnBuilder=True,compact=False,legacy=False,cache=None,lazy=False):
         self.__doc__ = '''
         Reader parses HTML files and code to Builder elements.
-        The code is first pre-processed and then processed to come in the following structure::
+        By default the tree is built in a single pass, while the code is parsed (see TreeBuilder).
+        With legacy=True, the code is first pre-processed and then processed to come in the following structure::
             ('tag_name',[('attribute_class','attribute_data')],[children],'tag_type')
         Like::
             ('p',
@@ -98,6 +571,11 @@ class Reader:
             1.file_name -> path to html file
             2.code -> html code
             3. returnBuilder -> return builder elements if true, otherwise return html as lists of elements in the above structure
+            4. compact -> return the head and body as compactDocuments (array-backed, for very large pages) instead of builder elements
+            5. legacy -> use the old pipeline (flat token list, then parse and define) instead of the single pass TreeBuilder
+            6. cache -> a parseCache, to reuse the trees of sources that were already parsed (not used with legacy or returnBuilder=False)
+            7. lazy -> return the head and body as elements.lazy proxies, that only build their children when they are accessed
+            The element made for every tag is looked up in elements.registry, see elements.register to add your own.
         Usage:
             1. if file name provided, do 
                 ```
@@ -111,26 +589,142 @@ class Reader:
         self.file_name = file_name
         self.html = code
         self.giveBuilder = returnBuilder
+        self.compact = compact
+        self.legacy = legacy
+        self.cache = cache
+        self.lazy = lazy
         self.elements = elements
     
     def parse_code(self):
-        print(f'[{datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}] Filtering HTML to Raw data')
-        self.datal,self.empty_tags = self.parse_html()
-        self.head, self.body = self.split_data(self.clean_data(self.datal))
-        print(f'[{datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}] Parsing Raw data')
-        self.head = self.parse(self.head)
-        self.body = self.parse(self.body)
-        print(f'[{datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}] Converting Parsed data to Builder Elements')
-        self.headEle = self.define(self.head)
-        self.bodyEle = self.define(self.body)
+        if not self.legacy and self.cache is not None and self.giveBuilder:
+            return self.__cached__(self.cache.key(self.html),(self.html,))
+        if not self.legacy:
+            return self.__result__(self.__feed__((self.html,),not self.giveBuilder,self.giveBuilder and (self.compact or self.lazy)))
+        with instrumentation.stage('tokenize',bytes=len(self.html)):
+            self.datal,self.empty_tags = self.parse_html()
+            self.head, self.body = self.split_data(self.clean_data(self.datal))
+        with instrumentation.stage('parse'):
+            self.head = self.parse(self.head)
+            self.body = self.parse(self.body)
+        if self.giveBuilder and self.compact:
+            return [compactDocument.fromParsed(self.head),compactDocument.fromParsed(self.body)]
+        if self.giveBuilder and self.lazy:
+            self.headEle = elements.lazy(compactDocument.fromParsed(self.head))
+            self.bodyEle = elements.lazy(compactDocument.fromParsed(self.body))
+            return [self.headEle,self.bodyEle]
+        with instrumentation.stage('define'):
+            self.headEle = self.define(self.head)
+            self.bodyEle = self.define(self.body)
         if self.giveBuilder:
             return [self.headEle,self.bodyEle]
         else:
             return [self.head,self.body]
-    def parse_file(self):
-        print(f'[{datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}] Reading file')
-        self.html = self.read_file()
-        return self.parse_code()
+    def parse_file(self,chunkSize:int=1<<20):
+        '''
+        Parse the file. The file is streamed into the parser in chunks of chunkSize characters and the tree is built as it goes,
+        so the whole source is never held in memory (with legacy=True, the file is read at once).
+        file_name can also be an opened text file (anything with a read(size) method).
+        With a cache, the file is read once and it's chunks are kept in memory until it is hashed and, on a miss, parsed.
+
+        Args:
+        chunkSize (int): The number of characters read at a time. Defaults to 1 MiB.
+        '''
+        if self.legacy:
+            with instrumentation.stage('read',file=self.file_name) as stage:
+                self.html = self.read_file()
+                stage.set(bytes=len(self.html))
+            return self.parse_code()
+        if self.cache is not None and self.giveBuilder:
+            chunks = list(self.iter_file(chunkSize))
+            return self.__cached__(self.cache.key(chunks),chunks)
+        return self.__result__(self.__feed__(self.iter_file(chunkSize),not self.giveBuilder,self.giveBuilder and (self.compact or self.lazy)))
+    @staticmethod
+    def parse_many(paths,workers:int=None,chunksize:int=1,compact:bool=True,fileChunkSize:int=1<<20):
+        '''
+        Parse many html files in a process pool. Yields a parseResult for every file, in the order they finish.
+        A file that fails to parse gives a parseResult with it's error instead of stopping the batch.
+        The workers send back the head and body as compactDocuments, which pickle to a few flat arrays.
+
+        Args:
+        paths: The paths of the html files.
+        workers (int): The number of worker processes, defaults to the number of CPUs. With 1, the files are parsed in this process.
+        chunksize (int): The number of files sent to a worker at a time. Defaults to 1.
+        compact (bool): Keep the results as compactDocuments, otherwise they are converted to Builder elements. Defaults to True.
+        fileChunkSize (int): The number of characters read at a time from each file (see parse_file).
+
+        Usage::
+            for result in Reader.parse_many(paths,workers=8):
+                if result.error is None:
+                    head, body = result
+        '''
+        tasks = ((x,fileChunkSize) for x in paths)
+        if workers == 1:
+            for result in map(__parse_worker__,tasks):
+                yield result if compact else result.toElements()
+            return
+        with multiprocessing.Pool(workers) as pool:
+            for result in pool.imap_unordered(__parse_worker__,tasks,chunksize):
+                yield result if compact else result.toElements()
+    def __feed__(self,chunks,raw:bool,compact:bool) -> TreeBuilder:
+        '''Feed the chunks to a new TreeBuilder, in a 'parse' stage. Returns the closed TreeBuilder.'''
+        with instrumentation.stage('parse') as stage:
+            parser = TreeBuilder(raw,compact)
+            size = 0
+            for chunk in chunks:
+                size += len(chunk)
+                parser.feed(chunk)
+            parser.close()
+            stage.set(nodes=parser.nodes,bytes=size)
+        return parser
+    def __cached__(self,key:str,chunks):
+        '''Returns the tree from the cache, parsing the chunks into it first on a miss.'''
+        result = self.cache.get(key)
+        if result is None:
+            result = self.__feed__(chunks,False,True).result()
+            self.cache.put(key,result)
+        if self.compact:
+            # the cached documents are kept for the next hits, the caller gets copies of them
+            self.headEle, self.bodyEle = (x.copy() if x is not None else None for x in result)
+        elif self.lazy:
+            self.headEle, self.bodyEle = elements.lazy(result[0]), elements.lazy(result[1])
+        else:
+            self.headEle, self.bodyEle = result[0].toElements(), result[1].toElements()
+        return [self.headEle,self.bodyEle]
+    def __result__(self,parser:TreeBuilder):
+        if self.giveBuilder:
+            self.headEle, self.bodyEle = parser.result()
+            if self.lazy and not self.compact:
+                self.headEle, self.bodyEle = elements.lazy(self.headEle), elements.lazy(self.bodyEle)
+            return [self.headEle,self.bodyEle]
+        self.head, self.body = parser.result()
+        return [self.head,self.body]
+    def iter_file(self,chunkSize:int=1<<20):
+        '''Yields the file in chunks of chunkSize characters. The reading is reported as a 'read' stage (see instrumentation).'''
+        if hasattr(self.file_name,'read'):
+            file = self.file_name
+        else:
+            file = open(self.file_name, encoding='utf-8')
+        timed = instrumentation.enabled()
+        seconds = 0.0
+        size = 0
+        try:
+            while True:
+                if timed:
+                    start = time.perf_counter()
+                    chunk = file.read(chunkSize)
+                    seconds += time.perf_counter()-start
+                else:
+                    chunk = file.read(chunkSize)
+                if not chunk:
+                    break
+                size += len(chunk)
+                yield chunk
+        finally:
+            if file is not self.file_name:
+                file.close()
+            if timed:
+                for callback in instrumentation.callbacks:
+                    callback({'stage':'read','seconds':seconds,'bytes':size,'file':self.file_name})
     def read_file(self):
         with open(self.file_name, encoding='utf-8') as file:
             return file.read()
@@ -143,7 +737,8 @@ class Reader:
     def clean_data(self, data):
         cleaned_data = []
         for x in data:
-            if x != '\n':
+            # the formatting between tags (whitespace holding a newline) is dropped, like TreeBuilder does
+            if type(x) != str or not (x.isspace() and '\n' in x):
                 cleaned_data.append(x)
         cleaned_data.pop(0)
         cleaned_data.pop(0)
@@ -151,52 +746,49 @@ class Reader:
         return cleaned_data
 
     def split_data(self, data):
-        head = data[:7]
-        body = data[7:]
+        if '<body>' in data:
+            i = data.index('<body>')
+        else:
+            i = len(data)
+        head = data[:i]
+        body = data[i:]
         return head, body
 
     def parse(self, tag_list, re=False):
-        d = (tag_list[0].removesuffix('>')).removeprefix('<')  # name
-        e = tag_list[1]  # attributes
-        if d in self.empty_tags:  # empty tag!
-            return d, e, None, 'Empty'
-        if len(tag_list) == 4:  # filtring those with only 1 child
-            return d, e, tag_list[-2], 'Container'
-        f = tag_list[2:-1]  # children
-        master = ''  # tag name without < and >
-        dumb = 0  # iteration counter for tags to determine start and end of a container tag
-        dum = []  # contains a single container tag
-        duh = []  # final product
-        empty = False
-        for x in f:
-            if dumb == 0:
-                if ('<' in x) and ('>' in x):  # new tag recognition
-                    master = (x.removesuffix('>')).removeprefix('<')
-                    if master in self.empty_tags:
-                        empty = True
-                    dum.append(master)  # set name
+        '''
+        Nest the flat token list of an element (like ['<p>', [attributes], 'a ', '<b>', [], 'b', '</b>', '</p>'], see
+        parse_html) into the ('tag_name',[attributes],[children],'tag_type') structure, with a stack of the open tags.
+        The tags that were never closed (empty_tags) are empty; end tags that do not match an open tag are ignored.
+
+        Args:
+        tag_list (list): The tokens, starting with the element's start tag.
+        re: Not used, kept for the callers of the older versions.
+        '''
+        top = []
+        stack = [('',top)]
+        i, n = 0, len(tag_list)
+        while i < n:
+            x = tag_list[i]
+            if i+1 < n and type(tag_list[i+1]) == list and x.startswith('<'):  # a start tag, followed by it's attributes
+                name = x[1:-1]
+                if name in self.empty_tags:
+                    stack[-1][1].append((name, tag_list[i+1], None, 'Empty'))
                 else:
-                    return d, e, f, 'Container'  # wildcard exit
-            else:
-                dum.append(x)  # else it is tag data
-            if empty and len(dum) == 2:
-                empty = False
-                dumb = 0
-                duh.append(self.parse(dum, re=True))
-                dum = []
+                    children = []
+                    stack[-1][1].append((name, tag_list[i+1], children, 'Container'))
+                    stack.append((name, children))
+                i += 2
                 continue
-            if ('</' in x) and ('>' in x):
-                if (x.removesuffix('>')).removeprefix('</') == master:
-                    # print(dum)
-                    duh.append(self.parse(dum, re=True))  # container tag completed! nest the data
-                    dum = []  # empty single tag container
-                    dumb = 0  # iterate for a new tag
-                    continue  # dont success (+1) dumb
-            dumb += 1
-            # print([x, dumb, master, dum])
-        if not re:
-            f = duh  # if provided with a tag in nested function call, provide with the new struc
-        return d, e, f, 'Container'  # or else let it go as it is
+            if x.startswith('</') and x.endswith('>'):
+                name = x[2:-1]
+                for j in range(len(stack)-1, 0, -1):
+                    if stack[j][0] == name:
+                        del stack[j:]
+                        break
+            else:
+                stack[-1][1].append(x)
+            i += 1
+        return top[0]
 
     def define(self, object):
         if type(object) == str:
@@ -212,28 +804,39 @@ class Reader:
                     children.append(self.define(x))
             else:
                 children = object[2]
-        match tag_name:
-            case 'p':
-                dummy = self.elements.p(children, attri_dumb)
-            case 'head':
-                dummy = self.elements.head(children)
-            case 'body':
-                dummy = self.elements.body(children)
-            case 'title':
-                dummy = self.elements.title(children)
-            case 'img':
-                dummy = self.elements.img(attri_dumb)
-            case 'b':
-                dummy = self.elements.b(children)
-            case 'br':
-                dummy = self.elements.br()
-            case 'h1','h2','h3','h4','h5','h6':
-                dummy = self.elements.hn(int(tag_name[-1]),children,attri_dumb)
-            case 'hr':
-                dummy = self.elements.hr(attri_dumb)
-            case _:
-                dummy = self.elements.tag(f'<{tag_name}>',object[-1],children,attri_dumb)
-        return dummy
+        return __make_element__(f'<{tag_name}>',object[-1],children,attri_dumb)
+class parseResult():
+    def __init__(self,file_name:str,head=None,body=None,error:str=None):
+        '''
+        The result of parsing one file with Reader.parse_many. Unpacks as [head, body] like parse_file().
+
+        Args:
+        file_name (str): The path of the file.
+        head, body (compactDocument|elements): The parsed head and body, None if the file failed.
+        error (str): The error, like "FileNotFoundError: ...", None if the file was parsed.
+        '''
+        self.file_name = file_name
+        self.head = head
+        self.body = body
+        self.error = error
+    def __iter__(self):
+        return iter((self.head,self.body))
+    def __repr__(self):
+        return f'parseResult({self.file_name!r}, error={self.error!r})'
+    def toElements(self):
+        '''Convert the head and body from compactDocuments to Builder elements (in place). Returns this result.'''
+        if self.error is None:
+            self.head = self.head.toElements()
+            self.body = self.body.toElements()
+        return self
+def __parse_worker__(task):
+        '''Parse one file for Reader.parse_many, in a worker process. task is (file_name, fileChunkSize).'''
+        file_name, fileChunkSize = task
+        try:
+            head, body = Reader(file_name,compact=True).parse_file(fileChunkSize)
+        except Exception as error:
+            return parseResult(file_name,error=f'{type(error).__name__}: {error}')
+        return parseResult(file_name,head,body)
 class page():
     def __init__(self,fileName:str='main',head=None,body=None):
         '''
@@ -247,8 +850,10 @@ class page():
         self.fileName = fileName
         self.head = head
         self.body = body
+        self.plan = None
+        self.index = None
         #self.alphaNum = list('abcdefghijklmnopqrstuvwxyz')
-    def render(self):
+    def render(self,pretty:bool=True):
         '''
         Renders this page. Returns a string as a html page.
 
@@ -257,28 +862,161 @@ class page():
         declaration and opening <html> tag, followed by the rendered content of 
         the head and body, and concludes with the closing </html> tag.
 
+        If the page was compiled (see compile()) with the same pretty setting, the compiled plan is used.
+
+        Args:
+        pretty (bool): Indent the document, one tag or text per line. If False, the formatting is skipped entirely. Defaults to True.
+
         Returns:
             str: The complete HTML document as a string.
         '''
-        doc = '<!doctype html>\n<html>\n'
-        doc += self.head.render()
-        doc += self.body.render()
-        doc += '</html>'
-        doc = BeautifulSoup(doc,'html.parser').prettify()
+        with instrumentation.stage('render',pretty=pretty) as stage:
+            if self.plan is not None and self.plan.pretty == pretty:
+                doc = self.plan.render()
+            else:
+                doc = ''.join(self.iter_render(pretty,False,True))
+            stage.set(bytes=len(doc))
         return doc
+    def iter_render(self,pretty:bool=False,slots:bool=False,cache:bool=False):
+        '''
+        Renders this page chunk by chunk, depth-first. Yields strings.
+        Unlike render(), the page is never held in memory as a whole.
+
+        Args:
+        pretty (bool): Indent the document, one tag or text per line. Defaults to False.
+        slots (bool): Yield the text as renderPlan slots instead of strings, used by compile(). Defaults to False.
+        cache (bool): Render head and body through their render cache (see elements.element), used by render(). Defaults to False.
+        '''
+        owner = self if slots else None
+        if pretty:
+            yield '<!DOCTYPE html>\n<html>\n'
+            yield from __iter_inner__([self.head,self.body],True,1,owner,cache)
+            yield '</html>\n'
+            return
+        yield '<!doctype html>\n<html>\n'
+        yield from __iter_inner__([self.head,self.body],False,0,owner,cache)
+        yield '</html>'
+    def compile(self,pretty:bool=True):
+        '''
+        Compile this page into a renderPlan and keep it as the page's "plan" attribute.
+        render() then renders the page with a single join, reading only the text from the tree.
+        The plan is recompiled by itself when the tree is changed (elements, tags or attributes, see renderPlan), or when head or body are replaced.
+
+        Args:
+        pretty (bool): The pretty setting the plan is compiled for. Defaults to True.
+
+        Returns:
+            renderPlan: The compiled plan.
+        '''
+        self.plan = renderPlan(self,pretty)
+        return self.plan
+    def render_to(self,fp,pretty:bool=False):
+        '''
+        Renders this page into a file-like object (anything with a write(str) method).
+
+        Args:
+        fp: The file-like sink, like an opened text file or io.StringIO.
+        pretty (bool): Indent the document, one tag or text per line. Defaults to False.
+
+        Returns:
+            int: The number of characters written.
+        '''
+        with instrumentation.stage('render',pretty=pretty) as stage:
+            written = 0
+            for chunk in self.iter_render(pretty):
+                fp.write(chunk)
+                written += len(chunk)
+            stage.set(bytes=written)
+        return written
+    def indexed(self):
+        '''
+        Returns the id, class and tag indexes of this page (see elementIndex), building them on the first call
+        or when head or body were replaced.
+        '''
+        if self.index is None or not self.index.valid():
+            self.index = elementIndex(self)
+        return self.index
+    def find_all(self,tag:str=None,id:str=None,className:str=None,attributes:dict=None) -> list:
+        '''
+        Returns all the elements of the page matching every given filter.
+        The lookup goes through the page's indexes (see indexed()), so it does not walk the tree.
+
+        Args:
+        tag (str): The tag, like 'p' or '<p>'.
+        id (str): The id attribute.
+        className (str): One or more class names, separated by spaces; the element needs all of them.
+        attributes (dict): Attributes the element must have, like {'href':'index.html'}. A value of None only checks the attribute is there.
+
+        Usage::
+            rows = page.find_all('li',className='row')
+        '''
+        compound = {
+            'tag':None if tag is None else '<'+tag.strip('<>').lower()+'>',
+            'id':id,
+            'classes':className.split() if className else [],
+            'attributes':list(attributes.items()) if attributes else [],
+        }
+        return self.indexed().query([[(None,compound)]])
+    def find(self,tag:str=None,id:str=None,className:str=None,attributes:dict=None):
+        '''
+        Returns the first element of the page matching every given filter (see find_all), or None.
+        '''
+        result = self.find_all(tag,id,className,attributes)
+        return result[0] if result else None
+    def select(self,selector:str) -> list:
+        '''
+        Returns the elements of the page matching a css selector, like 'ul.menu > li a[href]' or '#main p, .note'.
+        Supported: *, tag, #id, .class, [attr], [attr=value], the descendant (space) and child (>) combinators and
+        comma separated selectors. The candidates are taken from the indexes, then checked up their parents.
+
+        Args:
+        selector (str): The css selector.
+
+        Raises:
+        SelectorError: If the selector can not be read.
+        '''
+        return self.indexed().query(__parse_selector__(selector))
+    def diff(self,new) -> 'pagePatch':
+        '''
+        Returns the pagePatch that turns this page into new (see pagePatch.diff).
+
+        Args:
+        new (page): The new version of this page.
+        '''
+        return pagePatch.diff(self,new)
+    def __getstate__(self):
+        # the compiled plan and the indexes are not sent along (to worker processes), they are made again when needed
+        state = self.__dict__.copy()
+        state['plan'] = None
+        state['index'] = None
+        return state
     def renderSecured(self,headObj,bodyObj,secClass):
         pass
-    def export(self):
-        file = open(self.fileName+'.html','w',encoding='utf-8')
-        file.write(self.render())
-        file.close()
+    def export(self,pretty:bool=True):
+        '''
+        Export the page as '<fileName>.html'. The page is streamed to the file using render_to(),
+        so it never sits fully in memory. The 'export' stage reported to instrumentation includes the rendering.
+
+        Args:
+        pretty (bool): Indent the document, one tag or text per line. Defaults to True.
+        '''
+        with instrumentation.stage('export',file=self.fileName+'.html') as stage:
+            with open(self.fileName+'.html','w',encoding='utf-8') as file:
+                stage.set(bytes=self.render_to(file,pretty))
         return '200'
-    def exportRaw(self):
+    def exportRaw(self,binary:bool=True):
         '''
         Export the page as a raw folder. This folder will be given the same name as the page.
         The folder will contain two files, 'Head.RBCode' and 'Body.RBCode', which contain the
         head and body of the page, respectively, in a serialized form.
-        
+        The files are in the raw binary format of compactDocument (see compactDocument.iter_bytes): smaller and faster
+        than pickle, readable by the next versions even if the element classes change, and importRaw reads only the
+        parts of them that are used. Elements are stored by tag, attributes and children, so the state of custom element
+        classes that is not in those is not kept; use binary=False to pickle the objects as they are.
+
+        Args:
+        binary (bool): Use the raw binary format, or pickle. Defaults to True.
+
         Raises:
         FileExistsError: If a folder with the same name as the page already exists.
         FileError: If the folder could not be created.
@@ -291,32 +1029,849 @@ class page():
             raise FileError(f'A folder with the project name "{self.fileName}" already exists, try renaming the original folder or rename this project by changing it\'s "fileName" attribute.')
         except FileNotFoundError:
             raise FileError(f'We could not acess the project\'s root folder and cannot find a reason why. Please share your problem with the devs')
-        HeadFile = open('Head.RBCode','wb')
-        BodyFile = open('Body.RBCode','wb')
-        pickle.dump(self.head, HeadFile)
-        pickle.dump(self.body, BodyFile)
-        HeadFile.close()
-        BodyFile.close()
+        with instrumentation.stage('exportRaw',file=self.fileName,binary=binary):
+            for name, root in (('Head.RBCode',self.head),('Body.RBCode',self.body)):
+                if binary:
+                    __write_file__(name,__dump_raw__(root))
+                else:
+                    with open(name,'wb') as file:
+                        pickle.dump(root,file)
         __validate_chdir__('..')
-    def importRaw(self, ProjectName: str):
+    def importRaw(self, ProjectName: str,lazy:bool=True):
+        '''
+        Import the head and body of a raw folder written by exportRaw (in the raw binary format, or pickled by older versions).
+        With lazy, the files are memory-mapped and the head and body are elements.lazy proxies: an element is only
+        read from the file when it's parent's children are accessed, and rendering reads the file straight away.
+
+        Args:
+        ProjectName (str): The raw folder, as a path from the current folder.
+        lazy (bool): Read the elements when they are used. Defaults to True.
+
+        Raises:
+        FileError: If the folder or the files could not be found.
+
+        Returns:
+            list: [head, body]
+        '''
         try:
             __validate_chdir__(ProjectName)
         except FileNotFoundError:
             raise FileError('The project\'s root folder could not be accessed. Please make sure you the path is of the preceeding folder of your project. If still unsure, please contact the devs.')
         try:
-            HeadFile = open('Head.RBCode','rb')
-            BodyFile = open('Body.RBCode','rb')
+            with instrumentation.stage('importRaw',file=ProjectName,lazy=lazy):
+                head = __load_raw__('Head.RBCode',lazy)
+                body = __load_raw__('Body.RBCode',lazy)
         except FileNotFoundError:
             raise FileError('The head or body (or both) raw files does not exist.\nPlease check these-> Are you in the right folder? Had you renamed the files? Did you delete any file?\n If no, please contact the dev for better solution.')
-        head = pickle.load(HeadFile)
-        body = pickle.load(BodyFile)
-        HeadFile.close()
-        BodyFile.close()
         self.head = head
         self.body = body
         return [head, body]
+def __classes_of__(attributes) -> list:
+        '''Returns the class names in an attributes dict (the value of 'class' can be a string or a list).'''
+        value = attributes.get('class')
+        if value is None:
+            return ()
+        return value.split() if type(value)==str else value
+def __attribute_text__(value) -> str:
+        '''Returns an attribute value as the text it renders to, used to match [attr=value] selectors.'''
+        if value is None:
+            return ''
+        return value if type(value)==str else ' '.join(value)
+__selectorToken__ = re.compile(r'''\s*([>,])\s*|(\s+)|([a-zA-Z][\w-]*|\*)|#([\w-]+)|\.([\w-]+)|\[\s*([\w-]+)\s*(?:=\s*(?:"([^"]*)"|'([^']*)'|([^\]\s]*))\s*)?\]''')
+def __parse_selector__(selector:str) -> list:
+        '''
+        Parse a css selector for page.select. Returns a list of the comma separated selectors, each one a list of
+        (combinator, compound) steps from left to right. The combinator is ' ' (descendant), '>' (child) or None for the first step,
+        and the compound is a dict like {'tag':'<p>','id':None,'classes':['a'],'attributes':[('href',None)]}.
+        Supported: *, tag, #id, .class, [attr], [attr=value] and the descendant and child combinators.
+
+        Raises:
+        SelectorError: If the selector can not be read.
+        '''
+        selector = selector.strip()
+        groups, steps, compound, combinator = [], [], None, None
+        position = 0
+        while position < len(selector):
+            match = __selectorToken__.match(selector,position)
+            if match is None:
+                raise SelectorError(f'Can not read the css selector "{selector}" at "{selector[position:]}"')
+            position = match.end()
+            mark, space, tag, id, className, name, *values = match.groups()
+            if mark or space:
+                if compound is not None:
+                    steps.append((combinator,compound))
+                    compound, combinator = None, ' '
+                if mark and (not steps or combinator != ' '):
+                    raise SelectorError(f'Misplaced "{mark}" in the css selector "{selector}"')
+                if mark == '>':
+                    combinator = '>'
+                elif mark == ',':
+                    groups.append(steps)
+                    steps, combinator = [], None
+                continue
+            if compound is None:
+                compound = {'tag':None,'id':None,'classes':[],'attributes':[]}
+            if tag is not None:
+                if compound['tag'] is not None or compound['id'] or compound['classes'] or compound['attributes']:
+                    raise SelectorError(f'Misplaced tag name "{tag}" in the css selector "{selector}"')
+                compound['tag'] = None if tag == '*' else '<'+tag.lower()+'>'
+            elif id is not None:
+                compound['id'] = id
+            elif className is not None:
+                compound['classes'].append(className)
+            else:
+                value = next((x for x in values if x is not None),None)
+                compound['attributes'].append((name,value))
+        if compound is not None:
+            steps.append((combinator,compound))
+        elif combinator is not None:
+            raise SelectorError(f'The css selector "{selector}" ends with a combinator')
+        if not steps:
+            raise SelectorError(f'Empty css selector "{selector}"')
+        groups.append(steps)
+        return groups
+def __matches_compound__(x,compound) -> bool:
+        '''Returns True if the element x matches a compound selector (see __parse_selector__).'''
+        if compound['tag'] is not None and x.tag != compound['tag']:
+            return False
+        attributes = x.attributes
+        if compound['id'] is not None and attributes.get('id') != compound['id']:
+            return False
+        if compound['classes']:
+            classes = __classes_of__(attributes)
+            for y in compound['classes']:
+                if y not in classes:
+                    return False
+        for name, value in compound['attributes']:
+            if name not in attributes:
+                return False
+            if value is not None and __attribute_text__(attributes[name]) != value:
+                return False
+        return True
+def __matches_steps__(x,steps,i:int,roots=None) -> bool:
+        '''
+        Returns True if the ancestors of x match steps[:i], x itself matching steps[i].
+        For a shared element, only the parents in the trees of roots (the head and body of the queried page) are followed, if given.
+        '''
+        combinator = steps[i][0]
+        if combinator is None:
+            return True
+        compound = steps[i-1][1]
+        parents = __parents__(x)
+        while True:
+            if len(parents) > 1 and roots is not None:
+                parents = [y for y in parents if __reaches__(y,roots)]
+            if combinator == '>' or len(parents) != 1:
+                break
+            parent = parents[0]
+            if __matches_compound__(parent,compound) and __matches_steps__(parent,steps,i-1,roots):
+                return True
+            parents = __parents__(parent)
+        for parent in parents:
+            if __matches_compound__(parent,compound) and __matches_steps__(parent,steps,i-1,roots):
+                return True
+            if combinator != '>' and __matches_steps__(parent,steps,i,roots):
+                return True
+        return False
+class elementIndex():
+    '''
+    The id, class and tag indexes of a page's element tree, used by page.find, page.find_all and page.select.
+    Each index maps a key (an id, a class name or a tag like '<p>') to the elements that have it, so a lookup costs
+    about the same on a 100 node and a 100k node page.
+
+    The index is built the first time the page is queried and then kept up to date: the elements added
+    to the tree (addElement, the innerhtml list or attribute) and the elements whose attributes or tag change
+    are indexed again at once. Entries of elements that were removed or changed are dropped when a query meets them.
+    Replacing the page's head or body builds the index again at the next query.
+    The results are in document order, except for elements added after the index was built, which come last.
+    A compactDocument head or body is not indexed (convert it with toElements() to query it).
+
+    Class attributes::
+        byRoot -> the live indexes, by the id() of their head and body
+    '''
+    byRoot = weakref.WeakValueDictionary()
+    def __init__(self,page):
+        '''
+        Build the indexes of the page's head and body.
+
+        Args:
+        page (page): The page to index.
+        '''
+        self.page = page
+        self.roots = (page.head,page.body)
+        self.byId = {}
+        self.byClass = {}
+        self.byTag = {}
+        for root in self.roots:
+            if isinstance(root,elements.element):
+                self.__insert__(root)
+                elementIndex.byRoot[id(root)] = self
+    def valid(self) -> bool:
+        '''Returns False if the page's head or body was replaced since the index was built.'''
+        return self.roots[0] is self.page.head and self.roots[1] is self.page.body
+    def __insert__(self,node,deep:bool=True):
+        '''Add node (and it's subtree if deep) to the indexes.'''
+        stack = [node]
+        while stack:
+            x = stack.pop()
+            if type(x)==str or isinstance(x,elements.comment):
+                continue
+            self.byTag.setdefault(x.tag,{})[x] = None
+            attributes = x.attributes
+            if attributes:
+                value = attributes.get('id')
+                if value is not None:
+                    self.byId.setdefault(value,{})[x] = None
+                for y in __classes_of__(attributes):
+                    self.byClass.setdefault(y,{})[x] = None
+            if deep and x.type == 'Container':
+                inner = x.innerhtml
+                if isinstance(inner,list):
+                    stack.extend(reversed(inner))
+                elif inner is not None and type(inner)!=str:
+                    stack.append(inner)
+    @classmethod
+    def changed(cls,node,deep:bool=True):
+        '''
+        Called by the elements when node was added to a tree or it's attributes or tag changed.
+        Indexes node again in the index of it's page, if there is one.
+
+        Args:
+        node (elements): The added or changed element.
+        deep (bool): Index it's subtree too.
+        '''
+        for root in __tops__(node):
+            index = cls.byRoot.get(id(root))
+            if index is not None and root in index.roots and index.valid():
+                index.__insert__(node,deep)
+    def __attached__(self,x) -> bool:
+        return __reaches__(x,self.roots)
+    def __candidates__(self,compound) -> list:
+        '''Returns the indexed elements that can match compound, from the most selective index, dropping the stale entries.'''
+        if compound['id'] is not None:
+            bucket, key = self.byId.get(compound['id']), lambda x: x.attributes.get('id') == compound['id']
+        elif compound['classes']:
+            bucket, key = self.byClass.get(compound['classes'][0]), lambda x: compound['classes'][0] in __classes_of__(x.attributes)
+        elif compound['tag'] is not None:
+            bucket, key = self.byTag.get(compound['tag']), lambda x: x.tag == compound['tag']
+        else:
+            return [x for x in self.__walk__()]
+        if not bucket:
+            return []
+        result, stale = [], []
+        for x in bucket:
+            if key(x) and self.__attached__(x):
+                result.append(x)
+            else:
+                stale.append(x)
+        for x in stale:
+            del bucket[x]
+        return result
+    def __walk__(self):
+        '''Yields all the elements of the tree, in document order.'''
+        stack = [x for x in reversed(self.roots) if isinstance(x,elements.element)]
+        while stack:
+            x = stack.pop()
+            if type(x)==str or isinstance(x,elements.comment):
+                continue
+            yield x
+            if x.type == 'Container':
+                inner = x.innerhtml
+                if isinstance(inner,list):
+                    stack.extend(reversed(inner))
+                elif inner is not None and type(inner)!=str:
+                    stack.append(inner)
+    def query(self,groups) -> list:
+        '''
+        Returns the elements matching any of the parsed selectors (see __parse_selector__), without duplicates.
+
+        Args:
+        groups (list): The parsed selectors.
+        '''
+        result = {}
+        for steps in groups:
+            last = len(steps)-1
+            compound = steps[-1][1]
+            for x in self.__candidates__(compound):
+                if __matches_compound__(x,compound) and __matches_steps__(x,steps,last,self.roots):
+                    result[x] = None
+        return list(result)
+def __children_of__(node) -> list:
+        '''Returns the children of an element as a list (a text or single element innerhtml gives a list of one).'''
+        inner = node.innerhtml
+        if isinstance(inner,list):
+            return inner
+        return [] if inner is None else [inner]
+def __child_list__(node) -> list:
+        '''Returns the innerhtml of an element as a childList, turning a text or single element innerhtml into a list first.'''
+        if not isinstance(node.innerhtml,list):
+            node.innerhtml = __children_of__(node)
+        return node.innerhtml
+def __fingerprint__(x):
+        '''Returns a key that is equal for two equal nodes: the text, or the raw rendering of an element (from it's render cache).'''
+        return (0,x) if type(x)==str else (1,x.cached(False))
+def __shape__(x):
+        '''Returns the kind of a node: it's tag and type for elements, used to pair the changed nodes in pagePatch.diff.'''
+        if type(x)==str:
+            return 0
+        if isinstance(x,elements.comment):
+            return 1
+        return (x.tag,x.type)
+class pagePatch():
+    def __init__(self,operations:list=None):
+        '''
+        A list of changes between two versions of a page, made by pagePatch.diff (or page.diff). Every operation is a tuple::
+            ('insert', section, path, node) -> insert node (an element or a text) at path
+            ('remove', section, path, None) -> remove the node at path
+            ('replace', section, path, node) -> replace the node at path by node
+            ('attributes', section, path, attributes) -> set the attributes of the element at path to the given dict
+        section is 'head' or 'body' and path the indexes of the node in the innerhtml lists, from the head or body
+        (an empty path is the head or body itself). The operations are applied in order, each path is read on the tree
+        as the operations before it left it.
+
+        Applying a patch only changes the nodes it names, through their innerhtml lists and attributes dicts,
+        so the render cache of the rest of the page is kept and the next render only renders the changed subtrees again.
+        A patch pickles on it's own (the nodes in it are copies), to be shipped instead of the whole page.
+
+        Args:
+        operations (list): The operations, empty by default.
+        '''
+        self.operations = operations if operations is not None else []
+    def __len__(self):
+        return len(self.operations)
+    def __iter__(self):
+        return iter(self.operations)
+    def __repr__(self):
+        return f'<pagePatch with {len(self.operations)} operations>'
+    @classmethod
+    def diff(cls,old,new):
+        '''
+        Compare two versions of a page and return the patch that turns old into new.
+        Identical subtrees are matched by their rendering (taken from the render cache), the others are compared
+        tag by tag, so an edit deep in the page gives a few operations on it's path instead of replacing the page.
+
+        Args:
+        old (page): The old version, like a page loaded with importRaw.
+        new (page): The new version.
+        '''
+        patch = cls()
+        for section in ('head','body'):
+            a, b = getattr(old,section), getattr(new,section)
+            if isinstance(a,compactDocument):
+                a = a.toElements()
+            if isinstance(b,compactDocument):
+                b = b.toElements()
+            patch.__diff__(a,b,section,())
+        return patch
+    def __diff__(self,a,b,section:str,path:tuple):
+        if type(a)==str or type(b)==str or isinstance(a,elements.comment) or isinstance(b,elements.comment) or a.tag != b.tag or a.type != b.type:
+            if __fingerprint__(a) != __fingerprint__(b):
+                self.operations.append(('replace',section,path,copy.deepcopy(b)))
+            return
+        if a.cached(False) == b.cached(False):
+            return
+        if list(a.attributes.items()) != list(b.attributes.items()):
+            self.operations.append(('attributes',section,path,copy.deepcopy(dict(b.attributes))))
+        if a.type != 'Container':
+            return
+        old, new = __children_of__(a), __children_of__(b)
+        # the common start and end are skipped before matching the rest
+        start, stop = 0, 0
+        size = min(len(old),len(new))
+        while start < size and __fingerprint__(old[start]) == __fingerprint__(new[start]):
+            start += 1
+        while stop < size-start and __fingerprint__(old[-1-stop]) == __fingerprint__(new[-1-stop]):
+            stop += 1
+        oldKeys = [__fingerprint__(x) for x in old[start:len(old)-stop]]
+        newKeys = [__fingerprint__(x) for x in new[start:len(new)-stop]]
+        matcher = difflib.SequenceMatcher(None,oldKeys,newKeys,autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            i1, i2, j1, j2 = i1+start, i2+start, j1+start, j2+start
+            if tag != 'replace':
+                self.__block__(old,new,i1,i2,j1,j2,section,path)
+                continue
+            # the changed nodes are paired by their tag, so an edited node is diffed instead of replaced
+            shapes = difflib.SequenceMatcher(None,[__shape__(x) for x in old[i1:i2]],[__shape__(x) for x in new[j1:j2]],autojunk=False)
+            for tag, a1, a2, b1, b2 in shapes.get_opcodes():
+                self.__block__(old,new,i1+a1,i1+a2,j1+b1,j1+b2,section,path)
+    def __block__(self,old:list,new:list,i1:int,i2:int,j1:int,j2:int,section:str,path:tuple):
+        '''Turn the old children old[i1:i2] into new[j1:j2]. The tree already matches new[:j1], so old[i1] is at j1.'''
+        paired = min(i2-i1,j2-j1)
+        for k in range(paired):
+            self.__diff__(old[i1+k],new[j1+k],section,path+(j1+k,))
+        for k in range(i2-i1-paired):
+            self.operations.append(('remove',section,path+(j1+paired,),None))
+        for k in range(j1+paired,j2):
+            self.operations.append(('insert',section,path+(k,),copy.deepcopy(new[k])))
+    def apply(self,page):
+        '''
+        Apply the patch to a page (the page is changed in place). A compactDocument head or body is converted to elements first.
+
+        Args:
+        page (page): The page, in the version the patch was made from.
+        '''
+        for kind, section, path, data in self.operations:
+            root = getattr(page,section)
+            if isinstance(root,compactDocument):
+                root = root.toElements()
+                setattr(page,section,root)
+            if type(data)!=str:
+                data = copy.deepcopy(data)
+            if kind == 'attributes':
+                node = root
+                for i in path:
+                    node = __children_of__(node)[i]
+                node.attributes = data
+                continue
+            if not path:
+                setattr(page,section,data)
+                continue
+            parent = root
+            for i in path[:-1]:
+                parent = __children_of__(parent)[i]
+            children = __child_list__(parent)
+            if kind == 'insert':
+                children.insert(path[-1],data)
+            elif kind == 'remove':
+                del children[path[-1]]
+            else:
+                children[path[-1]] = data
+    def applyRaw(self,folder:str):
+        '''
+        Apply the patch to a page exported with page.exportRaw, without importing it in a page object.
+        Only the files of the sections the patch changes ('Head.RBCode', 'Body.RBCode') are read and written again.
+
+        Args:
+        folder (str): The raw folder of the page.
+
+        Raises:
+        FileError: If the raw files could not be found.
+        '''
+        sections = {x[1] for x in self.operations}
+        holder = page(os.path.basename(folder))
+        for section in sections:
+            try:
+                # read in memory, the file is written again below
+                setattr(holder,section,__load_raw__(os.path.join(folder,section.capitalize()+'.RBCode'),False))
+            except FileNotFoundError:
+                raise FileError(f'The raw file of the {section} of "{folder}" does not exist.')
+        self.apply(holder)
+        for section in sections:
+            __write_file__(os.path.join(folder,section.capitalize()+'.RBCode'),__dump_raw__(getattr(holder,section)))
+class parentList(list):
+    '''
+    The parents of an element that is in more than one innerhtml, like a nav shared by all the pages of a project.
+    An element keeps it's only parent in it's _parent slot, and a parentList there once it has more than one (see __add_parent__),
+    so an edit of a shared subtree clears the render cache, and is indexed, on every page that has it.
+    '''
+    __slots__ = ()
+def __add_parent__(x,owner):
+        '''Make owner a parent of the element x, keeping the parents x already has.'''
+        parent = x._parent
+        if parent is None:
+            object.__setattr__(x,'_parent',owner)
+        elif parent is not owner:
+            if type(parent) is parentList:
+                if not any(y is owner for y in parent):
+                    parent.append(owner)
+            else:
+                object.__setattr__(x,'_parent',parentList((parent,owner)))
+def __drop_parent__(x,owner):
+        '''Remove owner from the parents of the element x.'''
+        parent = x._parent
+        if parent is owner:
+            object.__setattr__(x,'_parent',None)
+        elif type(parent) is parentList:
+            for i, y in enumerate(parent):
+                if y is owner:
+                    del parent[i]
+                    break
+            if len(parent) == 1:
+                object.__setattr__(x,'_parent',parent[0])
+def __parents__(x) -> tuple:
+        '''Returns the parents of the element x (none, one, or more for a shared element).'''
+        parent = x._parent
+        if parent is None:
+            return ()
+        return tuple(parent) if type(parent) is parentList else (parent,)
+def __tops__(x) -> list:
+        '''Returns the roots (the elements without a parent) of all the trees x is in, x itself if it has no parent.'''
+        tops, seen, stack = [], set(), [x]
+        while stack:
+            y = stack.pop()
+            parents = __parents__(y)
+            if not parents:
+                tops.append(y)
+            for z in parents:
+                if id(z) not in seen:
+                    seen.add(id(z))
+                    stack.append(z)
+        return tops
+def __reaches__(x,roots) -> bool:
+        '''Returns True if x is one of roots or in the tree of one of them.'''
+        seen, stack = set(), [x]
+        while stack:
+            y = stack.pop()
+            if any(y is z for z in roots):
+                return True
+            for z in __parents__(y):
+                if id(z) not in seen:
+                    seen.add(id(z))
+                    stack.append(z)
+        return False
+class childList(list):
+    '''
+    The innerhtml list of an element. A list that sets the parent of the elements added to it (and clears it for the removed ones),
+    clears the render cache of it's owner element when it is changed (see elements.element) and reports the added elements to the page index (see elementIndex).
+    '''
+    __slots__ = ('owner',)
+    def __init__(self,iterable=(),owner=None):
+        super().__init__(iterable)
+        self.owner = owner
+        if owner is not None:
+            for x in self:
+                if type(x)!=str:
+                    __add_parent__(x,owner)
+    def __changed__(self,added=(),structure=True):
+        owner = getattr(self,'owner',None)
+        if owner is None:
+            return
+        for x in added:
+            if type(x)!=str:
+                __add_parent__(x,owner)
+        owner.invalidate(structure)
+        if elementIndex.byRoot:
+            for x in added:
+                if type(x)!=str:
+                    elementIndex.changed(x)
+    def __reduce__(self):
+        # rebuilt from a plain list, so loading or copying a tree does not report changes to half loaded elements
+        return (childList,(list(self),),getattr(self,'owner',None))
+    def __setstate__(self,owner):
+        if type(owner)==tuple:
+            # the (None, slots) state of the trees pickled before
+            owner = owner[1].get('owner')
+        self.owner = owner
+    def __removed__(self,removed):
+        """Clear the parent of the removed elements, so they are no longer seen as part of the tree"""
+        owner = getattr(self,'owner',None)
+        if owner is None:
+            return
+        for x in removed:
+            if type(x)!=str and x not in self:
+                __drop_parent__(x,owner)
+    def __setitem__(self,index,value):
+        structure = not (type(value)==str and type(index)==int and type(self[index])==str)
+        old = self[index] if type(index)==slice else (self[index],)
+        if type(index)==slice:
+            value = list(value)
+        super().__setitem__(index,value)
+        self.__removed__(old)
+        self.__changed__(value if type(index)==slice else (value,),structure)
+    def __delitem__(self,index):
+        old = self[index] if type(index)==slice else (self[index],)
+        super().__delitem__(index)
+        self.__removed__(old)
+        self.__changed__()
+    def __iadd__(self,other):
+        other = list(other)
+        super().__iadd__(other)
+        self.__changed__(other)
+        return self
+    def __imul__(self,n):
+        old = list(self) if n < 1 else ()
+        super().__imul__(n)
+        self.__removed__(old)
+        self.__changed__()
+        return self
+    def append(self,x):
+        super().append(x)
+        self.__changed__((x,))
+    def extend(self,iterable):
+        iterable = list(iterable)
+        super().extend(iterable)
+        self.__changed__(iterable)
+    def insert(self,index,x):
+        super().insert(index,x)
+        self.__changed__((x,))
+    def pop(self,index=-1):
+        x = super().pop(index)
+        self.__removed__((x,))
+        self.__changed__()
+        return x
+    def remove(self,x):
+        super().remove(x)
+        self.__removed__((x,))
+        self.__changed__()
+    def clear(self):
+        old = list(self)
+        super().clear()
+        self.__removed__(old)
+        self.__changed__()
+    def sort(self,*args,**kwargs):
+        super().sort(*args,**kwargs)
+        self.__changed__()
+    def reverse(self):
+        super().reverse()
+        self.__changed__()
+class attributeDict(dict):
+    '''
+    The attributes dict of an element. A dict that clears the render cache of it's owner element when it is changed (see elements.element)
+    and indexes it again in the page index (see elementIndex).
+    '''
+    __slots__ = ('owner',)
+    def __init__(self,mapping=(),owner=None):
+        super().__init__(mapping)
+        self.owner = owner
+    def __reduce__(self):
+        return (attributeDict,(dict(self),),getattr(self,'owner',None))
+    def __setstate__(self,owner):
+        if type(owner)==tuple:
+            # the (None, slots) state of the trees pickled before
+            owner = owner[1].get('owner')
+        self.owner = owner
+    def __changed__(self):
+        owner = getattr(self,'owner',None)
+        if owner is not None:
+            owner.invalidate()
+            if elementIndex.byRoot:
+                elementIndex.changed(owner,False)
+    def __setitem__(self,key,value):
+        super().__setitem__(key,value)
+        self.__changed__()
+    def __delitem__(self,key):
+        super().__delitem__(key)
+        self.__changed__()
+    def __ior__(self,other):
+        super().__ior__(other)
+        self.__changed__()
+        return self
+    def update(self,*args,**kwargs):
+        super().update(*args,**kwargs)
+        self.__changed__()
+    def pop(self,*args):
+        x = super().pop(*args)
+        self.__changed__()
+        return x
+    def popitem(self):
+        x = super().popitem()
+        self.__changed__()
+        return x
+    def setdefault(self,key,default=None):
+        x = super().setdefault(key,default)
+        self.__changed__()
+        return x
+    def clear(self):
+        super().clear()
+        self.__changed__()
 class elements():
-    class title():
+    class element():
+        '''
+        The base class of all elements. It holds everything the elements have in common:
+        the tag, it's type ('Container' or 'Empty'), innerhtml, attributes and the render, iter_render,
+        renderAttributes, compile and addElement funcs. The elements use __slots__, they have no per-instance
+        __dict__ and keep no render buffer, so a node costs about 270 bytes (see benchmarks/bench_memory.py).
+
+        It also keeps the render cache of the element:
+        render() stores the output of every element of the tree, and the next render reuses it for all the
+        subtrees that did not change. Setting any attribute of an element (innerhtml, attributes, tag...),
+        changing it's innerhtml list or attributes dict in place or calling addElement clears the cache of
+        the element and of all it's parents, up to the root. So re-rendering after a small edit only
+        renders again the path from the edit to the root.
+
+        The innerhtml list and attributes dict are kept as childList and attributeDict, copies of the
+        given list and dict that report their changes.
+
+        Class attributes::
+            caching -> set to False to turn the cache off (render() then renders the whole tree every time)
+            hits, misses -> the cache counters, see cacheInfo()
+        '''
+        __slots__ = ('tag','type','innerhtml','attributes','token','_parent','_cache','_cacheKey')
+        caching = True
+        hits = 0
+        misses = 0
+        def __init__(self,tag:str,innerHTML=None,attributes:dict=None,tagType:str='Container',token:str='Verified'):
+            """
+            Args:
+            1. tag -> the starting tag. Ex: '<p>'
+            2. innerHTML -> content inside, None for empty tags
+            3. attributes -> a dict that stores all the atrributes for this tag. Ex: {'font-family':'Times New Roaman'}
+            4. tagType -> 'Container' or 'Empty' (for tags that are not closed)
+            5. token -> 'Verified' for the tags listed in elements, 'Unverified' otherwise
+            """
+            set = object.__setattr__
+            set(self,'_parent',None)
+            set(self,'_cache',None)
+            set(self,'_cacheKey',None)
+            set(self,'tag',tag)
+            set(self,'type',tagType)
+            set(self,'token',token)
+            set(self,'attributes',attributeDict(attributes or (),self))
+            set(self,'innerhtml',self.__adopt__(innerHTML))
+        @classmethod
+        def build(cls,tag:str,tagType:str='Container',children=None,attributes:dict=None):
+            """Make an element of this class for a parsed tag, without calling the class' own __init__. This is the factory
+            of the built-in classes in elements.registry, a subclass registered with elements.register uses it too.
+
+            Args:
+            1. tag -> the starting tag. Ex: '<h2>'
+            2. tagType -> 'Container' or 'Empty'
+            3. children -> the children elements (ignored for empty tags)
+            4. attributes -> a dict that stores all the atrributes for this tag
+            """
+            x = cls.__new__(cls)
+            elements.element.__init__(x,tag,children if tagType=='Container' else None,attributes,tagType)
+            return x
+        def __adopt__(self,innerhtml):
+            """Wrap a new innerhtml (a list becomes a childList) and set this object as the parent of it's elements"""
+            if isinstance(innerhtml,list):
+                return childList(innerhtml,self)
+            if innerhtml is not None and type(innerhtml)!=str:
+                __add_parent__(innerhtml,self)
+            return innerhtml
+        def __setattr__(self,name,value):
+            structure = True
+            if name == 'innerhtml':
+                old = getattr(self,'innerhtml',None)
+                structure = not (type(value)==str and type(old)==str)
+                if isinstance(old,childList):
+                    old.owner = None
+                if old is not None and type(old)!=str:
+                    for x in (old if isinstance(old,list) else (old,)):
+                        if type(x)!=str:
+                            __drop_parent__(x,self)
+                value = self.__adopt__(value)
+            elif name == 'attributes':
+                value = attributeDict(value,self)
+            object.__setattr__(self,name,value)
+            if name[0] != '_':
+                self.invalidate(structure)
+                if elementIndex.byRoot and name in ('tag','attributes','innerhtml'):
+                    elementIndex.changed(self,name=='innerhtml')
+        def __getstate__(self):
+            state = {}
+            for cls in type(self).__mro__:
+                for x in cls.__dict__.get('__slots__',()):
+                    if x not in ('_parent','_cache','_cacheKey') and hasattr(self,x):
+                        state[x] = getattr(self,x)
+            return state
+        def __setstate__(self,state):
+            # also loads the trees pickled before the elements had __slots__ (their state is the old __dict__)
+            if type(state)==tuple:
+                state = state[1]
+            slots = set()
+            for cls in type(self).__mro__:
+                slots.update(cls.__dict__.get('__slots__',()))
+            for x in slots:
+                object.__setattr__(self,x,None)
+            object.__setattr__(self,'type','Container')
+            object.__setattr__(self,'token','Verified')
+            for x in state:
+                if x in slots:
+                    object.__setattr__(self,x,state[x])
+            if 'type' not in state and self.innerhtml is None:
+                object.__setattr__(self,'type','Empty')
+            if not isinstance(self.innerhtml,childList):
+                object.__setattr__(self,'innerhtml',self.__adopt__(self.innerhtml))
+            else:
+                # the parent is not pickled (a pickled subtree does not drag it's parents along), the children get it back here
+                for x in self.innerhtml:
+                    if type(x)!=str:
+                        __add_parent__(x,self)
+            if not isinstance(self.attributes,attributeDict):
+                object.__setattr__(self,'attributes',attributeDict(self.attributes or (),self))
+        def invalidate(self,structure:bool=True):
+            """Clear the render cache of this object and of all it's parents, on every path up to the roots for a shared subtree.
+            
+            Args:
+            1. structure -> False if only text changed, True if the tree, the tags or the attributes changed
+               (the renderPlans compiled from this object or one of it's parents are then compiled again)
+            """
+            plans = structure and renderPlan.byRoot
+            node = self
+            while node is not None:
+                object.__setattr__(node,'_cache',None)
+                if plans:
+                    renderPlan.__mutated__(node)
+                node = node._parent
+                if type(node) is parentList:
+                    seen, stack = {id(x) for x in node}, list(node)
+                    while stack:
+                        x = stack.pop()
+                        object.__setattr__(x,'_cache',None)
+                        if plans:
+                            renderPlan.__mutated__(x)
+                        for y in __parents__(x):
+                            if id(y) not in seen:
+                                seen.add(id(y))
+                                stack.append(y)
+                    break
+        def cached(self,pretty=False,depth=0) -> str:
+            """Render this object, reusing the cached output of every subtree that did not change since the last render
+            
+            Args:
+            1. pretty -> indent the output, one tag or text per line
+            2. depth -> the indentation level of this object, only used when pretty
+            """
+            element = elements.element
+            if not element.caching:
+                return ''.join(self.iter_render(pretty,depth))
+            key = depth if pretty else -1
+            if self._cache is not None and self._cacheKey == key:
+                element.hits += 1
+                return self._cache
+            element.misses += 1
+            line = ''.join(self.iter_render(pretty,depth,False,True))
+            object.__setattr__(self,'_cache',line)
+            object.__setattr__(self,'_cacheKey',key)
+            return line
+        @classmethod
+        def cacheInfo(cls) -> dict:
+            """Returns the render cache counters as {'hits':..,'misses':..,'caching':..}"""
+            element = elements.element
+            return {'hits':element.hits,'misses':element.misses,'caching':element.caching}
+        @classmethod
+        def resetCacheInfo(cls):
+            """Set the render cache counters back to 0"""
+            elements.element.hits = 0
+            elements.element.misses = 0
+        def render(self,pretty=False) -> str:
+            """
+            Renders this widget, including any children elements. Returns a string as a html tag.
+            
+            Args:
+            1. pretty -> indent the output, one tag or text per line (like the exported pages)
+            """
+            return self.cached(pretty)
+        def compile(self,pretty=False,depth=0):
+            """Compile this object into a renderPlan, a reusable flat plan of static strings and text slots (see renderPlan)"""
+            return renderPlan(self,pretty,depth)
+        def iter_render(self,pretty=False,depth=0,slots=False,cache=False):
+            """Render this object chunk by chunk, depth-first. Yields strings
+            
+            Args:
+            1. pretty -> indent the output, one tag or text per line (like the exported pages)
+            2. depth -> the indentation level of this object, only used when pretty
+            3. slots -> yield the text as renderPlan slots instead of strings, used by compile()
+            4. cache -> render the children through their render cache (see cached), used by render()
+            """
+            owner = self if slots else None
+            if pretty:
+                yield from __iter_pretty__(self.tag,self.attributes,self.innerhtml,depth,self.type=='Container',owner,cache)
+                return
+            yield self.renderAttributes() if self.attributes else self.tag
+            if self.type=='Container':
+                yield from __iter_inner__(self.innerhtml,False,0,owner,cache)
+                yield self.tag.replace('<','</')
+            yield '\n'
+        def renderAttributes(self) -> str:
+            """Renders the start tag with this object's attributes, used by render"""
+            return __render_attributes__(self.tag,self.attributes)
+        def addElement(self,element):
+            """Add a child element (for container tags)"""
+            self.innerhtml.append(element)
+    class title(element):
+        __slots__ = ()
         def __init__(self,innerHTML):
             """
             A <title> html tag representing object with the following funcs
@@ -326,30 +1881,9 @@ class elements():
             1. count -> Does not hold any significant importance; can be set to 0
             2. innerHTML -> The content that goes inside <title></title> tags.
             """
-            self.tag = '<title>'
-            self.innerhtml = innerHTML
-            self.token = 'Verified'
-        def render(self) -> str:
-            """
-            Renders this widget. Returns a string as a html tag.
-            """
-            self.line = ''
-            self.line += self.tag
-            if type(self.innerhtml)==type('str'):
-                self.line += self.innerhtml
-            else:
-                if type(self.innerhtml) != type(['h','l']):
-                    self.line += self.innerhtml.render()
-                else:
-                    for x in self.innerhtml:
-                        if type(x)==str:
-                            self.line += x
-                        else:
-                            self.line += x.render()
-            self.line += self.tag.replace('<','</')
-            self.line += '\n'
-            return self.line
-    class head():
+            super().__init__('<title>',innerHTML)
+    class head(element):
+        __slots__ = ()
         def __init__(self,innerHTML=[]):
             """
             The root object holder for all objects related to <head> tag(s) with the following funcs
@@ -363,31 +1897,9 @@ class elements():
             Also, you can remove, access, add any children element by accessing it's innerhtml variable
             NOTE: innerhtml is different from innerHTML. innerHTML will be found in args, while it will be stored as innerhtml in the object.
             """
-            self.tag = '<head>'
-            self.innerhtml = innerHTML
-            self.token = 'Verified'
-        def render(self):
-            """Render this object, including any children elements"""
-            self.line = ''
-            self.line += self.tag
-            if type(self.innerhtml)==type('str'):
-                self.line += self.innerhtml
-            else:
-                if type(self.innerhtml) != type(['h','l']):
-                    self.line += self.innerhtml.render()
-                else:
-                    for x in self.innerhtml:
-                        if type(x)==str:
-                            self.line += x
-                        else:
-                            self.line += x.render()
-            self.line += self.tag.replace('<','</')
-            self.line += '\n'
-            return self.line
-        def addElement(self,element):
-            """Add a children element"""
-            self.innerhtml.append(element)
-    class body():
+            super().__init__('<head>',innerHTML)
+    class body(element):
+        __slots__ = ()
         def __init__(self,innerHTML=[]):
             """The root object holder for all objects related to <body> tag(s) with the following funcs
             1. render -> render this object
@@ -399,31 +1911,9 @@ class elements():
             This object can have many other children objects/elements and can be added using it's addElement function. When rendered, all children objects/elements will also be rendered.
             Also, you can remove, access, add any children element by accessing it's innerhtml variable
             NOTE: innerhtml is different from innerHTML. innerHTML will be found in args, while it will be stored as innerhtml in the object."""
-            self.tag = '<body>'
-            self.innerhtml = innerHTML
-            self.token = 'Verified'
-        def render(self):
-            """Render this object, including any children elements"""
-            self.line = ''
-            self.line += self.tag
-            if type(self.innerhtml)==type('str'):
-                self.line += self.innerhtml
-            else:
-                if type(self.innerhtml) != type(['h','l']):
-                    self.line += self.innerhtml.render()
-                else:
-                    for x in self.innerhtml:
-                        if type(x)==str:
-                            self.line += x
-                        else:
-                            self.line += x.render()
-            self.line += self.tag.replace('<','</')
-            self.line += '\n'
-            return self.line
-        def addElement(self,element):
-            """Add a child element"""
-            self.innerhtml.append(element)
-    class li():
+            super().__init__('<body>',innerHTML)
+    class li(element):
+        __slots__ = ()
         def __init__(self,innerHTML,attributes={}):
             """A <li> tag object with the following funcs
             1. render -> render this object as a <li>
@@ -437,48 +1927,9 @@ class elements():
             3. attributes -> a dict that stores all the atrributes for this tag. Ex: {'font-family':'Times New Roaman'}
             NOTE: innerhtml is different from innerHTML. innerHTML will be found in args, while it will be stored as innerhtml in the object.
             """
-            self.tag = '<li>'
-            self.innerhtml = innerHTML
-            self.attributes = attributes
-            self.token = 'Verified'
-        def render(self):
-            self.line = ''
-            if self.attributes=={}:
-                self.line += self.tag
-            else:
-                self.line += self.renderAttributes()
-            if type(self.innerhtml)==type('str'):
-                self.line += self.innerhtml
-            else:
-                if type(self.innerhtml) != type(['h','l']):
-                    self.line += self.innerhtml.render()
-                else:
-                    for x in self.innerhtml:
-                        if type(x)==str:
-                            self.line += x
-                        else:
-                            self.line += x.render()
-            self.line += self.tag.replace('<','</')
-            self.line += '\n'
-            return self.line
-        def renderAttributes(self):
-            """Used by the render() function"""
-            self.line = self.tag.replace('>',' ')
-            for y in self.attributes:
-                self.line += y+'="'
-                if not type(self.attributes[y])==type('str'):
-                    for z in self.attributes[y]:
-                        if y != 'style':
-                            self.line+= z+' '
-                        else:
-                            self.line += z+';'
-                    self.line.removesuffix(' ')
-                    self.line += '" '
-                elif type(self.attributes[y])==type('str'):
-                    self.line += self.attributes[y]+'" '
-            self.line += '>'
-            return self.line
-    class ul():
+            super().__init__('<li>',innerHTML,attributes)
+    class ul(element):
+        __slots__ = ()
         def __init__(self,innerHTML,attributes={}):
             """A <ul> tag object with the following funcs
             1. render -> render this object as a <ul>
@@ -491,49 +1942,9 @@ class elements():
             3. attributes -> a dict that stores all the atrributes for this tag. Ex: {'font-family':'Times New Roaman'}
             NOTE: innerhtml is different from innerHTML. innerHTML will be found in args, while it will be stored as innerhtml in the object.
             """
-            self.tag = '<ul>'
-            self.innerhtml = innerHTML
-            self.attributes = attributes
-            self.token = 'Verified'
-        def addElement(self, child):
-            self.innerhtml.append(child)
-        def render(self):
-            self.line = ''
-            if self.attributes=={}:
-                self.line += self.tag
-            else:
-                self.line += self.renderAttributes()
-            if type(self.innerhtml)==type('str'):
-                self.line += self.innerhtml
-            else:
-                if type(self.innerhtml) != type(['h','l']):
-                    self.line += self.innerhtml.render()
-                else:
-                    for x in self.innerhtml:
-                        if type(x)==str:
-                            self.line += x
-                        else:
-                            self.line += x.render()
-            self.line += self.tag.replace('<','</')
-            self.line += '\n'
-            return self.line
-        def renderAttributes(self):
-            self.line = self.tag.replace('>',' ')
-            for y in self.attributes:
-                self.line += y+'="'
-                if not type(self.attributes[y])==type('str'):
-                    for z in self.attributes[y]:
-                        if y != 'style':
-                            self.line+= z+' '
-                        else:
-                            self.line += z+';'
-                    self.line.removesuffix(' ')
-                    self.line += '" '
-                elif type(self.attributes[y])==type('str'):
-                    self.line += self.attributes[y]+'" '
-            self.line += '>'
-            return self.line
-    class ol():
+            super().__init__('<ul>',innerHTML,attributes)
+    class ol(element):
+        __slots__ = ()
         def __init__(self,innerHTML:str|list,attributes:dict={}):
             """A <ol> tag object with the following funcs
             1. render -> render this object as a <ol>
@@ -546,49 +1957,9 @@ class elements():
             3. attributes -> a dict that stores all the atrributes for this tag. Ex: {'font-family':'Times New Roaman'}
             NOTE: innerhtml is different from innerHTML. innerHTML will be found in args, while it will be stored as innerhtml in the object.
             """
-            self.tag = '<ol>'
-            self.innerhtml = innerHTML
-            self.attributes = attributes
-            self.token = 'Verified'
-        def addElement(self, child):
-            self.innerhtml.append(child)
-        def render(self):
-            self.line = ''
-            if self.attributes=={}:
-                self.line += self.tag
-            else:
-                self.line += self.renderAttributes()
-            if type(self.innerhtml)==type('str'):
-                self.line += self.innerhtml
-            else:
-                if type(self.innerhtml) != type(['h','l']):
-                    self.line += self.innerhtml.render()
-                else:
-                    for x in self.innerhtml:
-                        if type(x)==str:
-                            self.line += x
-                        else:
-                            self.line += x.render()
-            self.line += self.tag.replace('<','</')
-            self.line += '\n'
-            return self.line
-        def renderAttributes(self):
-            self.line = self.tag.replace('>',' ')
-            for y in self.attributes:
-                self.line += y+'="'
-                if not type(self.attributes[y])==type('str'):
-                    for z in self.attributes[y]:
-                        if y != 'style':
-                            self.line+= z+' '
-                        else:
-                            self.line += z+';'
-                    self.line.removesuffix(' ')
-                    self.line += '" '
-                elif type(self.attributes[y])==type('str'):
-                    self.line += self.attributes[y]+'" '
-            self.line += '>'
-            return self.line
-    class p():
+            super().__init__('<ol>',innerHTML,attributes)
+    class p(element):
+        __slots__ = ()
         def __init__(self,innerHTML:str|list,attributes:dict={}):
             """A <p> tag object with the following funcs
             1. render -> render this object as a <p>
@@ -601,47 +1972,9 @@ class elements():
             3. attributes -> a dict that stores all the atrributes for this tag. Ex: {'font-family':'Times New Roaman'}
             NOTE: innerhtml is different from innerHTML. innerHTML will be found in args, while it will be stored as innerhtml in the object.
             """
-            self.tag = '<p>'
-            self.innerhtml = innerHTML
-            self.attributes = attributes
-            self.token = 'Verified'
-        def render(self):
-            self.line = ''
-            if self.attributes=={}:
-                self.line += self.tag
-            else:
-                self.line += self.renderAttributes()
-            if type(self.innerhtml)==type('str'):
-                self.line += self.innerhtml
-            else:
-                if type(self.innerhtml) != type(['h','l']):
-                    self.line += self.innerhtml.render()
-                else:
-                    for x in self.innerhtml:
-                        if type(x)==str:
-                            self.line += x
-                        else:
-                            self.line += x.render()
-            self.line += self.tag.replace('<','</')
-            self.line += '\n'
-            return self.line
-        def renderAttributes(self):
-            self.line = self.tag.replace('>',' ')
-            for y in self.attributes:
-                self.line += y+'="'
-                if not type(self.attributes[y])==type('str'):
-                    for z in self.attributes[y]:
-                        if y != 'style':
-                            self.line+= z+' '
-                        else:
-                            self.line += z+';'
-                    self.line.removesuffix(' ')
-                    self.line += '" '
-                elif type(self.attributes[y])==type('str'):
-                    self.line += self.attributes[y]+'" '
-            self.line += '>'
-            return self.line
-    class tag():
+            super().__init__('<p>',innerHTML,attributes)
+    class tag(element):
+        __slots__ = ()
         def __init__(self,tag: str='<br>',tagType: str='Empty',innerHTML:str|list=[],attributes:dict={}):
             """A special tag object that deals with those tags not listed here; with the following funcs
             1. render -> render this object as a html tag
@@ -656,49 +1989,9 @@ class elements():
             3. attributes -> a dict that stores all the atrributes for this tag. Ex: {'font-family':'Times New Roaman'}
             NOTE: innerhtml is different from innerHTML. innerHTML will be found in args, while it will be stored as innerhtml in the object.
             """
-            self.tag = tag
-            self.type = tagType
-            self.innerhtml = innerHTML
-            self.token = 'Unverified'
-            self.attributes = attributes
-        def render(self):
-            self.line = ''
-            if self.attributes=={}:
-                self.line += self.tag
-            else:
-                self.line += self.renderAttributes()
-            if self.type=='Container':
-                if type(self.innerhtml)==type('str'):
-                    self.line += self.innerhtml
-                else:
-                    if type(self.innerhtml) != type(['h','l']):
-                        self.line += self.innerhtml.render()
-                    else:
-                        for x in self.innerhtml:
-                            if type(x)==str:
-                                self.line += x
-                            else:
-                                self.line += x.render()
-                self.line += self.tag.replace('<','</')
-            self.line += '\n'
-            return self.line
-        def renderAttributes(self):
-            self.line = self.tag.replace('>',' ')
-            for y in self.attributes:
-                self.line += y+'="'
-                if not type(self.attributes[y])==type('str'):
-                    for z in self.attributes[y]:
-                        if y != 'style':
-                            self.line+= z+' '
-                        else:
-                            self.line += z+';'
-                    self.line.removesuffix(' ')
-                    self.line += '" '
-                elif type(self.attributes[y])==type('str'):
-                    self.line += self.attributes[y]+'" '
-            self.line += '>'
-            return self.line
-    class hn():
+            super().__init__(tag,innerHTML,attributes,tagType,'Unverified')
+    class hn(element):
+        __slots__ = ()
         def __init__(self,level:int,innerHTML:str|list='',attributes:dict={}):
             """A heading tag (like <h1>) with the following funcs
             1. render -> render this object as a <hn>
@@ -712,47 +2005,9 @@ class elements():
             4. attributes -> a dict that stores all the atrributes for this tag. Ex: {'font-family':'Times New Roaman'}
             NOTE: innerhtml is different from innerHTML. innerHTML will be found in args, while it will be stored as innerhtml in the object.
             """
-            self.tag = f'<h{level}>'
-            self.innerhtml = innerHTML
-            self.attributes = attributes
-            self.token = 'Verified'
-        def render(self):
-            self.line = ''
-            if self.attributes=={}:
-                self.line += self.tag
-            else:
-                self.line += self.renderAttributes()
-            if type(self.innerhtml)==type('str'):
-                self.line += self.innerhtml
-            else:
-                if type(self.innerhtml) != type(['h','l']):
-                    self.line += self.innerhtml.render()
-                else:
-                    for x in self.innerhtml:
-                        if type(x)==str:
-                            self.line += x
-                        else:
-                            self.line += x.render()
-            self.line += self.tag.replace('<','</')
-            self.line += '\n'
-            return self.line
-        def renderAttributes(self):
-            self.line = self.tag.replace('>',' ')
-            for y in self.attributes:
-                self.line += y+'="'
-                if not type(self.attributes[y])==type('str'):
-                    for z in self.attributes[y]:
-                        if y != 'style':
-                            self.line+= z+' '
-                        else:
-                            self.line += z+';'
-                    self.line.removesuffix(' ')
-                    self.line += '" '
-                elif type(self.attributes[y])==type('str'):
-                    self.line += self.attributes[y]+'" '
-            self.line += '>'
-            return self.line
-    class div():
+            super().__init__(f'<h{level}>',innerHTML,attributes)
+    class div(element):
+        __slots__ = ()
         def __init__(self,innerHTML:str|list=[],attributes:dict={}):
             """A <div> tag object with the following funcs
             1. render -> render this object as a <div>
@@ -766,49 +2021,9 @@ class elements():
             3. attributes -> a dict that stores all the atrributes for this tag. Ex: {'font-family':'Times New Roaman'}
             NOTE: innerhtml is different from innerHTML. innerHTML will be found in args, while it will be stored as innerhtml in the object.
             """
-            self.tag = '<div>'
-            self.innerhtml = innerHTML
-            self.token = 'Verified'
-            self.attributes = attributes
-        def render(self):
-            self.line = ''
-            if self.attributes=={}:
-                self.line += self.tag
-            else:
-                self.line += self.renderAttributes()
-            if type(self.innerhtml)==type('str'):
-                self.line += self.innerhtml
-            else:
-                if type(self.innerhtml) != type(['h','l']):
-                    self.line += self.innerhtml.render()
-                else:
-                    for x in self.innerhtml:
-                        if type(x)==str:
-                            self.line += x
-                        else:
-                            self.line += x.render()
-            self.line += self.tag.replace('<','</')
-            self.line += '\n'
-            return self.line
-        def addElement(self,element):
-            self.innerhtml.append(element)
-        def renderAttributes(self):
-            self.line = self.tag.replace('>',' ')
-            for y in self.attributes:
-                self.line += y+'="'
-                if not type(self.attributes[y])==type('str'):
-                    for z in self.attributes[y]:
-                        if y != 'style':
-                            self.line+= z+' '
-                        else:
-                            self.line += z+';'
-                    self.line.removesuffix(' ')
-                    self.line += '" '
-                elif type(self.attributes[y])==type('str'):
-                    self.line += self.attributes[y]+'" '
-            self.line += '>'
-            return self.line
-    class img():
+            super().__init__('<div>',innerHTML,attributes)
+    class img(element):
+        __slots__ = ()
         def __init__(self,attributes:dict={}):
             
             """An <img> tag object with the following funcs
@@ -829,35 +2044,9 @@ class elements():
             4. attributes -> a dict that stores all the atrributes for this tag. Ex: {'font-family':'Times New Roaman'}
             NOTE: innerhtml is different from innerHTML. innerHTML will be found in args, while it will be stored as innerhtml in the object.
             """
-            self.tag = '<img>'
-            self.attributes = attributes
-            self.token = 'Verified'
-        def render(self):
-            self.line = ''
-            if self.attributes=={}:
-                self.line += self.tag
-            else:
-                self.line += self.renderAttributes()
-            self.line += self.tag.replace('<','</')
-            self.line += '\n'
-            return self.line
-        def renderAttributes(self):
-            self.line = self.tag.replace('>',' ')
-            for y in self.attributes:
-                self.line += y+'="'
-                if not type(self.attributes[y])==type('str'):
-                    for z in self.attributes[y]:
-                        if y != 'style':
-                            self.line+= z+' '
-                        else:
-                            self.line += z+';'
-                    self.line.removesuffix(' ')
-                    self.line += '" '
-                elif type(self.attributes[y])==type('str'):
-                    self.line += self.attributes[y]+'" '
-            self.line += '>'
-            return self.line
-    class hr():
+            super().__init__('<img>',None,attributes,'Empty')
+    class hr(element):
+        __slots__ = ()
         def __init__(self,attributes: dict={}):
             """A <hr> tag object with the following funcs
             1. render -> render this object as a <hr>
@@ -866,35 +2055,9 @@ class elements():
             1. count -> currently useless, maybe used later
             2. attributes -> a dict that stores all the atrributes for this tag. Ex: {'font-family':'Times New Roaman'}
             """
-            self.tag = '<hr>'
-            self.attributes = attributes
-            self.token = 'Verified'
-        def render(self):
-            self.line = ''
-            if self.attributes=={}:
-                self.line += self.tag
-            else:
-                self.line += self.renderAttributes()
-            self.line += self.tag.replace('<','</')
-            self.line += '\n'
-            return self.line
-        def renderAttributes(self):
-            self.line = self.tag.replace('>',' ')
-            for y in self.attributes:
-                self.line += y+'="'
-                if not type(self.attributes[y])==type('str'):
-                    for z in self.attributes[y]:
-                        if y != 'style':
-                            self.line+= z+' '
-                        else:
-                            self.line += z+';'
-                    self.line.removesuffix(' ')
-                    self.line += '" '
-                elif type(self.attributes[y])==type('str'):
-                    self.line += self.attributes[y]+'" '
-            self.line += '>'
-            return self.line
-    class br():
+            super().__init__('<hr>',None,attributes,'Empty')
+    class br(element):
+        __slots__ = ()
         def __init__(self):
             """A <br> tag object with the following funcs
             1. render -> render this object as a <br>
@@ -902,13 +2065,9 @@ class elements():
             Args:
             1. count -> currently useless, maybe used later
             """
-            self.tag = '<br>'
-            self.token = 'Verified'
-        def render(self):
-            self.line = self.tag
-            self.line += '\n'
-            return self.line
-    class comment():
+            super().__init__('<br>',None,None,'Empty')
+    class comment(element):
+        __slots__ = ('comment',)
         def __init__(self,comment:str):
             """A <!-- --> tag object with the following funcs
             1. render -> render this object as a <!-- -->
@@ -916,12 +2075,18 @@ class elements():
             Args:
             1. comment -> the message you want to add
             """
-            self.tag = '<!--'
+            super().__init__('<!--',None,None,'Empty')
             self.comment = comment
-            self.token = 'Verified'
-        def render(self):
-            return self.tag+self.comment+'-->'
-    class b():
+        def iter_render(self,pretty=False,depth=0,slots=False,cache=False):
+            """Render this object chunk by chunk. Yields strings (see element.iter_render)"""
+            if pretty:
+                yield ' '*depth+self.tag+self.comment+'-->\n'
+                return
+            yield self.tag
+            yield self.comment
+            yield '-->'
+    class b(element):
+        __slots__ = ()
         def __init__(self,innerHTML: str | list,attributes:dict={}):
             """A <b> tag object with the following funcs
             1. render -> render this object as a <li>
@@ -932,48 +2097,1505 @@ class elements():
             3. attributes -> a dict that stores all the atrributes for this tag. Ex: {'font-family':'Times New Roaman'}
             NOTE: innerhtml is different from innerHTML. innerHTML will be found in args, while it will be stored as innerhtml in the object.
             """
-            self.tag = '<b>'
-            self.innerhtml = innerHTML
-            self.attributes = attributes
-            self.token = 'Verified'
-        def render(self):
-            self.line = ''
-            if self.attributes=={}:
-                self.line += self.tag
+            super().__init__('<b>',innerHTML,attributes)
+    class lazy(element):
+        __slots__ = ('_document','_node')
+        def __init__(self,document,node:int=0):
+            """A proxy for a tag of a compactDocument, returned by Reader(lazy=True). The tag, type and attributes are read
+            at once, the children are only built the first time innerhtml is accessed (as lazy proxies again, one level at a time).
+            Until then, the proxy renders straight from the document, so a tree that is only rendered, or of which only
+            the <head> is used, never builds the element objects of the <body>.
+
+            Editing the proxy (innerhtml, attributes, addElement...) builds it's children first, it then works like any other element.
+
+            Args:
+            1. document -> the compactDocument
+            2. node -> the index of the tag in the document, 0 for the root
+            """
+            set = object.__setattr__
+            set(self,'_parent',None)
+            set(self,'_cache',None)
+            set(self,'_cacheKey',None)
+            set(self,'_document',document)
+            set(self,'_node',node)
+            set(self,'tag',document.tagOf(node))
+            set(self,'type','Container' if document.kind[node] == 0 else 'Empty')
+            set(self,'token','Verified' if self.tag[1:-1] in elements.registry else 'Unverified')
+            set(self,'attributes',attributeDict(document.attributesOf(node),self))
+        def __getattr__(self,name):
+            # only called while the innerhtml slot is not set yet
+            if name == 'innerhtml' and self._document is not None:
+                return self.__expand__()
+            raise AttributeError(name)
+        def __expand__(self):
+            """Build the children of this proxy from the document"""
+            document, node = self._document, self._node
+            innerhtml = None
+            if document.kind[node] == 0:
+                children = []
+                for x in document.children(node):
+                    kind = document.kind[x]
+                    if kind == 2:
+                        children.append(document.textOf(x))
+                    elif kind == 3:
+                        children.append(elements.comment(document.textOf(x)))
+                    else:
+                        children.append(elements.lazy(document,x))
+                innerhtml = childList(children,self)
+            object.__setattr__(self,'innerhtml',innerhtml)
+            object.__setattr__(self,'_document',None)
+            return innerhtml
+        def __getstate__(self):
+            if self._document is not None:
+                self.__expand__()
+            return super().__getstate__()
+        def invalidate(self,structure:bool=True):
+            if self._document is not None:
+                self.__expand__()
+            super().invalidate(structure)
+        def iter_render(self,pretty=False,depth=0,slots=False,cache=False):
+            """Render this object chunk by chunk (see element.iter_render). Before it's children are built, it is rendered from the document"""
+            document = self._document
+            if document is None or slots:
+                yield from super().iter_render(pretty,depth,slots,cache)
+                return
+            yield from document.__iter_nodes__(self._node,document.end[self._node],pretty,depth)
+    registry = {}
+    @staticmethod
+    def register(name:str,factory):
+        """
+        Register the factory used to make the elements of a tag, by the Reader and compactDocument.toElements.
+
+        Args:
+        1. name -> the tag name. Ex: 'section' (or '<section>')
+        2. factory -> a subclass of elements.element (it's build classmethod is used), or any callable
+            taking (tag, tagType, children, attributes) and returning an element
+
+        Usage::
+            class section(elements.element):
+                __slots__ = ()
+            elements.register('section',section)
+        """
+        if isinstance(factory,type) and issubclass(factory,elements.element):
+            factory = factory.build
+        elements.registry[name.strip('<>')] = factory
+for x in ('title','head','body','li','ul','ol','p','div','img','hr','br','b'):
+    elements.register(x,getattr(elements,x))
+for x in range(1,7):
+    elements.register(f'h{x}',elements.hn)
+del x
+class renderPlan():
+    '''
+    Class attributes::
+        byRoot -> the sets of live plans, by the id() of the roots they were compiled from (see __mutated__). A set is only
+                  kept alive by it's plans, which keep their roots alive, so an entry goes with the last of them and it's id
+                  can not be reused meanwhile.
+    '''
+    byRoot = weakref.WeakValueDictionary()
+    def __init__(self,root,pretty:bool=False,depth:int=0):
+        '''
+        A compiled, reusable render plan for a page or an element tree.
+        The tree is walked once and flattened into static string segments (tags and attributes, already joined)
+        with slots for the text. Rendering then only reads the current text of every slot and does a single join,
+        so changing text is picked up without compiling again.
+
+        The plan is compiled again automatically, at the next render, when it's own tree is changed: an element added,
+        removed or replaced, a tag or attributes edited (attributes are compiled as static strings), through addElement,
+        the innerhtml lists, the attributes dicts or by setting them. The elements report these changes up their parents
+        (see elements.element.invalidate), so the plans of other trees are kept. Changing a text needs no compile.
+
+        Args:
+        root (page|elements): The page or element to compile.
+        pretty (bool): Compile the pretty (indented) rendering. Defaults to False.
+        depth (int): The indentation level of root, only used for elements. Defaults to 0.
+        '''
+        self.root = root
+        self.pretty = pretty
+        self.depth = depth
+        self.compile()
+    def compile(self):
+        '''(Re)compile the plan from the current tree.'''
+        segments = []
+        slots = []
+        static = []
+        if isinstance(self.root,page):
+            chunks = self.root.iter_render(self.pretty,True)
+            self.roots = (self.root.head,self.root.body)
+        else:
+            chunks = self.root.iter_render(self.pretty,self.depth,True)
+            self.roots = ()
+        for chunk in chunks:
+            if type(chunk)==str:
+                static.append(chunk)
+            else:
+                if static:
+                    segments.append(''.join(static))
+                    static = []
+                slots.append((len(segments),)+chunk)
+                segments.append('')
+        if static:
+            segments.append(''.join(static))
+        self.segments = segments
+        self.slots = slots
+        self.stale = False
+        for plans in getattr(self,'__sets__',()):
+            plans.discard(self)
+        self.__sets__ = []
+        for x in (self.roots or (self.root,)):
+            if isinstance(x,elements.element):
+                plans = renderPlan.byRoot.get(id(x))
+                if plans is None:
+                    plans = renderPlan.byRoot[id(x)] = weakref.WeakSet()
+                plans.add(self)
+                self.__sets__.append(plans)
+    @staticmethod
+    def __mutated__(node):
+        '''Mark the plans compiled from node (a page's head or body, or the root element of the plan) as stale.'''
+        plans = renderPlan.byRoot.get(id(node))
+        if plans is not None:
+            for x in plans:
+                x.stale = True
+    def valid(self) -> bool:
+        '''Returns False if the tree was mutated since the plan was compiled.'''
+        if self.stale:
+            return False
+        if self.roots:
+            return self.roots[0] is self.root.head and self.roots[1] is self.root.body
+        return True
+    def render(self) -> str:
+        '''Render the plan with the current text of the tree. Returns a string.'''
+        if not self.valid():
+            self.compile()
+        parts = self.segments.copy()
+        for pos,owner,index,pretty,depth in self.slots:
+            x = owner.innerhtml if index is None else owner.innerhtml[index]
+            if type(x)==str:
+                parts[pos] = __pretty_text__(x,depth) if pretty else x
+            else:
+                parts[pos] = ''.join(x.iter_render(pretty,depth))
+        return ''.join(parts)
+RAW_MAGIC = b'WBRC'
+RAW_FORMAT = 1
+RAW_HEADER = struct.Struct('<4sHH4I12Q')
+RAW_ARRAYS = (('kind','b'),('name','i'),('parent','i'),('end','i'),('attrStart','i'),('attrKey','i'),('attrValue','i'))
+def __raw_bytes__(values,code:str) -> bytes:
+        '''Returns an array (or a view of one) as little-endian bytes.'''
+        if sys.byteorder == 'little' or code == 'b':
+            return bytes(values) if isinstance(values,memoryview) else values.tobytes()
+        values = __raw_array__(values,code)
+        values.byteswap()
+        return values.tobytes()
+def __raw_array__(values,code:str) -> array:
+        '''Returns a copy of an array or of a view of one as an array.'''
+        copied = array(code)
+        copied.frombytes(values if isinstance(values,array) else values.tobytes())
+        return copied
+def __raw_view__(view,start:int,count:int,code:str):
+        '''Returns count little-endian numbers at start in a buffer, as a view (or as an array on big-endian machines).'''
+        size = struct.calcsize(code)
+        part = view[start:start+count*size]
+        if sys.byteorder == 'little' or code == 'b':
+            return part.cast(code)
+        values = array(code,part.tobytes())
+        values.byteswap()
+        return values
+class stringTable():
+    __slots__ = ('_view','_offsets','_start','_kinds','_decoded')
+    def __init__(self,view,offsets,start:int,kinds=None):
+        '''
+        The strings or texts of a document read with compactDocument.load, decoded from the file when they are accessed.
+        It works like the list of a compactDocument (len, indexing, iteration), but can not be changed.
+
+        Args:
+        1. view -> a memoryview of the file
+        2. offsets -> where each string starts, relative to start, plus the end
+        3. start -> where the data starts in the file
+        4. kinds -> 1 byte per string, 1 for the tuples (stored as json lists). Defaults to None (only str)
+        '''
+        self._view = view
+        self._offsets = offsets
+        self._start = start
+        self._kinds = kinds
+        self._decoded = {}
+    def __len__(self):
+        return len(self._offsets)-1
+    def __getitem__(self,i:int):
+        value = self._decoded.get(i)
+        if value is None:
+            if i < 0:
+                i += len(self)
+            if not 0 <= i < len(self):
+                raise IndexError('string index out of range')
+            start = self._start
+            value = str(self._view[start+self._offsets[i]:start+self._offsets[i+1]],'utf-8')
+            if self._kinds is not None and self._kinds[i]:
+                value = tuple(json.loads(value))
+            self._decoded[i] = value
+        return value
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+class compactDocument():
+    _cache = None
+    _cacheKey = None
+    def __init__(self):
+        '''
+        A compact, array-backed element tree for very large pages. Instead of one object per node, the nodes are stored
+        in preorder in parallel arrays (struct-of-arrays)::
+            kind -> 0 container tag, 1 empty tag, 2 text, 3 comment
+            name -> for tags, the id of the tag (like '<p>') in strings; for text and comments, the id of the data in texts
+            parent -> the index of the parent node, -1 for the root
+            end -> the index after the last node of the subtree (so the children of node i start at i+1)
+            attrStart -> the offset of the node's first attribute in attrKey/attrValue (attrStart[i+1] is the end)
+        Tag names, attribute names and attribute values are interned in strings, list values (like a class list) are stored as tuples.
+        A node costs 17 bytes in the arrays (1 for kind, 4 each for name, parent, end and attrStart), plus 8 bytes per
+        attribute and the text: 19 bytes per node for the body of 100k <li class="row"> with a text and a <b> of bench_raw.py.
+
+        The document can be used everywhere a head or body element is used (page.render, page.export, Reader(compact=True)...).
+        It is built once, with startTag/addText/addComment/endTag or fromElements, and is not changed afterwards;
+        convert it with toElements() to edit it.
+        '''
+        self.kind = array('b')
+        self.name = array('i')
+        self.parent = array('i')
+        self.end = array('i')
+        self.attrStart = array('i',[0])
+        self.attrKey = array('i')
+        self.attrValue = array('i')
+        self.strings = []
+        self.texts = []
+        self.__interned__ = {}
+        self.__stack__ = []
+    def __len__(self):
+        return len(self.kind)
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['__interned__']
+        if '__mapped__' in state:
+            # a document read with load(): the arrays are views of the file, they are copied
+            del state['__mapped__']
+            for x, code in RAW_ARRAYS:
+                state[x] = __raw_array__(state[x],code)
+            state['strings'] = list(self.strings)
+            state['texts'] = list(self.texts)
+        return state
+    def __setstate__(self,state):
+        self.__dict__.update(state)
+        self.__interned__ = {x:i for i,x in enumerate(self.strings)}
+    def copy(self):
+        '''Returns a copy of the document that shares none of it's arrays and lists with this one.'''
+        mapped = '__mapped__' in self.__dict__
+        state = self.__getstate__()
+        if not mapped:
+            for x, code in RAW_ARRAYS:
+                state[x] = state[x][:]
+            state['strings'] = list(self.strings)
+            state['texts'] = list(self.texts)
+        state['__stack__'] = list(self.__stack__)
+        doc = type(self).__new__(type(self))
+        doc.__setstate__(state)
+        return doc
+    def iter_bytes(self):
+        '''
+        Yields the document in the raw binary format (see load), chunk by chunk. Every number is little-endian::
+            header -> b'WBRC', the format version (2 bytes), 2 bytes of flags, the number of nodes, attributes,
+                      strings and texts (4 bytes each), then the offset of each of the sections below (8 bytes each)
+            kind, name, parent, end, attrStart, attrKey, attrValue -> the arrays of the document (see compactDocument)
+            stringKinds -> 1 byte per string, 0 for a str, 1 for a tuple (stored as a json list)
+            stringOffsets, textOffsets -> where each string (text) starts in stringData (textData), 8 bytes each, plus the end
+            stringData, textData -> the strings and texts, utf-8
+        Every section starts at a multiple of 8 bytes, so the arrays can be used straight from a memory-mapped file.
+        '''
+        strings = [x.encode('utf-8') if type(x)==str else json.dumps(list(x)).encode('utf-8') for x in self.strings]
+        texts = [x.encode('utf-8') for x in self.texts]
+        sections = [__raw_bytes__(getattr(self,x),code) for x, code in RAW_ARRAYS]
+        sections.append(bytes(0 if type(x)==str else 1 for x in self.strings))
+        for data in (strings,texts):
+            offsets = array('q',[0])
+            for x in data:
+                offsets.append(offsets[-1]+len(x))
+            sections.append(__raw_bytes__(offsets,'q'))
+        offsets, at = [], RAW_HEADER.size
+        for x in sections:
+            at += -at % 8
+            offsets.append(at)
+            at += len(x)
+        offsets.append(at+(-at % 8))
+        at += -at % 8
+        offsets.append(at+sum(len(x) for x in strings))
+        yield RAW_HEADER.pack(RAW_MAGIC,RAW_FORMAT,0,len(self.kind),len(self.attrKey),len(strings),len(texts),*offsets)
+        at = RAW_HEADER.size
+        for x, start in zip(sections,offsets):
+            yield bytes(start-at)
+            yield x
+            at = start+len(x)
+        yield bytes(offsets[-2]-at)
+        yield from strings
+        yield from texts
+    def dump(self,path:str) -> tuple:
+        '''Write the document to a file in the raw binary format (see iter_bytes), atomically. Returns (sha256, size).'''
+        return __write_file__(path,self.iter_bytes())
+    @classmethod
+    def load(cls,path:str,mapped:bool=True):
+        '''
+        Read a document written by dump(). The file is memory-mapped: the arrays are used straight from the file and a
+        string or text is only decoded (and then kept) when it is accessed, so opening a document costs the same
+        whatever it's size, and the nodes that are never used are never read.
+
+        Args:
+        path (str): The file.
+        mapped (bool): Use a memory map. If False, the file is read in memory (and can be replaced while the document is used on Windows).
+
+        Raises:
+        FileError: If the file is not in the raw binary format, or was written by a newer version.
+        '''
+        with open(path,'rb') as file:
+            if mapped:
+                buffer = mmap.mmap(file.fileno(),0,access=mmap.ACCESS_READ)
+            else:
+                buffer = file.read()
+        return cls.fromBuffer(buffer,path)
+    @classmethod
+    def fromBuffer(cls,buffer,name:str='<buffer>'):
+        '''Make a document from a buffer (bytes or a memory map) in the raw binary format, without copying it. See load.'''
+        view = memoryview(buffer)
+        if len(view) < RAW_HEADER.size or bytes(view[:4]) != RAW_MAGIC:
+            raise FileError(f'"{name}" is not a raw Web Builder document.')
+        magic, version, flags, nodes, attrs, strings, texts, *offsets = RAW_HEADER.unpack_from(view)
+        if version > RAW_FORMAT:
+            raise FileError(f'"{name}" was written in version {version} of the raw format, this version of Web Builder reads up to {RAW_FORMAT}.')
+        doc = cls.__new__(cls)
+        counts = (nodes,nodes,nodes,nodes,nodes+1,attrs,attrs)
+        for (x, code), start, count in zip(RAW_ARRAYS,offsets,counts):
+            setattr(doc,x,__raw_view__(view,start,count,code))
+        kinds = view[offsets[7]:offsets[7]+strings]
+        doc.strings = stringTable(view,__raw_view__(view,offsets[8],strings+1,'q'),offsets[10],kinds)
+        doc.texts = stringTable(view,__raw_view__(view,offsets[9],texts+1,'q'),offsets[11])
+        doc.__interned__ = {}
+        doc.__stack__ = []
+        doc.__mapped__ = buffer
+        return doc
+    def __intern__(self,value) -> int:
+        if value is None:
+            return -1
+        if type(value)!=str:
+            value = tuple(value)
+        i = self.__interned__.get(value)
+        if i is None:
+            i = self.__interned__[value] = len(self.strings)
+            self.strings.append(value)
+        return i
+    def __node__(self,kind:int,name:int):
+        i = len(self.kind)
+        self.kind.append(kind)
+        self.name.append(name)
+        self.parent.append(self.__stack__[-1] if self.__stack__ else -1)
+        self.end.append(i+1)
+        self.attrStart.append(len(self.attrKey))
+        return i
+    def startTag(self,tag:str,attributes:dict=None,container:bool=True):
+        '''
+        Add a tag at the current position. A container tag stays open (the next nodes are it's children) until endTag() is called.
+        
+        Args:
+        tag (str): The start tag. Ex: '<p>'
+        attributes (dict): The attributes of the tag.
+        container (bool): False for empty tags (that are not closed).
+        '''
+        i = self.__node__(0 if container else 1,self.__intern__(tag))
+        if attributes:
+            for y in attributes:
+                self.attrKey.append(self.__intern__(y))
+                self.attrValue.append(self.__intern__(attributes[y]))
+            self.attrStart[i+1] = len(self.attrKey)
+        if container:
+            self.__stack__.append(i)
+        return i
+    def endTag(self):
+        '''Close the last opened container tag.'''
+        i = self.__stack__.pop()
+        self.end[i] = len(self.kind)
+    def addText(self,text:str):
+        '''Add a text node at the current position.'''
+        self.texts.append(text)
+        return self.__node__(2,len(self.texts)-1)
+    def addComment(self,comment:str):
+        '''Add a comment (<!-- -->) at the current position.'''
+        self.texts.append(comment)
+        return self.__node__(3,len(self.texts)-1)
+    def tagOf(self,i:int) -> str:
+        '''Returns the tag of node i (like '<p>'), or None for text and comments.'''
+        return self.strings[self.name[i]] if self.kind[i] < 2 else None
+    def textOf(self,i:int) -> str:
+        '''Returns the data of a text or comment node, or None for tags.'''
+        return self.texts[self.name[i]] if self.kind[i] >= 2 else None
+    def attributesOf(self,i:int) -> dict:
+        '''Returns the attributes of node i as a new dict.'''
+        attributes = {}
+        for x in range(self.attrStart[i],self.attrStart[i+1]):
+            value = self.attrValue[x]
+            value = None if value < 0 else self.strings[value]
+            attributes[self.strings[self.attrKey[x]]] = list(value) if type(value)==tuple else value
+        return attributes
+    def children(self,i:int=0):
+        '''Yields the indexes of the children of node i.'''
+        x = i+1
+        while x < self.end[i]:
+            yield x
+            x = self.end[x]
+    @classmethod
+    def fromElements(cls,root):
+        '''
+        Build a compactDocument from an element tree (like a head or body element).
+
+        Args:
+        root (elements): The root element.
+        '''
+        doc = cls()
+        doc.__addElement__(root)
+        return doc
+    def __addElement__(self,x):
+        if type(x)==str:
+            self.addText(x)
+            return
+        if isinstance(x,elements.comment):
+            self.addComment(x.comment)
+            return
+        container = x.type=='Container'
+        self.startTag(x.tag,x.attributes,container)
+        if container:
+            inner = x.innerhtml
+            if not isinstance(inner,list):
+                inner = (inner,)
+            for y in inner:
+                self.__addElement__(y)
+            self.endTag()
+    @classmethod
+    def fromParsed(cls,parsed):
+        '''
+        Build a compactDocument from the Reader's parsed structure ('tag_name',[attributes],[children],'tag_type'),
+        without making the Builder elements.
+        '''
+        doc = cls()
+        doc.__addParsed__(parsed)
+        return doc
+    def __addParsed__(self,x):
+        if type(x)==str:
+            self.addText(x)
+            return
+        container = x[-1]=='Container'
+        self.startTag('<'+x[0]+'>',{y[0]:y[1] for y in x[1]},container)
+        if container:
+            if type(x[2])==str:
+                self.addText(x[2])
             else:
-                self.line += self.renderAttributes()
-            if type(self.innerhtml)==type('str'):
-                self.line += self.innerhtml
+                for y in x[2]:
+                    self.__addParsed__(y)
+            self.endTag()
+    def toElements(self,i:int=0):
+        '''
+        Convert node i (the root by default) and it's subtree back to Builder elements.
+        Tags with their own class in elements get it (a '<p>' becomes elements.p), others become elements.tag.
+        '''
+        kind = self.kind[i]
+        if kind == 2:
+            return self.texts[self.name[i]]
+        if kind == 3:
+            return elements.comment(self.texts[self.name[i]])
+        children = [self.toElements(x) for x in self.children(i)] if kind == 0 else []
+        return __make_element__(self.strings[self.name[i]],'Container' if kind == 0 else 'Empty',children,self.attributesOf(i))
+    def iter_render(self,pretty=False,depth=0,slots=False,cache=False):
+        '''
+        Render the document chunk by chunk, with the same output as the element tree it represents. Yields strings.
+        The arrays are walked with an explicit stack, not recursively.
+
+        Args:
+        pretty (bool): Indent the output, one tag or text per line.
+        depth (int): The indentation level of the root, only used when pretty.
+        slots, cache: Accepted for compatibility with elements.element.iter_render, the document is rendered as static text.
+        '''
+        yield from self.__iter_nodes__(0,len(self.kind),pretty,depth)
+    def __iter_nodes__(self,start:int,stop:int,pretty:bool,depth:int):
+        kind, name, end, strings, texts = self.kind, self.name, self.end, self.strings, self.texts
+        closing = []
+        i = start
+        while i < stop:
+            while closing and closing[-1][0] <= i:
+                yield closing.pop()[1]
+            k = kind[i]
+            if k == 2:
+                text = texts[name[i]]
+                yield __pretty_text__(text,depth+len(closing)) if pretty else text
+                i += 1
+                continue
+            if k == 3:
+                comment = '<!--'+texts[name[i]]+'-->'
+                yield ' '*(depth+len(closing))+comment+'\n' if pretty else comment
+                i += 1
+                continue
+            tag = strings[name[i]]
+            if self.attrStart[i] == self.attrStart[i+1]:
+                opening = tag
+            elif pretty:
+                opening = __pretty_attributes__(tag,self.attributesOf(i))
             else:
-                if type(self.innerhtml) != type(['h','l']):
-                    self.line += self.innerhtml.render()
+                opening = __render_attributes__(tag,self.attributesOf(i))
+            if not pretty:
+                if k == 1:
+                    yield opening+'\n'
                 else:
-                    for x in self.innerhtml:
-                        if type(x)==str:
-                            self.line += x
-                        else:
-                            self.line += x.render()
-            self.line += self.tag.replace('<','</')
-            self.line += '\n'
-            return self.line
-        def renderAttributes(self):
-            self.line = self.tag.replace('>',' ')
-            for y in self.attributes:
-                self.line += y+'="'
-                if not type(self.attributes[y])==type('str'):
-                    for z in self.attributes[y]:
-                        if y != 'style':
-                            self.line+= z+' '
-                        else:
-                            self.line += z+';'
-                    self.line.removesuffix(' ')
-                    self.line += '" '
-                elif type(self.attributes[y])==type('str'):
-                    self.line += self.attributes[y]+'" '
-            self.line += '>'
-            return self.line
+                    yield opening
+                    closing.append((end[i],tag.replace('<','</')+'\n'))
+                i += 1
+                continue
+            indent = ' '*(depth+len(closing))
+            if k == 1:
+                yield indent+opening[:-1]+'/>\n'
+            elif tag in ('<pre>','<textarea>'):
+                yield indent+opening
+                yield from self.__iter_nodes__(i+1,end[i],False,0)
+                yield tag.replace('<','</')+'\n'
+                i = end[i]
+                continue
+            else:
+                yield indent+opening+'\n'
+                closing.append((end[i],indent+tag.replace('<','</')+'\n'))
+            i += 1
+        while closing:
+            yield closing.pop()[1]
+    def render(self,pretty=False) -> str:
+        '''Render the document. Returns a string.'''
+        return ''.join(self.iter_render(pretty))
+    def cached(self,pretty=False,depth=0) -> str:
+        '''Same as render, for compatibility with elements.element (the document has no render cache).'''
+        return ''.join(self.iter_render(pretty,depth))
+def __write_file__(path:str,chunks) -> tuple:
+        '''
+        Write chunks of bytes to a file atomically (to a temporary file that then replaces it), hashing them on the way.
+        Returns (sha256 hex digest, size).
+        '''
+        digest = hashlib.sha256()
+        size = 0
+        with open(path+'.tmp','wb') as file:
+            for chunk in chunks:
+                file.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+        os.replace(path+'.tmp',path)
+        return digest.hexdigest(), size
+def __tree_hash__(p,pretty:bool=False) -> str:
+        '''Returns the hash of a page's tree: of it's rendering, built from the render cache of the subtrees that did not change.'''
+        digest = hashlib.sha256()
+        for chunk in p.iter_render(pretty,False,True):
+            digest.update(chunk.encode('utf-8'))
+        return digest.hexdigest()
+def __compact__(root):
+        '''Returns a head or body as a compactDocument.'''
+        if root is None or isinstance(root,compactDocument):
+            return root
+        return compactDocument.fromElements(root)
+def __dump_raw__(root):
+        '''Returns the chunks of a raw file (Head.RBCode or Body.RBCode) for a head or body, in the raw binary format.'''
+        doc = __compact__(root)
+        return (doc if doc is not None else compactDocument()).iter_bytes()
+def __load_raw__(path:str,lazy:bool=True):
+        '''
+        Read a raw file written by __dump_raw__ (or pickled, by the older versions). Returns the head or body, as an
+        elements.lazy proxy over the memory-mapped file if lazy, or as elements.
+        '''
+        with open(path,'rb') as file:
+            if file.read(len(RAW_MAGIC)) != RAW_MAGIC:
+                file.seek(0)
+                return pickle.load(file)
+        return __raw_root__(compactDocument.load(path,lazy),lazy)
+def __raw_root__(doc,lazy:bool=True):
+        '''Returns the head or body a raw document holds: None if it's empty, an elements.lazy proxy if lazy, or elements.'''
+        if not len(doc):
+            return None
+        if lazy and doc.kind[0] < 2:
+            return elements.lazy(doc,0)
+        return doc.toElements()
+def __save_page__(p,root:str,tree:str,pretty:bool,chunks:list=None,database:bool=False) -> tuple:
+        '''
+        Write the html (the given encoded chunks, or the page rendered again) and raw files of a page in the project folder root.
+        tree is the hash of the page's tree, None to take the hash of the html written (the same, see __tree_hash__).
+        Returns it's build manifest entry and, for the database storage, the (name, head, body) row of the raw files
+        to store instead of writing them (None otherwise).
+        '''
+        path = os.path.join(root,p.fileName+'.html')
+        if chunks is None:
+            chunks = (x.encode('utf-8') for x in p.iter_render(pretty,False,True))
+        output, size = __write_file__(path,chunks)
+        entry = {'tree':output if tree is None else tree,'output':output,'size':size,'mtime':os.stat(path).st_mtime_ns,'pretty':pretty}
+        if database:
+            return entry, (p.fileName,b''.join(__dump_raw__(p.head)),b''.join(__dump_raw__(p.body)))
+        folder = os.path.join(root,p.fileName)
+        os.makedirs(folder,exist_ok=True)
+        for name, root in (('Head.RBCode',p.head),('Body.RBCode',p.body)):
+            __write_file__(os.path.join(folder,name),__dump_raw__(root))
+        return entry, None
+def __page_intact__(root:str,name:str,entry:dict,database:bool=False) -> bool:
+        '''Returns True if the files of a page are still the ones it's build manifest entry was written for (the raw files are checked by the caller for the database storage).'''
+        path = os.path.join(root,name)
+        folder = os.path.join(root,name[:-5])
+        if not database and not (os.path.exists(os.path.join(folder,'Head.RBCode')) and os.path.exists(os.path.join(folder,'Body.RBCode'))):
+            return False
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return False
+        if stat.st_size != entry['size']:
+            return False
+        if stat.st_mtime_ns == entry['mtime']:
+            return True
+        # touched but maybe not changed, the file is hashed again
+        digest = hashlib.sha256()
+        with open(path,'rb') as file:
+            for chunk in iter(lambda: file.read(1<<20),b''):
+                digest.update(chunk)
+        if digest.hexdigest() != entry['output']:
+            return False
+        entry['mtime'] = stat.st_mtime_ns
+        return True
+def __save_worker__(task) -> tuple:
+        '''
+        Check and write one page for project.save, in this process or in a worker process.
+        task is (page, project folder, pretty, build manifest entry or None, force, database storage).
+        Returns (page name, manifest entry, rebuilt, database row or None), see __save_page__.
+        '''
+        p, root, pretty, entry, force, database = task
+        name = p.fileName+'.html'
+        if force or entry is None:
+            # nothing to compare with: the page is rendered once, the hash of the html written is the hash of it's tree
+            entry, row = __save_page__(p,root,None,pretty,None,database)
+            return name, entry, True, row
+        chunks = None
+        if isinstance(p.head,compactDocument) or isinstance(p.body,compactDocument):
+            # there is no render cache, the page is rendered once for the hash and the file
+            chunks = [x.encode('utf-8') for x in p.iter_render(pretty)]
+            digest = hashlib.sha256()
+            for x in chunks:
+                digest.update(x)
+            tree = digest.hexdigest()
+        else:
+            tree = __tree_hash__(p,pretty)
+        if __page_unchanged__(root,name,entry,tree,pretty,database):
+            return name, entry, False, None
+        entry, row = __save_page__(p,root,tree,pretty,chunks,database)
+        return name, entry, True, row
+def __page_unchanged__(root:str,name:str,entry:dict,tree:str,pretty:bool,database:bool=False) -> bool:
+        '''Returns True if a page with this tree hash needs no rebuild: it's build manifest entry is for the same tree and pretty setting, and it's files are intact.'''
+        return entry is not None and entry['tree'] == tree and entry['pretty'] == pretty and __page_intact__(root,name,entry,database)
+def __save_pool__(tasks,workers:int=None):
+        '''
+        Run the tasks of project.save (see __save_worker__) in a process pool and yield their results in order.
+        The pages made of elements are checked here first, from their render cache, and only the ones to rebuild are
+        converted to compactDocuments (that pickle to a few flat arrays) and sent to the workers.
+        '''
+        checked = deque()
+        def rebuilt():
+            for task in tasks:
+                p, root, pretty, entry, force, database = task
+                if not (isinstance(p.head,compactDocument) or isinstance(p.body,compactDocument)):
+                    if not force and entry is not None and __page_unchanged__(root,p.fileName+'.html',entry,__tree_hash__(p,pretty),pretty,database):
+                        checked.append((p.fileName+'.html',entry,False,None))
+                        continue
+                    p, entry = page(p.fileName,__compact__(p.head),__compact__(p.body)), None
+                checked.append(None)
+                yield p, root, pretty, entry, force, database
+        for result in __ordered_pool__(__save_worker__,rebuilt(),workers):
+            # the results come in the order of the pages sent, the skipped pages checked before them go first
+            while checked[0] is not None:
+                yield checked.popleft()
+            checked.popleft()
+            yield result
+        yield from checked
+def __ordered_pool__(function,tasks,workers:int=None,window:int=2):
+        '''
+        Run function over tasks in a process pool and yield the results in the order of the tasks.
+        At most window tasks per worker are sent ahead, so the tasks are not all pickled and queued at once.
+        '''
+        with multiprocessing.Pool(workers) as pool:
+            pending = deque()
+            limit = window*(workers or os.cpu_count() or 1)
+            for task in tasks:
+                pending.append(pool.apply_async(function,(task,)))
+                if len(pending) >= limit:
+                    yield pending.popleft().get()
+            while pending:
+                yield pending.popleft().get()
+class projectManifest():
+    FILE = 'project.json'
+    JOURNAL = 'project.journal'
+    def __init__(self,root:str,registered:dict=None):
+        '''
+        The state of a project (versions, registered resource folders, resources and pages), kept in memory and stored
+        in 'project.json' in the project folder. It replaces the old settings.py (see migrate).
+        The resources map their name to {'hash':..,'folder':..,'size':..} (see resourceStore), the hashes attribute
+        indexes the names of every stored content by it's hash.
+
+        The manifest is read once, when the project is made or loaded; lookups are then dict lookups. A change
+        (see change) is applied in memory and appended as one line to 'project.journal', so it is kept even if the
+        project is not saved. compact() (called by project.save) writes the whole manifest to 'project.json' atomically
+        and empties the journal, so neither file grows with the number of changes.
+
+        Args:
+        root (str): The project folder.
+        registered (dict): The registered resource folders, like {'IMAGES':True,'JAVASCRIPT':True,'XML':True,'CSS':True}.
+        '''
+        self.root = root
+        self.versions = ['0.0.1']
+        self.registered = dict(registered or {})
+        self.resources = {}
+        self.hashes = {}
+        self.pages = {}
+        self.storage = 'folders'
+    @classmethod
+    def load(cls,root:str):
+        '''
+        Load the manifest of a project folder, replaying the changes of the journal.
+        A project that still has a settings.py and no 'project.json' is migrated first (see migrate).
+
+        Args:
+        root (str): The project folder.
+
+        Raises:
+        AcessError: If the folder has neither a manifest nor a settings.py.
+        '''
+        manifest = cls(root)
+        path = os.path.join(root,cls.FILE)
+        if not os.path.exists(path):
+            if not os.path.exists(os.path.join(root,'settings.py')):
+                raise AcessError('The settings could not be accesed, please be in the correct directory')
+            return cls.migrate(root)
+        with open(path,'r',encoding='utf-8') as file:
+            state = json.load(file)
+        manifest.versions = state['versions']
+        manifest.registered = state['registered']
+        manifest.resources = state['resources']
+        manifest.pages = dict.fromkeys(state['pages'])
+        manifest.storage = state.get('storage','folders')
+        manifest.__reindex__()
+        try:
+            with open(os.path.join(root,cls.JOURNAL),'r',encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        change = json.loads(line)
+                    except ValueError:
+                        # a line cut short by a crash, the changes end there
+                        break
+                    manifest.__apply__(*change)
+        except FileNotFoundError:
+            pass
+        return manifest
+    @classmethod
+    def migrate(cls,root:str):
+        '''
+        Make the manifest of a project from it's settings.py (as written by the older versions), then write it and
+        rename settings.py to 'settings.py.migrated'. The settings are read line by line, the lines written
+        without quotes by the older versions (like PAGES.append(main.html)) are read too.
+
+        Args:
+        root (str): The project folder.
+        '''
+        manifest = cls(root)
+        namespace = {'VERSIONS':[],'REGISTERED_RESOURCES':{},'RESOURCES':{},'PAGES':[]}
+        path = os.path.join(root,'settings.py')
+        with open(path,'r',encoding='utf-8') as file:
+            for line in file:
+                line = line.strip()
+                if not line or line[0] == '#':
+                    continue
+                try:
+                    exec(line,{'__builtins__':{}},namespace)
+                    continue
+                except Exception:
+                    pass
+                match = re.match(r'(PAGES|VERSIONS)\.(append|remove)\((.*)\)$',line)
+                if match:
+                    value = match.group(3).strip('\'"')
+                    items = namespace[match.group(1)]
+                    if match.group(2) == 'append':
+                        items.append(value)
+                    elif value in items:
+                        items.remove(value)
+                    continue
+                match = re.match(r'RESOURCES\[(.*)\]\s*=\s*(.*)$',line)
+                if match:
+                    namespace['RESOURCES'][match.group(1).strip('\'"')] = match.group(2).strip('\'"')
+        manifest.versions = list(namespace['VERSIONS']) or manifest.versions
+        manifest.registered = dict(namespace['REGISTERED_RESOURCES'])
+        manifest.resources = dict(namespace['RESOURCES'])
+        manifest.pages = dict.fromkeys(namespace['PAGES'])
+        manifest.__reindex__()
+        manifest.compact()
+        os.replace(path,path+'.migrated')
+        return manifest
+    def __reindex__(self):
+        '''Build the index of the names of the stored resources by hash.'''
+        self.hashes = {}
+        for name, entry in self.resources.items():
+            if isinstance(entry,dict):
+                self.hashes.setdefault(entry['hash'],set()).add(name)
+    def __unindex__(self,name:str):
+        entry = self.resources.get(name)
+        if isinstance(entry,dict):
+            names = self.hashes.get(entry['hash'])
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self.hashes[entry['hash']]
+    def __apply__(self,grp:str,main,add:bool=True,key=None):
+        match grp:
+            case 'pages':
+                if add:
+                    self.pages[main] = None
+                else:
+                    self.pages.pop(main,None)
+            case 'resource':
+                if add:
+                    self.__unindex__(key)
+                    self.resources[key] = main
+                    if isinstance(main,dict):
+                        self.hashes.setdefault(main['hash'],set()).add(key)
+                else:
+                    self.__unindex__(main)
+                    self.resources.pop(main,None)
+            case 'version':
+                if add:
+                    self.versions.append(main)
+                elif main in self.versions:
+                    self.versions.remove(main)
+    def change(self,grp:str,main,add:bool=True,key=None):
+        '''
+        Change the manifest and append the change to the journal.
+
+        Args:
+        grp (str): 'pages', 'resource' or 'version'.
+        main: The page name, resource path (or name, when removing) or version.
+        add (bool): Add it, or remove it. Defaults to True.
+        key: The resource name, when adding a resource.
+        '''
+        self.__apply__(grp,main,add,key)
+        with open(os.path.join(self.root,projectManifest.JOURNAL),'a',encoding='utf-8') as file:
+            file.write(json.dumps([grp,main,add,key])+'\n')
+    def compact(self):
+        '''Write the whole manifest to 'project.json' (atomically) and empty the journal.'''
+        state = {'version':1,'versions':self.versions,'registered':self.registered,'resources':self.resources,'pages':list(self.pages),'storage':self.storage}
+        __write_file__(os.path.join(self.root,projectManifest.FILE),(json.dumps(state,indent=1).encode('utf-8'),))
+        journal = os.path.join(self.root,projectManifest.JOURNAL)
+        if os.path.exists(journal):
+            os.remove(journal)
+class resourceStore():
+    FOLDERS = {'css':'CSS','js':'Javascript','xml':'XML','png':'Images','jpg':'Images','jpeg':'Images','gif':'Images','svg':'Images','bmp':'Images','img':'Images'}
+    def __init__(self,root:str,chunkSize:int=1<<20):
+        '''
+        The content-addressed store of a project's resources, in 'Resources/Store' in the project folder.
+        Every file is stored once, under the sha256 hash of it's content ('Resources/Store/3f/3f9c...'), whatever the names
+        it was added under; the project manifest maps the names to the hashes (see project.addResource).
+        Files are copied in chunks of chunkSize bytes and hashed on the way, so they are never held in memory as a whole.
+
+        Args:
+        root (str): The project folder.
+        chunkSize (int): The number of bytes copied at a time. Defaults to 1 MiB.
+        '''
+        self.root = root
+        self.folder = os.path.join(root,'Resources','Store')
+        self.chunkSize = chunkSize
+    def path(self,digest:str,relative:bool=False) -> str:
+        '''Returns the path of the file with the given hash (relative to the project folder if relative).'''
+        path = os.path.join('Resources','Store',digest[:2],digest)
+        return path if relative else os.path.join(self.root,path)
+    def ingest(self,source) -> tuple:
+        '''
+        Copy a file into the store. Returns (hash, size). If the store already has the same content, the copy is dropped.
+
+        Args:
+        source: A path, a binary file object (anything with a read(size) method) or bytes.
+        '''
+        os.makedirs(self.folder,exist_ok=True)
+        temporary = os.path.join(self.folder,f'ingest-{os.getpid()}-{id(source)}.tmp')
+        digest = hashlib.sha256()
+        size = 0
+        opened = None
+        if isinstance(source,(bytes,bytearray,memoryview)):
+            chunks = (bytes(source),)
+        else:
+            if not hasattr(source,'read'):
+                opened = source = open(source,'rb')
+            chunks = iter(lambda: source.read(self.chunkSize),b'')
+        try:
+            with open(temporary,'wb') as file:
+                for chunk in chunks:
+                    file.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
+        finally:
+            if opened is not None:
+                opened.close()
+        digest = digest.hexdigest()
+        path = self.path(digest)
+        if os.path.exists(path):
+            os.remove(temporary)
+        else:
+            os.makedirs(os.path.dirname(path),exist_ok=True)
+            os.replace(temporary,path)
+        return digest, size
+    def remove(self,digest:str):
+        '''Delete the file with the given hash from the store.'''
+        try:
+            os.remove(self.path(digest))
+        except FileNotFoundError:
+            pass
+    def place(self,digest:str,folder:str,name:str) -> str:
+        '''
+        Give the file with the given hash it's named path in the project folder, 'Resources/<folder>/<name>', where the
+        pages link to it. The path is a hard link to the stored file (a copy where hard links are not supported), so it
+        takes no more space and stays valid when the store removes it's file. Returns the path.
+        '''
+        path = os.path.join(self.root,'Resources',folder,name)
+        os.makedirs(os.path.dirname(path),exist_ok=True)
+        try:
+            os.remove(path+'.tmp')
+        except FileNotFoundError:
+            pass
+        try:
+            os.link(self.path(digest),path+'.tmp')
+        except OSError:
+            shutil.copyfile(self.path(digest),path+'.tmp')
+        os.replace(path+'.tmp',path)
+        return path
+    def unplace(self,folder:str,name:str):
+        '''Delete the named path of a file (see place).'''
+        try:
+            os.remove(os.path.join(self.root,'Resources',folder,name))
+        except FileNotFoundError:
+            pass
+PACKAGE_FILE = 'package.json'
+def __file_hash__(path:str) -> str:
+        '''Returns the sha256 hex digest of a file, read in chunks.'''
+        with open(path,'rb') as file:
+            return hashlib.file_digest(file,'sha256').hexdigest()
+ARCHIVE_METHODS = {'deflate':ZIP_DEFLATED,'bzip2':ZIP_BZIP2,'lzma':ZIP_LZMA,'store':ZIP_STORED}
+COMPRESSED_FORMATS = frozenset(('png','jpg','jpeg','gif','webp','avif','ico','bmp','zip','gz','tgz','bz2','xz','7z','rar','mp3','mp4','m4a','ogg','webm','woff','woff2','pdf'))
+ZIP_LZMA_PROPERTIES = struct.pack('<BBHBI',9,4,5,(2*5+0)*9+3,1<<23)
+def __compressor__(compression:int,level:int=None):
+        '''
+        Returns a new compressor (with compress and flush methods) for a zip compression method, None for ZIP_STORED,
+        and the bytes the compressed member starts with. For lzma, that is the properties header of the zip format
+        (version 9.4, then lc=3, lp=0, pb=2 and an 8 MiB dictionary, the filter the compressor is made with).
+        '''
+        if compression == ZIP_DEFLATED:
+            return zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION if level is None else level,zlib.DEFLATED,-15), b''
+        if compression == ZIP_BZIP2:
+            return bz2.BZ2Compressor(9 if level is None else level), b''
+        if compression == ZIP_LZMA:
+            return lzma.LZMACompressor(lzma.FORMAT_RAW,filters=[{'id':lzma.FILTER_LZMA1,'dict_size':1<<23,'lc':3,'lp':0,'pb':2}]), ZIP_LZMA_PROPERTIES
+        return None, b''
+def __compress_member__(path:str,compression:int,level:int) -> tuple:
+        '''Read and compress one file for __pack__, in a worker thread. Returns (compressed data, crc, size).'''
+        with open(path,'rb') as file:
+            data = file.read()
+        compressor, start = __compressor__(compression,level)
+        compressed = start+compressor.compress(data)+compressor.flush() if compressor is not None else data
+        return compressed, zlib.crc32(data), len(data)
+class zipWriter():
+    def __init__(self,path:str):
+        '''
+        A zip archive written member by member, for project.package. zipfile.ZipFile has no public way to add data that
+        was compressed beforehand (by the worker threads of __pack__), so the headers are written here, following the
+        zip format (PKWARE's APPNOTE.TXT), with zip64 records where the sizes or offsets need them. The archive is read
+        back with zipfile.ZipFile like any other.
+
+        Args:
+        path (str): The archive to write.
+        '''
+        self.file = open(path,'wb')
+        self.filelist = []
+    def __enter__(self):
+        return self
+    def __exit__(self,*error):
+        if error[0] is None:
+            self.close()
+        else:
+            self.file.close()
+    @staticmethod
+    def __fields__(info) -> tuple:
+        '''Returns the version needed to extract a member, it's flags, and it's time and date in the dos format.'''
+        version = {ZIP_BZIP2:46,ZIP_LZMA:63}.get(info.compress_type,20)
+        if info.file_size > zipfile.ZIP64_LIMIT or info.compress_size > zipfile.ZIP64_LIMIT or info.header_offset > zipfile.ZIP64_LIMIT:
+            version = max(version,45)
+        flags = (0x800 if not info.filename.isascii() else 0)|(0x02 if info.compress_type == ZIP_LZMA else 0)
+        year, month, day, hour, minute, second = info.date_time
+        return version, flags, hour<<11|minute<<5|second//2, (year-1980)<<9|month<<5|day
+    def __local__(self,info,zip64:bool) -> bytes:
+        '''Returns the local header of a member, with a zip64 extra field (so it can be rewritten at the same size) if zip64.'''
+        version, flags, dostime, dosdate = zipWriter.__fields__(info)
+        name = info.filename.encode('utf-8')
+        extra = struct.pack('<HHQQ',1,16,info.file_size,info.compress_size) if zip64 else b''
+        sizes = (0xFFFFFFFF,0xFFFFFFFF) if zip64 else (info.compress_size,info.file_size)
+        return struct.pack('<4s5HL2L2H',b'PK\x03\x04',max(version,45) if zip64 else version,flags,info.compress_type,
+                           dostime,dosdate,info.CRC,*sizes,len(name),len(extra))+name+extra
+    def write(self,info,compressed:bytes,crc:int,size:int):
+        '''
+        Add a member whose data was compressed beforehand with info.compress_type (see __compressor__).
+
+        Args:
+        info (zipfile.ZipInfo): The name, date, attributes and compression of the member.
+        compressed (bytes): The compressed data.
+        crc (int): The crc32 of the data.
+        size (int): The size of the data.
+        '''
+        info.file_size, info.compress_size, info.CRC = size, len(compressed), crc
+        info.header_offset = self.file.tell()
+        self.file.write(self.__local__(info,size > zipfile.ZIP64_LIMIT or len(compressed) > zipfile.ZIP64_LIMIT))
+        self.file.write(compressed)
+        self.filelist.append(info)
+    def stream(self,info,path:str,level:int=None,chunkSize:int=1<<20):
+        '''Add a member from a file, compressed (or stored) chunk by chunk as it is read; the header is written again at the end.'''
+        zip64 = info.file_size*1.05 > zipfile.ZIP64_LIMIT
+        info.compress_size, info.CRC = 0, 0
+        info.header_offset = self.file.tell()
+        self.file.write(self.__local__(info,zip64))
+        compressor, start = __compressor__(info.compress_type,level)
+        self.file.write(start)
+        crc, size, compressed = 0, 0, len(start)
+        with open(path,'rb') as source:
+            for chunk in iter(lambda: source.read(chunkSize),b''):
+                crc = zlib.crc32(chunk,crc)
+                size += len(chunk)
+                if compressor is not None:
+                    chunk = compressor.compress(chunk)
+                self.file.write(chunk)
+                compressed += len(chunk)
+        if compressor is not None:
+            chunk = compressor.flush()
+            self.file.write(chunk)
+            compressed += len(chunk)
+        if not zip64 and (size > zipfile.ZIP64_LIMIT or compressed > zipfile.ZIP64_LIMIT):
+            raise BuilderError(f'"{path}" grew past the zip64 limit while it was packed')
+        end = self.file.tell()
+        info.file_size, info.compress_size, info.CRC = size, compressed, crc
+        self.file.seek(info.header_offset)
+        self.file.write(self.__local__(info,zip64))
+        self.file.seek(end)
+        self.filelist.append(info)
+    def writestr(self,name:str,data:bytes,compression:int=ZIP_DEFLATED):
+        '''Add a member made from bytes, dated now.'''
+        info = ZipInfo(name,time.localtime()[:6])
+        info.compress_type = compression
+        info.external_attr = 0o600 << 16
+        compressor, start = __compressor__(compression)
+        self.write(info,start+compressor.compress(data)+compressor.flush() if compressor is not None else data,zlib.crc32(data),len(data))
+    def close(self):
+        '''Write the central directory (and the zip64 end records if they are needed) and close the file.'''
+        start = self.file.tell()
+        for info in self.filelist:
+            version, flags, dostime, dosdate = zipWriter.__fields__(info)
+            name = info.filename.encode('utf-8')
+            fields = [0xFFFFFFFF if x > zipfile.ZIP64_LIMIT else x for x in (info.compress_size,info.file_size,info.header_offset)]
+            # the zip64 extra field has the large values only, in the order: size, compressed size, offset
+            large = [x for x in (info.file_size,info.compress_size,info.header_offset) if x > zipfile.ZIP64_LIMIT]
+            extra = struct.pack(f'<HH{len(large)}Q',1,8*len(large),*large) if large else b''
+            self.file.write(struct.pack('<4s2B5H3L5H2L',b'PK\x01\x02',info.create_version if not large else max(info.create_version,45),
+                                        info.create_system,version,flags,info.compress_type,dostime,dosdate,info.CRC,fields[0],fields[1],
+                                        len(name),len(extra),0,0,0,info.external_attr,fields[2])+name+extra)
+        end = self.file.tell()
+        count, size = len(self.filelist), end-start
+        if count > 0xFFFF or size > zipfile.ZIP64_LIMIT or start > zipfile.ZIP64_LIMIT:
+            self.file.write(struct.pack('<4sQ2H2L4Q',b'PK\x06\x06',44,45,45,0,0,count,count,size,start))
+            self.file.write(struct.pack('<4sLQL',b'PK\x06\x07',0,end,1))
+            count, size, start = min(count,0xFFFF), min(size,0xFFFFFFFF), min(start,0xFFFFFFFF)
+        self.file.write(struct.pack('<4s4H2LH',b'PK\x05\x06',0,0,count,count,size,start,0))
+        self.file.close()
+def __pack__(zipped,members,compression:int,level:int=None,workers:int=None,chunkSize:int=1<<20,limit:int=8<<20) -> int:
+        '''
+        Write members ((path, name in the archive) pairs) to a zipWriter, for project.package.
+        Already compressed formats are stored, files over limit bytes are streamed, the others are compressed by a pool
+        of workers threads (the number of CPUs if None), at most two files per thread ahead. Returns the number of bytes packed.
+        '''
+        total = 0
+        workers = workers or os.cpu_count() or 1
+        window = 2*workers
+        with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+            pending = deque()
+            def flush(count:int):
+                while len(pending) > count:
+                    info, future = pending.popleft()
+                    zipped.write(info,*future.result())
+            for path, name in members:
+                info = ZipInfo.from_file(path,name)
+                size = info.file_size
+                total += size
+                extension = name.rsplit('.',1)[-1].lower()
+                info.compress_type = ZIP_STORED if extension in COMPRESSED_FORMATS else compression
+                if info.compress_type == ZIP_STORED or size > limit:
+                    flush(0)
+                    zipped.stream(info,path,level,chunkSize)
+                    continue
+                pending.append((info,pool.submit(__compress_member__,path,info.compress_type,level)))
+                flush(window)
+            flush(0)
+        return total
+class pageDatabase():
+    FILE = 'pages.db'
+    FORMAT = 1
+    def __init__(self,path:str):
+        '''
+        A single-file store (an SQLite database) for the raw files of a project's pages, used instead of one folder with
+        'Head.RBCode' and 'Body.RBCode' per page when the project's storage is 'database' (see project). Every page is one
+        row, with it's head and body in the raw binary format (see compactDocument.iter_bytes), looked up by name through
+        the primary key index, so a project of 50,000 pages is one file and reading a page does not scan anything.
+
+        Args:
+        path (str): The database file, made if it does not exist.
+
+        Raises:
+        FileError: If the file was written by a newer version.
+        '''
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        with self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value)')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS pages (name TEXT PRIMARY KEY, head BLOB NOT NULL, body BLOB NOT NULL)')
+            self.connection.execute('INSERT OR IGNORE INTO meta VALUES (?,?)',('format',pageDatabase.FORMAT))
+        version = self.connection.execute("SELECT value FROM meta WHERE key='format'").fetchone()[0]
+        if version > pageDatabase.FORMAT:
+            raise FileError(f'"{path}" was written in version {version} of the page database, this version of Web Builder reads up to {pageDatabase.FORMAT}.')
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+    def __contains__(self,name:str):
+        return self.connection.execute('SELECT 1 FROM pages WHERE name=?',(name,)).fetchone() is not None
+    def names(self) -> list:
+        '''Returns the names of the stored pages, sorted.'''
+        return [x[0] for x in self.connection.execute('SELECT name FROM pages ORDER BY name')]
+    def put(self,p):
+        '''Store a page (it's head and body, by it's fileName), replacing the stored one.'''
+        self.putMany((p,))
+    def putMany(self,pages,batch:int=256) -> int:
+        '''
+        Store pages in bulk, batch pages per transaction. Returns the number of pages stored.
+
+        Args:
+        pages: page objects, or (name, head bytes, body bytes) tuples in the raw binary format.
+        batch (int): The number of pages written per transaction. Defaults to 256.
+        '''
+        count = 0
+        rows = []
+        for p in pages:
+            if isinstance(p,page):
+                p = (p.fileName,b''.join(__dump_raw__(p.head)),b''.join(__dump_raw__(p.body)))
+            rows.append(p)
+            if len(rows) >= batch:
+                count += self.__write__(rows)
+        return count+self.__write__(rows)
+    def __write__(self,rows:list) -> int:
+        with self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO pages VALUES (?,?,?)',rows)
+        count = len(rows)
+        rows.clear()
+        return count
+    def get(self,name:str,lazy:bool=True):
+        '''
+        Returns a stored page. With lazy, the head and body are elements.lazy proxies, decoded when they are used (see page.importRaw).
+
+        Raises:
+        FileError: If there is no page of that name.
+        '''
+        row = self.connection.execute('SELECT name, head, body FROM pages WHERE name=?',(name,)).fetchone()
+        if row is None:
+            raise FileError(f'The page "{name}" is not in the page database "{self.path}".')
+        return self.__page__(row,lazy)
+    def getMany(self,names=None,lazy:bool=True):
+        '''
+        Yields stored pages in bulk: the given names (in that order, the missing ones are skipped) or all the pages (sorted by name).
+        '''
+        if names is None:
+            for row in self.connection.execute('SELECT name, head, body FROM pages ORDER BY name'):
+                yield self.__page__(row,lazy)
+            return
+        names = list(names)
+        for i in range(0,len(names),500):
+            part = names[i:i+500]
+            rows = {x[0]:x for x in self.connection.execute(f'SELECT name, head, body FROM pages WHERE name IN ({",".join("?"*len(part))})',part)}
+            for x in part:
+                if x in rows:
+                    yield self.__page__(rows[x],lazy)
+    def __page__(self,row,lazy:bool):
+        name, head, body = row
+        return page(name,__raw_root__(compactDocument.fromBuffer(head,name),lazy),__raw_root__(compactDocument.fromBuffer(body,name),lazy))
+    def remove(self,name:str):
+        '''Remove a page, if it is stored.'''
+        with self.connection:
+            self.connection.execute('DELETE FROM pages WHERE name=?',(name,))
+    def compact(self) -> int:
+        '''Give the space of the removed and replaced pages back to the file system (VACUUM). Returns the number of bytes freed.'''
+        before = self.__size__()
+        self.connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        self.connection.execute('VACUUM')
+        self.connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        return before-self.__size__()
+    def __size__(self) -> int:
+        return sum(os.path.getsize(x) for x in (self.path,self.path+'-wal') if os.path.exists(x))
+    def close(self):
+        self.connection.close()
+__cssToken__ = re.compile(r"""("(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')|(/\*.*?\*/)|(\s+)|([^"'/\s]+|/)""",re.S)
+__cssEnd__ = re.compile(r'[{;}]')
+JS_REGEX_AFTER = frozenset(('return','typeof','instanceof','in','of','new','delete','void','throw','case','do','else','yield','await'))
+def __word_char__(char:str) -> bool:
+        return char.isalnum() or char in '_$\\' or ord(char) > 127
+class assetPipeline():
+    FILE = 'assets.json'
+    def __init__(self,root:str):
+        '''
+        The built stylesheets and scripts of a project (see project.buildAssets). For every css and js resource, it keeps
+        the hash of the source, the hash of the minified output (stored in the project's resourceStore, like the
+        resources) and it's fingerprinted name, like 'app.3f9c2a1b.css'. They are kept in 'assets.json' in the project folder,
+        with a cache of the minified outputs by the hash of their source, so an asset is only minified again when it changes.
+
+        Args:
+        root (str): The project folder.
+        '''
+        self.root = root
+        try:
+            with open(os.path.join(root,assetPipeline.FILE),'r',encoding='utf-8') as file:
+                state = json.load(file)
+            self.assets, self.cache = state['assets'], state['cache']
+        except (FileNotFoundError,ValueError,KeyError):
+            self.assets, self.cache = {}, {}
+    def save(self):
+        '''Write 'assets.json' (atomically).'''
+        __write_file__(os.path.join(self.root,assetPipeline.FILE),(json.dumps({'version':1,'assets':self.assets,'cache':self.cache},indent=1).encode('utf-8'),))
+    @staticmethod
+    def fingerprinted(name:str,digest:str) -> str:
+        '''Returns the fingerprinted name of a file, with the first 8 characters of the hash. Ex: app.css -> app.3f9c2a1b.css'''
+        base, extension = name.rsplit('.',1)
+        return f'{base}.{digest[:8]}.{extension}'
+    @staticmethod
+    def minifyCSS(text:str) -> str:
+        '''
+        Minify a stylesheet: the comments (but /*! ... */ ones) are removed, and so is the whitespace that is not needed,
+        around { } ; , > ~ and : (a ';' before a '}' too). Strings are kept as they are, and so is the space around
+        + and - (needed in calc()) and before the : of a selector (a descendant selector like 'div :hover').
+        '''
+        out = []
+        space = False
+        for match in __cssToken__.finditer(text):
+            string, comment, whitespace, other = match.groups()
+            if comment:
+                if comment.startswith('/*!'):
+                    out.append(comment)
+                else:
+                    # a removed comment still separates the tokens around it, like a space ('0/**/auto')
+                    space = True
+                continue
+            if whitespace:
+                space = True
+                continue
+            token = string or other
+            if space and out and out[-1][-1] not in '{};,>~:(' and token[0] not in '{};,>~)!':
+                # the space before a ':' is only needed in a selector (that goes on to a '{'), not in a declaration
+                end = __cssEnd__.search(text,match.end()) if token[0] == ':' else None
+                if end is None or end.group() == '{':
+                    out.append(' ')
+            space = False
+            if token[0] == '}' and out and out[-1] == ';':
+                out.pop()
+            out.append(token)
+        return ''.join(out)
+    @staticmethod
+    def minifyJS(text:str) -> str:
+        '''
+        Minify a script, safely: the comments (but /*! ... */ ones) are removed, runs of spaces become one space or one
+        line break (line breaks are kept where they may end a statement), and the space between two characters that can
+        not join is removed. Strings, template literals and regular expressions are kept as they are; names are not shortened.
+        '''
+        out = []
+        i, n = 0, len(text)
+        pending = ''
+        # operand: the last token ends an operand (a name, a number, a literal, a ')' or ']'...), so a '/' after it
+        # is a division, not a regular expression; conditions: for every open '(', if it opens an if/while/for condition
+        operand, previous, conditions = False, '', []
+        def emit(token:str,kind:str='code'):
+            nonlocal pending, operand, previous
+            if pending and out:
+                last = out[-1][-1]
+                first = token[0]
+                if first == '.' and out[-1][0].isdigit():
+                    # '1 .toString()', without the space the dot would be read as the number's decimal point
+                    out.append(' ')
+                elif pending == '\n':
+                    if last not in '{;,([' and first not in '}),;.]':
+                        out.append('\n')
+                elif (__word_char__(last) and __word_char__(first)) or (last in '+-' and first == last):
+                    out.append(' ')
+            pending = ''
+            out.append(token)
+            if kind == 'literal':
+                operand = True
+            elif kind == 'code':
+                if token == '(':
+                    conditions.append(previous in ('if','while','for','with'))
+                    operand = False
+                elif token == ')':
+                    # '(ok) / 2' divides, 'if (ok) /x/.test(s)' starts a regular expression
+                    operand = not (conditions.pop() if conditions else False)
+                elif token == ']':
+                    operand = True
+                elif __word_char__(token[0]):
+                    operand = token not in JS_REGEX_AFTER
+                elif token not in ('++','--'):
+                    # a postfix ++ or -- keeps the operand before it (n++ / 2), a prefix one follows an operator
+                    operand = False
+                previous = token
+        while i < n:
+            char = text[i]
+            if char in ' \t\r\n\f\v':
+                j = i
+                while j < n and text[j] in ' \t\r\n\f\v':
+                    j += 1
+                if pending != '\n':
+                    pending = '\n' if '\n' in text[i:j] else ' '
+                i = j
+                continue
+            if text.startswith('//',i):
+                j = text.find('\n',i)
+                i = n if j < 0 else j
+                continue
+            if text.startswith('/*',i):
+                j = text.find('*/',i+2)
+                j = n if j < 0 else j+2
+                if text.startswith('/*!',i):
+                    emit(text[i:j],'comment')
+                elif pending != '\n':
+                    pending = '\n' if '\n' in text[i:j] else ' '
+                i = j
+                continue
+            if char in '\'"`':
+                j = i+1
+                while j < n and text[j] != char:
+                    if text[j] == '\\':
+                        j += 1
+                    elif char == '`' and text.startswith('${',j):
+                        # a template literal's substitution, scanned to it's closing brace (strings inside included)
+                        depth, j = 1, j+2
+                        while j < n and depth:
+                            if text[j] in '\'"`':
+                                quote, j = text[j], j+1
+                                while j < n and text[j] != quote:
+                                    j += 2 if text[j] == '\\' else 1
+                            elif text[j] == '{':
+                                depth += 1
+                            elif text[j] == '}':
+                                depth -= 1
+                            j += 1
+                        continue
+                    j += 1
+                emit(text[i:j+1],'literal')
+                i = j+1
+                continue
+            if char == '/':
+                if not operand:
+                    # a regular expression
+                    j, inClass = i+1, False
+                    while j < n and (text[j] != '/' or inClass) and text[j] != '\n':
+                        if text[j] == '\\':
+                            j += 1
+                        elif text[j] == '[':
+                            inClass = True
+                        elif text[j] == ']':
+                            inClass = False
+                        j += 1
+                    emit(text[i:j+1],'literal')
+                    i = j+1
+                    continue
+            j = i+1
+            if text.startswith('++',i) or text.startswith('--',i):
+                j = i+2
+            elif __word_char__(char):
+                while j < n and __word_char__(text[j]):
+                    j += 1
+            emit(text[i:j])
+            i = j
+        return ''.join(out)
+    def build(self,project,minify:bool=True) -> dict:
+        '''Minify and fingerprint the css and js resources of a project, see project.buildAssets.'''
+        report = {'built':[],'cached':[],'removed':[]}
+        store, manifest = project.store, project.manifest
+        for name, entry in manifest.resources.items():
+            extension = name.rsplit('.',1)[-1].lower()
+            if extension not in ('css','js') or not isinstance(entry,dict):
+                continue
+            source = entry['hash']
+            key = source if minify else 'copy:'+source
+            output = self.cache.get(key)
+            if output is not None and os.path.exists(store.path(output)):
+                report['cached'].append(name)
+            else:
+                with open(store.path(source),'r',encoding='utf-8') as file:
+                    text = file.read()
+                if minify:
+                    text = assetPipeline.minifyCSS(text) if extension == 'css' else assetPipeline.minifyJS(text)
+                output = self.cache[key] = store.ingest(text.encode('utf-8'))[0]
+                report['built'].append(name)
+            old = self.assets.get(name)
+            self.assets[name] = {'source':source,'output':output,'folder':entry['folder'],'file':assetPipeline.fingerprinted(name,output),
+                                 'previous':sorted(set((old or {}).get('previous',[]))|({old['file']} if old and old['output'] != output else set()))}
+            # the fingerprinted file, next to the resource, where the rewritten pages link to it
+            store.place(output,entry['folder'],self.assets[name]['file'])
+            if old and old['file'] != self.assets[name]['file']:
+                store.unplace(old['folder'],old['file'])
+        for name in [x for x in self.assets if not isinstance(manifest.resources.get(x),dict)]:
+            store.unplace(self.assets[name]['folder'],self.assets[name]['file'])
+            del self.assets[name]
+            report['removed'].append(name)
+        # the cache only keeps the outputs of the current sources, the others are removed from the store
+        current = {x['source'] for x in self.assets.values()}
+        for key in [x for x in self.cache if x.split(':')[-1] not in current]:
+            output = self.cache.pop(key)
+            if output not in self.cache.values() and not manifest.hashes.get(output):
+                store.remove(output)
+        self.save()
+        return report
+    def renames(self) -> dict:
+        '''Returns {file name: fingerprinted name} for the built assets, from their plain name and their older fingerprinted names.'''
+        renames = {}
+        for name, asset in self.assets.items():
+            for x in [name]+asset['previous']:
+                renames[x] = asset['file']
+        return renames
+    @staticmethod
+    def rewrite(p,renames:dict) -> int:
+        '''
+        Point the href and src attributes of a page's elements that name a file of renames (in any folder, absolute urls
+        excepted) at it's new name. A head or body that is a compactDocument is converted to elements (see
+        compactDocument.toElements) only if it names one of the files. Returns the number of attributes changed.
+        '''
+        def rename(value:str):
+            if type(value)!=str or '://' in value or value.startswith('//'):
+                return None
+            cut = min((x for x in (value.find('?'),value.find('#')) if x >= 0),default=len(value))
+            path, rest = value[:cut], value[cut:]
+            folder, _, base = path.rpartition('/')
+            if base not in renames:
+                return None
+            return (folder+'/' if folder or path.startswith('/') else '')+renames[base]+rest
+        for section in ('head','body'):
+            root = getattr(p,section)
+            if isinstance(root,compactDocument) and any(rename(x) for x in root.strings if type(x)==str):
+                setattr(p,section,root.toElements())
+        changed = 0
+        for x in p.select('[href], [src]'):
+            for attribute in ('href','src'):
+                value = rename(x.attributes.get(attribute))
+                if value is not None:
+                    x.attributes[attribute] = value
+                    changed += 1
+        return changed
 class project():
-    def __init__(self, projectName:str, Images: bool = True, Javascript:bool=True,CSS:bool=True,XML:bool=True):
+    def __init__(self, projectName:str, Images: bool = True, Javascript:bool=True,CSS:bool=True,XML:bool=True,storage:str='folders'):
         """A parent object for your website. When created creates a folder (and sub-folders) in the path specified in this order
         projectname\n
             |----Resources--|\n
@@ -981,7 +3603,7 @@ class project():
             |---------------|CSS\n
             |---------------|XML\n
             |---------------|Other\n
-            |----settings.py\n
+            |----project.json\n
         All HTML files will be saved in the root folder (in the above case, in projectname). All files will be saved in thier respective folder.
 
         You can also customize what folders are created. The "other" folder is created by default.
@@ -1000,10 +3622,16 @@ class project():
         3. Javascript -> Make a Javascript folder?
         4. CSS -> Make a CSS folder?
         5. XML -> Make a XML folder?
+        6. storage -> Where the raw files of the pages are kept: 'folders' (a folder per page, like page.exportRaw)
+           or 'database' (one indexed file, 'pages.db', see pageDatabase; better for projects with many pages).
+           It can be changed later with setStorage.
 
         As soon as you make this object, you will be asked for the root directory. Just select the desired directory, and you're good to go!
         """
+        if storage not in ('folders','database'):
+            raise BuilderError(f'Unknown page storage "{storage}", use "folders" or "database"')
         self.__name__ = projectName
+        self.root = os.path.abspath(projectName)
         self.__supported_resources__ = ('xml','js','png','jpg','css','jpeg','gif','svg','bmp','img','other')
         try:
             os.mkdir(projectName)
@@ -1024,132 +3652,912 @@ class project():
         __validate_chdir__('..')
         os.mkdir('Versions')
         self.pages = {}
-        os.chdir('.\\.')
-        with open('settings.py','w',encoding='utf-8') as setting:
-            setting.write('VERSIONS = ["0.0.1"]\n')
-            setting.write("REGISTERED_RESOURCES = {'IMAGES':"+str(Images)+",'JAVASCRIPT':"+str(Javascript)+",'XML':"+str(XML)+",'CSS':"+str(CSS)+"}\n")
-            setting.write("RESOURCES = {} # {'gg.png':PATH}\n")
-            setting.write('PAGES = []')
-    def __changeSetting__(self,grp:str,main,add:bool=True,/,key=None):
-        with open('settings.py','a',encoding='utf-8') as setting:
-            match grp:
-                case 'pages':
-                    if add:
-                        setting.write(f'\nPAGES.append({main})')
-                    else:
-                        setting.write(f'\nPAGES.remove({main})')
-                case 'resource':
-                    if add:
-                        setting.write(f'\nRESOURCES[{key}] = {main}')
-                    else:
-                        setting.write(f'\nRESOURCES.pop({main},__default="")')
-                case 'version':
-                    if add:
-                        setting.write(f'\nVERSIONS.append({main})')
+        self.store = resourceStore(self.root)
+        self.manifest = projectManifest(self.root,{'IMAGES':Images,'JAVASCRIPT':Javascript,'XML':XML,'CSS':CSS})
+        self.manifest.storage = storage
+        self.database = pageDatabase(os.path.join(self.root,pageDatabase.FILE)) if storage == 'database' else None
+        self.assets = assetPipeline(self.root)
+        self.manifest.compact()
+    @classmethod
+    def load(cls,path:str):
+        '''
+        Open an existing project folder. The pages are not loaded, get them with getPage.
+        A project made by an older version (with a settings.py) is migrated to the manifest (see projectManifest.migrate).
+
+        Args:
+        path (str): The project folder.
+        '''
+        self = cls.__new__(cls)
+        self.__name__ = os.path.basename(os.path.abspath(path))
+        self.root = os.path.abspath(path)
+        self.__supported_resources__ = ('xml','js','png','jpg','css','jpeg','gif','svg','bmp','img','other')
+        self.pages = {}
+        self.store = resourceStore(self.root)
+        self.manifest = projectManifest.load(self.root)
+        self.database = pageDatabase(os.path.join(self.root,pageDatabase.FILE)) if self.manifest.storage == 'database' else None
+        self.assets = assetPipeline(self.root)
+        return self
+    def pruneCSS(self,perPage:bool=False,critical:int=0,stylesheets=(),resources:list=None,minify:bool=True,emit:bool=False) -> dict:
+        '''
+        Drop the css rules that can not match any element of the project's pages (see cssPruner): the pages in memory,
+        and the saved pages that are not (read from their raw files). The css is taken from the css resources of the project
+        and the given stylesheets, in that order. The pruning is reported as a 'pruneCSS' stage to instrumentation.
+
+        Args:
+        perPage (bool): Make one stylesheet per page (with the rules that can match that page), or one for the site. Defaults to False.
+        critical (int): If more than 0, the rules that can match the head, the body or the first critical elements of the body
+            of a page (see cssPruner.critical) are inlined in a <style> in it's <head> (replacing the one added before), and the
+            pages are added to the project to be saved again. Defaults to 0.
+        stylesheets: stylesheet or cssSelector objects, or css text, to prune with the resources.
+        resources (list): The names of the css resources to use, like ['style.css']. Defaults to None (all of them).
+        minify (bool): Minify the output. Defaults to True.
+        emit (bool): Add the pruned css to the project as resources ('pruned.css', or 'pruned.<page name>.css' per page). Defaults to False.
+
+        Returns:
+            dict: {'rules': the number of rules, 'css': {'site' or page name: css}, 'kept': {'site' or page name: the number of rules kept},
+                   'critical': {page name: the inlined css}}
+        '''
+        manifest = self.manifest
+        sources = []
+        for name, entry in manifest.resources.items():
+            if not name.lower().endswith('.css') or (resources is not None and name not in resources):
+                continue
+            path = self.store.path(entry['hash']) if isinstance(entry,dict) else os.path.join(self.root,entry,name)
+            with open(path,'r',encoding='utf-8') as file:
+                sources.append(file.read())
+        sources.extend(stylesheets)
+        pages = {x:self.pages[x][0] for x in self.pages}
+        for x in manifest.pages:
+            if x not in pages:
+                try:
+                    pages[x] = self.getPage(x[:-5])[0]
+                except FileError:
+                    pass
+        with instrumentation.stage('pruneCSS',pages=len(pages),perPage=perPage) as stage:
+            pruner = cssPruner(sources)
+            report = {'rules':len(pruner.rules),'css':{},'kept':{},'critical':{}}
+            groups = {x:(p,) for x, p in pages.items()} if perPage else {'site':tuple(pages.values())}
+            for name, group in groups.items():
+                used = pruner.used(group)
+                report['css'][name] = pruner.render(used,minify)
+                report['kept'][name] = len(used)
+                if emit:
+                    self.addResource('pruned' if name == 'site' else 'pruned.'+name[:-5],'css',report['css'][name].encode('utf-8'))
+            if critical > 0:
+                for name, p in pages.items():
+                    if not isinstance(p.head,elements.element):
+                        continue
+                    css = report['critical'][name] = pruner.render(pruner.critical(p,critical),minify,False)
+                    style = elements.tag('<style>','Container',[css],{'data-critical':'true'})
+                    inner = p.head.innerhtml
+                    for i, x in enumerate(inner):
+                        if getattr(x,'tag',None) == '<style>' and x.attributes.get('data-critical') == 'true':
+                            inner[i] = style
+                            break
                     else:
-                        setting.write(f'\nVERSIONS.remove({main})')
+                        inner.append(style)
+                    if name not in self.pages:
+                        # a saved page, it is written again by the next save()
+                        self.addPage(p)
+            stage.set(rules=len(pruner.rules),kept=max(report['kept'].values(),default=0))
+        return report
+    def buildAssets(self,minify:bool=True,rewrite:bool=True) -> dict:
+        '''
+        The asset build stage: every css and js resource is minified (see assetPipeline.minifyCSS and minifyJS) and
+        stored under a fingerprinted name made from the hash of it's content, like 'app.3f9c2a1b.css', that can be cached
+        by browsers for ever (a new content gets a new name). The minified outputs are cached by the hash of their source,
+        so the assets that did not change are not minified again. The pages of the project, in memory and saved (read from
+        their raw files, like pruneCSS does), are then rewritten to use the new names (see assetPipeline.rewrite), to be
+        written by the next save() (the saved pages that changed are added to the project); package() packs the fingerprinted
+        files next to the others. The stage is reported as 'assets' to instrumentation.
+
+        Args:
+        minify (bool): Minify the assets, or only fingerprint them. Defaults to True.
+        rewrite (bool): Rewrite the href and src attributes of the pages. Defaults to True.
+
+        Returns:
+            dict: {'built': [names of the assets minified], 'cached': [names of the assets taken from the cache],
+                   'removed': [names of the assets whose resource was removed], 'pages': [names of the pages rewritten]}
+        '''
+        with instrumentation.stage('assets',minify=minify) as stage:
+            report = self.assets.build(self,minify)
+            report['pages'] = []
+            if rewrite:
+                renames = self.assets.renames()
+                for name, entry in (self.pages.items() if renames else ()):
+                    p = entry[0]
+                    if assetPipeline.rewrite(p,renames):
+                        entry[1:] = [p.head,p.body]
+                        report['pages'].append(name)
+                for name in (self.manifest.pages if renames else ()):
+                    if name in self.pages:
+                        continue
+                    try:
+                        p = self.getPage(name[:-5])[0]
+                    except FileError:
+                        continue
+                    if assetPipeline.rewrite(p,renames):
+                        self.addPage(p)
+                        report['pages'].append(name)
+            stage.set(built=len(report['built']),cached=len(report['cached']),pages=len(report['pages']))
+        return report
+    def setStorage(self,storage:str):
+        '''
+        Move the raw files of the saved pages to another storage: 'folders' or 'database' (see project).
+        The pages are moved in bulk, and the old files are removed once they are all moved.
+
+        Args:
+        storage (str): 'folders' or 'database'.
+        '''
+        if storage not in ('folders','database'):
+            raise BuilderError(f'Unknown page storage "{storage}", use "folders" or "database"')
+        if storage == self.manifest.storage:
+            return
+        names = [x[:-5] for x in self.manifest.pages]
+        with instrumentation.stage('setStorage',storage=storage,pages=len(names)):
+            if storage == 'database':
+                database = pageDatabase(os.path.join(self.root,pageDatabase.FILE))
+                folders = [x for x in names if os.path.isdir(os.path.join(self.root,x))]
+                database.putMany((x,*(b''.join(__dump_raw__(__load_raw__(os.path.join(self.root,x,y),False))) for y in ('Head.RBCode','Body.RBCode'))) for x in folders)
+                self.__storage__(database,storage)
+                for x in folders:
+                    shutil.rmtree(os.path.join(self.root,x))
+            else:
+                for p in self.database.getMany(names,False):
+                    folder = os.path.join(self.root,p.fileName)
+                    os.makedirs(folder,exist_ok=True)
+                    for name, root in (('Head.RBCode',p.head),('Body.RBCode',p.body)):
+                        __write_file__(os.path.join(folder,name),__dump_raw__(root))
+                database = self.database
+                self.__storage__(None,storage)
+                database.close()
+                for x in ('','-wal','-shm'):
+                    if os.path.exists(database.path+x):
+                        os.remove(database.path+x)
+    def __storage__(self,database,storage:str):
+        self.database = database
+        self.manifest.storage = storage
+        self.manifest.compact()
+    def __changeSetting__(self,grp:str,main,add:bool=True,/,key=None):
+        self.manifest.change(grp,main,add,key)
     def addPage(self,page :page):
         self.pages[page.fileName+'.html'] = [page, page.head,page.body]
-    def package(self):
-        __validate_chdir__(self.__name__)
-        sys.path.insert(0,os.getcwd())
-        try:
-            import settings
-        except ModuleNotFoundError:
-            raise AcessError('The settings could not be accesed, please be in the correct directory')
-        version = settings.VERSIONS[-1]
-        zipped = ZipFile(f'{self.__name__}_{version}','w')
-        for x in settings.PAGES:
-            zipped.write(x,x)
-        os.chdir("Resources")
-        zipped.mkdir("Resources")
-        for x in os.listdir():
-            if settings.REGISTERED_RESOURCES[x.title()]:
-                __validate_chdir__(x)
-                for y in os.listdir():
-                    if y in settings.RESOURCES:
-                        zipped.write(y,f"Resources\\{x}\\{y}")
-        zipped.close()
-    def addResource(self,name:str,extension:str,fileByte:bytes):
-        __validate_chdir__(self.__name__)
-        __validate_chdir__('Resources')
-        match extension:
-            case 'css':
-                os.chdir('CSS')
-                file = open(name+'.css','wb')
-                file.write(fileByte)
-                file.close()
-                os.chdir('..\\..')
-                self.__changeSetting__('resource','Resources\\CSS',True,key=name+'.css')
-            case 'js':
-                os.chdir('Javascript')
-                file = open(name+'.js','wb')
-                file.write(fileByte)
-                file.close()
-                os.chdir('..\\..')
-                self.__changeSetting__('resource','Resources\\Javascript',True,key=name+'.js')
-            case 'xml':
-                os.chdir('XML')
-                file = open(name+'.xml','wb')
-                file.write(fileByte)
-                file.close()
-                os.chdir('..\\..')
-                self.__changeSetting__('resource','Resources\\XML',True,key=name+'.xml')
-            case 'png' | 'jpg' | 'svg' | 'bmp' | 'gif' | 'jpeg' | 'img':
-                os.chdir('Images')
-                file = open(name+f'.{extension}','wb')
-                file.write(fileByte)
-                file.close()
-                os.chdir('..\\..')
-                self.__changeSetting__('resource','Resources\\Images',True,key=name+f'.{extension}')
-            case 'other':
-                os.chdir('Other')
-                file = open(name+f'.{extension}','wb')
-                file.write(fileByte)
-                file.close()
-                os.chdir('..\\..')
-                self.__changeSetting__('resource','Resources\\Other',True,key=name+f'.{extension}')
-    def save(self):
-        __validate_chdir__(self.__name__)
-        sys.path.insert(0,os.getcwd())
+    def package(self,method:str='deflate',level:int=None,workers:int=None,chunkSize:int=1<<20,base_version:str=None) -> str:
+        '''
+        Pack the project's pages and resources in a zip archive, '<projectName>_<version>' in the project folder
+        (version is the last one of the manifest). Returns the path of the archive.
+
+        Every archive has a 'package.json' with the sha256 hash of every file of the version, and the same list is kept
+        in 'Versions/<version>.json'. With base_version, the archive ('<projectName>_<base_version>-<version>') is a delta:
+        it only has the files whose hash is not the same as in base_version, and 'package.json' lists the removed ones.
+        A folder with the files of base_version is brought to this version with project.applyPackage.
+
+        Formats that are already compressed (images like png, jpg and gif, fonts, archives...) are stored as they are.
+        The other files are compressed with method, by a pool of threads (zlib, bz2 and lzma work outside of the GIL),
+        and written to the archive in a fixed order, so the archive does not depend on the number of workers. Files over
+        8 MiB are streamed into the archive in chunks instead, so the memory stays bounded. The packing is reported as a
+        'package' stage to instrumentation. See benchmarks/bench_package.py.
+
+        Args:
+        method (str): 'deflate', 'bzip2', 'lzma' or 'store'. Defaults to 'deflate'.
+        level (int): The compression level (see zipfile.ZipFile), None for the default of the method.
+        workers (int): The number of compressing threads, defaults to the number of CPUs.
+        chunkSize (int): The number of bytes read at a time. Defaults to 1 MiB.
+        base_version (str): The version to make a delta from, it must have been packaged before. Defaults to None (a full archive).
+
+        Raises:
+        BuilderError: If the method is not known, or base_version was never packaged.
+        '''
+        if method not in ARCHIVE_METHODS:
+            raise BuilderError(f'Unknown compression method "{method}", use one of {", ".join(ARCHIVE_METHODS)}')
+        compression = ARCHIVE_METHODS[method]
+        version = self.manifest.versions[-1]
+        members = list(self.__members__())
+        files = {name:digest for source, name, digest in members}
+        removed = []
+        if base_version is None:
+            path = os.path.join(self.root,f'{self.__name__}_{version}')
+        else:
+            try:
+                with open(os.path.join(self.root,'Versions',base_version+'.json'),'r',encoding='utf-8') as file:
+                    base = json.load(file)['files']
+            except FileNotFoundError:
+                raise BuilderError(f'The version "{base_version}" was never packaged, there is nothing to make a delta from')
+            members = [x for x in members if base.get(x[1]) != x[2]]
+            removed = [name for name in base if name not in files]
+            path = os.path.join(self.root,f'{self.__name__}_{base_version}-{version}')
+        about = {'format':1,'project':self.__name__,'version':version,'base':base_version,'files':files,'removed':removed}
+        with instrumentation.stage('package',file=path,method=method,base=base_version) as stage:
+            with zipWriter(path+'.tmp') as zipped:
+                size = __pack__(zipped,[x[:2] for x in members],compression,level,workers,chunkSize)
+                zipped.writestr(PACKAGE_FILE,json.dumps(about,indent=1).encode('utf-8'),ZIP_DEFLATED)
+                stage.set(files=len(members),removed=len(removed),bytes=size)
+            os.replace(path+'.tmp',path)
+            os.makedirs(os.path.join(self.root,'Versions'),exist_ok=True)
+            __write_file__(os.path.join(self.root,'Versions',version+'.json'),(json.dumps({'version':version,'files':files},indent=1).encode('utf-8'),))
+        return path
+    def __members__(self):
+        '''Yields (path, name in the archive, sha256) for the files packed by package(), in the order of the manifest.'''
+        manifest = self.manifest
+        for x in manifest.pages:
+            yield os.path.join(self.root,x), x, __file_hash__(os.path.join(self.root,x))
+        for y, entry in manifest.resources.items():
+            if isinstance(entry,dict):
+                if manifest.registered.get(entry['folder'].upper(),True):
+                    # the store is content-addressed, the hash is the name
+                    yield self.store.path(entry['hash']), f"Resources/{entry['folder']}/{y}", entry['hash']
+            else:
+                # resources added before the store, entry is their folder
+                folder = os.path.join(self.root,*entry.replace('\\','/').split('/'))
+                if os.path.exists(os.path.join(folder,y)):
+                    yield os.path.join(folder,y), entry.replace('\\','/')+'/'+y, __file_hash__(os.path.join(folder,y))
+        for y, asset in self.assets.assets.items():
+            entry = manifest.resources.get(y)
+            # the built assets of the current sources only (see buildAssets)
+            if isinstance(entry,dict) and entry['hash'] == asset['source'] and manifest.registered.get(asset['folder'].upper(),True):
+                yield self.store.path(asset['output']), f"Resources/{asset['folder']}/{asset['file']}", asset['output']
+    @staticmethod
+    def applyPackage(archive:str,folder:str) -> dict:
+        '''
+        Bring a folder to the version of an archive made by package(): the files of the archive are written (each one
+        to a temporary file that then replaces it, after checking it's hash) and the removed files are deleted.
+        A delta archive needs the folder to be at it's base version; a full archive can be applied to any folder that
+        an archive of the same project was applied to (or an empty one), the files it no longer has are deleted.
+        The folder keeps the 'package.json' of the last archive applied, to know it's version.
+
+        Args:
+        archive (str): The path of the archive.
+        folder (str): The folder the files are in, made if it does not exist.
+
+        Raises:
+        BuilderError: If the folder is not at the base version of a delta, or a file of the archive is damaged.
+
+        Returns:
+            dict: {'version': the version, 'written': [names], 'removed': [names]}
+        '''
+        folder = os.path.abspath(folder)
+        os.makedirs(folder,exist_ok=True)
         try:
-            import settings
-        except ModuleNotFoundError:
-            raise AcessError('The settings could not be accesed, please be in the correct directory')
-        for x in self.pages:
-            if x in settings.PAGES:
-                continue
+            with open(os.path.join(folder,PACKAGE_FILE),'r',encoding='utf-8') as file:
+                current = json.load(file)
+        except FileNotFoundError:
+            current = None
+        def target(name:str) -> str:
+            path = os.path.abspath(os.path.join(folder,*name.split('/')))
+            if os.path.commonpath((path,folder)) != folder or name == PACKAGE_FILE:
+                raise BuilderError(f'The archive has a file outside of it\'s folder: "{name}"')
+            return path
+        with ZipFile(archive,'r') as zipped:
+            about = json.loads(zipped.read(PACKAGE_FILE))
+            if about['base'] is not None and (current is None or current['version'] != about['base']):
+                found = 'no version' if current is None else f'version "{current["version"]}"'
+                raise BuilderError(f'The archive is a delta from version "{about["base"]}", but the folder has {found}')
+            removed = list(about['removed'])
+            if about['base'] is None and current is not None:
+                removed += [name for name in current['files'] if name not in about['files']]
+            written = []
+            with instrumentation.stage('applyPackage',file=archive,version=about['version'],base=about['base']) as stage:
+                for info in zipped.infolist():
+                    name = info.filename
+                    if name == PACKAGE_FILE or name.endswith('/'):
+                        continue
+                    path = target(name)
+                    os.makedirs(os.path.dirname(path),exist_ok=True)
+                    with zipped.open(info) as source:
+                        digest = __write_file__(path,iter(lambda: source.read(1<<20),b''))[0]
+                    if digest != about['files'].get(name):
+                        os.remove(path)
+                        raise BuilderError(f'The file "{name}" of the archive is damaged (it\'s hash does not match package.json)')
+                    written.append(name)
+                for name in removed:
+                    path = target(name)
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    # and the folders left empty
+                    path = os.path.dirname(path)
+                    while path != folder and os.path.isdir(path) and not os.listdir(path):
+                        os.rmdir(path)
+                        path = os.path.dirname(path)
+                __write_file__(os.path.join(folder,PACKAGE_FILE),(json.dumps(about,indent=1).encode('utf-8'),))
+                stage.set(written=len(written),removed=len(removed))
+        return {'version':about['version'],'written':written,'removed':removed}
+    def addResource(self,name:str,extension:str,source):
+        '''
+        Add a resource (like a stylesheet or an image) to the project, as '<name>.<extension>'.
+        The file is copied into the project's resourceStore in chunks and hashed on the way; a content that is already
+        stored (under any name) is not stored again. The manifest maps the name to the hash, it's folder
+        (CSS, Javascript, XML, Images or Other, from the extension) and it's size.
+        The file also gets it's named path, 'Resources/<folder>/<name>.<extension>', in the project folder (see
+        resourceStore.place), which is where the pages link to it, like in the archives made by package(). It's a hard link
+        to the stored file: change the resource with addResource, not by editing that file.
+
+        Args:
+        name (str): The name of the resource, without the extension.
+        extension (str): The extension, like 'css' or 'png'.
+        source: The content: a path, a binary file object or bytes.
+
+        Returns:
+            str: The hash of the content.
+        '''
+        digest, size = self.store.ingest(source)
+        key = name+'.'+extension
+        old = self.manifest.resources.get(key)
+        folder = resourceStore.FOLDERS.get(extension,'Other')
+        self.__changeSetting__('resource',{'hash':digest,'folder':folder,'size':size},True,key=key)
+        self.store.place(digest,folder,key)
+        if isinstance(old,dict) and old['hash'] != digest and not self.manifest.hashes.get(old['hash']):
+            self.store.remove(old['hash'])
+        return digest
+    def removeResource(self,resourceName:str):
+        '''
+        Remove a resource (like 'style.css') from the project, and it's named path in the project folder. It's content is
+        deleted from the store when no other name uses it.
+
+        Args:
+        resourceName (str): The name of the resource, with the extension.
+        '''
+        old = self.manifest.resources.get(resourceName)
+        self.__changeSetting__('resource',resourceName,False)
+        if isinstance(old,dict):
+            self.store.unplace(old['folder'],resourceName)
+            if not self.manifest.hashes.get(old['hash']):
+                self.store.remove(old['hash'])
+    def save(self,pretty:bool=True,force:bool=False,workers:int=1) -> dict:
+        '''
+        Save the project's pages in the project folder: every page is written as '<fileName>.html' and as raw files
+        ('<fileName>/Head.RBCode' and 'Body.RBCode', like page.exportRaw), or as a row of 'pages.db' for the database
+        storage (written in bulk, a few hundred pages per transaction, see pageDatabase).
+
+        The save is incremental. The build manifest ('build.json' in the project folder) keeps, for every page, the hash of
+        it's tree (of it's rendering, taken from the render cache) and of the html file written. A page is only rendered
+        and written again when it's tree changed, the pretty setting changed, or it's files were changed or deleted since;
+        the other pages are skipped. New pages are also added to the project manifest, which is then compacted
+        (see projectManifest). The whole save is reported as a 'save' stage to instrumentation.
+
+        With workers, the pages are rendered and written in a process pool. The pages are checked first, and only the ones to
+        rebuild are sent to the workers, as compactDocuments (the raw files are then written from their toElements()), only a few pages per worker at a time,
+        and the results are taken in the order of the pages, so the memory stays bounded and the html files, the
+        manifest and the report are the same as with a single process. See benchmarks/bench_build.py.
+
+        Args:
+        pretty (bool): Indent the html files (see page.render). Defaults to True.
+        force (bool): Rebuild every page. Defaults to False.
+        workers (int): The number of worker processes, None for the number of CPUs. Defaults to 1 (no pool, the render cache of the pages is used).
+
+        Returns:
+            dict: {'rebuilt': [names of the pages written], 'skipped': [names of the pages that did not change]}
+        '''
+        with instrumentation.stage('save',pages=len(self.pages),workers=workers) as stage:
+            manifest = self.__buildManifest__()
+            report = {'rebuilt':[],'skipped':[]}
+            database = self.database
+            # for the database storage, a page that is not in the database is rebuilt
+            tasks = ((self.pages[x][0],self.root,pretty,manifest.get(x) if database is None or x[:-5] in database else None,force,database is not None) for x in self.pages)
+            if workers == 1:
+                results = map(__save_worker__,tasks)
             else:
-                self.__changeSetting__('pages',self.pages[x][0].fileName+'.html',True)
-            self.pages[x][0].export(self.pages[x][0].render(self.pages[x][1],self.pages[x][2]))
-            self.pages[x][0].exportRaw(self.pages[x][1],self.pages[x][2])
+                results = __save_pool__(tasks,workers)
+            rows = []
+            for name, entry, rebuilt, row in results:
+                if name not in self.manifest.pages:
+                    self.__changeSetting__('pages',name,True)
+                manifest[name] = entry
+                report['rebuilt' if rebuilt else 'skipped'].append(name)
+                if row is not None:
+                    rows.append(row)
+                    if len(rows) >= 256:
+                        database.putMany(rows)
+                        rows = []
+            if rows:
+                database.putMany(rows)
+            __write_file__(os.path.join(self.root,'build.json'),(json.dumps({'version':1,'pages':manifest},indent=1).encode('utf-8'),))
+            self.manifest.compact()
+            stage.set(rebuilt=len(report['rebuilt']),skipped=len(report['skipped']))
+        return report
+    def __buildManifest__(self) -> dict:
+        '''Returns the pages of the build manifest, {} if there is none yet.'''
+        try:
+            with open(os.path.join(self.root,'build.json'),'r',encoding='utf-8') as file:
+                return json.load(file)['pages']
+        except (FileNotFoundError,ValueError,KeyError):
+            return {}
     def getPage(self, pageName: str):
-        __validate_chdir__(self.__name__)
-        p = page(pageName)
-        head, body = p.importRaw(pageName)
-        return [p, head, body]
+        '''
+        Returns [page, head, body] of a saved page, read from it's raw files (the head and body are elements.lazy proxies, see page.importRaw).
+
+        Args:
+        pageName (str): The name of the page, without '.html'.
+
+        Raises:
+        FileError: If the page was never saved.
+        '''
+        if self.database is not None:
+            p = self.database.get(pageName)
+        else:
+            folder = os.path.join(self.root,pageName)
+            try:
+                p = page(pageName,__load_raw__(os.path.join(folder,'Head.RBCode')),__load_raw__(os.path.join(folder,'Body.RBCode')))
+            except FileNotFoundError:
+                raise FileError(f'The raw files of the page "{pageName}" do not exist, was it saved?')
+        return [p, p.head, p.body]
     def deletePage(self, pageName:str):
-        __validate_chdir__(self.__name__)
-        os.remove(pageName+'str')
-        shutil.rmtree(pageName)
+        os.remove(os.path.join(self.root,pageName+'.html'))
+        if self.database is not None:
+            self.database.remove(pageName)
+        else:
+            shutil.rmtree(os.path.join(self.root,pageName))
+        self.pages.pop(pageName+'.html',None)
+        if pageName+'.html' in self.manifest.pages:
+            self.__changeSetting__('pages',pageName+'.html',False)
     def get_resource_address(self,resourceName:str):
-        sys.path.insert(0,os.getcwd())
-        try:
-            import settings
-        except ModuleNotFoundError:
-            raise AcessError('The settings could not be accesed, please be in the correct directory')
-        return settings.RESOURCES[resourceName]
+        '''
+        Returns the path of a resource's file, relative to the project folder (for the resources added before
+        the store, the folder it was written to).
+
+        Args:
+        resourceName (str): The name of the resource, with the extension. Ex: 'style.css'
+        '''
+        entry = self.manifest.resources[resourceName]
+        if isinstance(entry,dict):
+            return self.store.path(entry['hash'],True)
+        return entry
 class cssSelector():
     def __init__(self,selector,propertyDict):
         self.selector = selector
         self.property = propertyDict
     def render(self):
-        self.line = ''
-        self.line += self.selector+'{\n'
+        line = [self.selector,'{\n']
         for x in self.property:
-            self.line += x+':'+self.property[x]+';\n'
-        self.line += '}\n'
+            line.append(x+':'+self.property[x]+';\n')
+        line.append('}\n')
+        self.line = ''.join(line)
         return self.line
+__selectorSplit__ = re.compile(r',(?![^(\[]*[)\]])')
+def __split_selectors__(selector:str) -> tuple:
+        '''Returns the comma separated selectors of a selector list (commas inside () and [] excepted), stripped, with the whitespace collapsed.'''
+        return tuple(' '.join(x.split()) for x in __selectorSplit__.split(selector) if x.strip())
+class stylesheet():
+    def __init__(self,selectors=()):
+        '''
+        A stylesheet made of cssSelector objects, rendered in one pass. Before rendering, the rules are optimized
+        without changing what the stylesheet does (see rules):
+            1. A declaration that is declared again further down for the same selectors, with the same value, is dropped,
+               and so are the rules left empty; identical rules are kept once. A different value is kept, so fallbacks
+               like 'background:red' followed by 'background:linear-gradient(...)' still work.
+            2. Rules with the same declarations (in any order, unless the order matters like in 'margin:0;margin-top:1px')
+               are merged into one rule with all their selectors ('a{x:1}' and 'b{x:1}' become 'a,b{x:1}'), when no rule
+               between them declares one of those properties or a related one (so the cascade is the same).
+
+        Args:
+        selectors: cssSelector objects to start with.
+        '''
+        self.selectors = []
+        self.__rules__ = None
+        # the <style> elements attached to pages, to replace them when attached again
+        self.__attached__ = []
+        self.add(*selectors)
+    def __len__(self):
+        return len(self.selectors)
+    def __iter__(self):
+        return iter(self.selectors)
+    def add(self,*selectors):
+        '''
+        Add cssSelector objects (or other stylesheets, whose selectors are added) at the end of the stylesheet.
+
+        Raises:
+        TypeError: If something else is given.
+        '''
+        for x in selectors:
+            if isinstance(x,stylesheet):
+                self.selectors.extend(x.selectors)
+            elif isinstance(x,cssSelector):
+                self.selectors.append(x)
+            else:
+                raise TypeError(f'A stylesheet is made of cssSelector objects, not {type(x).__name__}')
+        self.__rules__ = None
+        return self
+    def rules(self) -> list:
+        '''
+        Returns the optimized rules, as [(selectors tuple, ((property, value),...)),...] in the order of the stylesheet.
+        They are computed once, until the stylesheet is changed.
+        '''
+        if self.__rules__ is not None:
+            return self.__rules__
+        rules = []
+        for x in self.selectors:
+            block = {}
+            for name in x.property:
+                # a property declared twice in a block, the last one is used
+                block.pop(name.strip(),None)
+                block[name.strip()] = ' '.join(str(x.property[name]).split())
+            rules.append([__split_selectors__(x.selector),block])
+        # 1. declarations declared again further down for the same selectors, with the same value
+        later = set()
+        for selectors, block in reversed(rules):
+            for name in list(block):
+                if (selectors,name,block[name]) in later:
+                    del block[name]
+                else:
+                    later.add((selectors,name,block[name]))
+        rules = [[selectors,tuple(block.items())] for selectors, block in rules if block]
+        # 2. rules with the same block, merged into the first one when nothing between them declares a related property.
+        # Properties are related by their first word ('margin' and 'margin-top'), which is sometimes too careful but
+        # never wrong; a block is compared without it's order unless two of it's properties are related.
+        def family(name):
+            return name.lstrip('-').split('-')[0]
+        def key(block):
+            families = [family(name) for name, value in block]
+            return frozenset(block) if len(set(families)) == len(families) else block
+        positions = {}
+        for i, (selectors, block) in enumerate(rules):
+            for name in {family(name) for name, value in block}:
+                positions.setdefault(name,[]).append(i)
+        first = {}
+        for j, rule in enumerate(rules):
+            i = first.get(key(rule[1]))
+            if i is None:
+                first[key(rule[1])] = j
+                continue
+            blocked = False
+            for name in {family(name) for name, value in rule[1]}:
+                found = positions[name]
+                k = bisect.bisect_right(found,i)
+                if found[k] != j:
+                    blocked = True
+                    break
+            if blocked:
+                first[key(rule[1])] = j
+                continue
+            rules[i][0] += tuple(x for x in rule[0] if x not in rules[i][0])
+            rule[0] = None
+            for name in {family(name) for name, value in rule[1]}:
+                positions[name].remove(j)
+        self.__rules__ = [(selectors,block) for selectors, block in rules if selectors is not None]
+        return self.__rules__
+    def iter_render(self,minify:bool=False):
+        '''Render the stylesheet chunk by chunk (see render). Yields strings.'''
+        if minify:
+            for selectors, block in self.rules():
+                yield ','.join(selectors)+'{'+';'.join(name+':'+value for name, value in block)+'}'
+            return
+        for selectors, block in self.rules():
+            yield ',\n'.join(selectors)+' {\n'+''.join('    '+name+': '+value+';\n' for name, value in block)+'}\n'
+    def render(self,minify:bool=False) -> str:
+        '''
+        Render the optimized stylesheet (see rules). Returns a string.
+
+        Args:
+        minify (bool): Leave out all the whitespace, or write one selector and one declaration per line. Defaults to False.
+        '''
+        return ''.join(self.iter_render(minify))
+    def element(self,minify:bool=True):
+        '''Returns a <style> element with the rendered stylesheet.'''
+        return elements.tag('<style>','Container',[self.render(minify)],{})
+    def attach(self,p,minify:bool=True):
+        '''
+        Add the stylesheet to the head of a page, as a <style> element (made with element). A stylesheet that was
+        attached to the page before is replaced. Returns the element.
+
+        Args:
+        p (page): The page. It's head must be an element tree (convert a compactDocument head with toElements).
+        minify (bool): Render the stylesheet minified. Defaults to True.
+        '''
+        style = self.element(minify)
+        if p.head is None:
+            p.head = elements.head([])
+        if isinstance(p.head,compactDocument):
+            raise BuilderError('The head of the page is a compactDocument, convert it with toElements() to attach a stylesheet')
+        inner = p.head.innerhtml
+        for i, x in enumerate(inner):
+            if any(x is y for y in self.__attached__):
+                self.__attached__.remove(x)
+                inner[i] = style
+                break
+        else:
+            inner.append(style)
+        self.__attached__.append(style)
+        return style
+    def export(self,project,name:str='style',minify:bool=True):
+        '''
+        Add the rendered stylesheet to a project as the resource '<name>.css' (see project.addResource).
+        Returns a <link rel="stylesheet"> element to it, to add to the head of the pages. The link points at
+        'Resources/CSS/<name>.css', the path of the resource in the project folder and in the packaged site (see
+        project.package); project.buildAssets rewrites it to the fingerprinted name.
+
+        Args:
+        project (project): The project.
+        name (str): The name of the resource, without '.css'. Defaults to 'style'.
+        minify (bool): Render the stylesheet minified. Defaults to True.
+        '''
+        project.addResource(name,'css',self.render(minify).encode('utf-8'))
+        return elements.tag('<link>','Empty',[],{'rel':'stylesheet','href':f'Resources/CSS/{name}.css'})
+__cssPseudo__ = re.compile(r'::?[\w-]+')
+__cssAttributeOperator__ = re.compile(r'\[\s*([\w-]+)\s*(?:[~|^$*]?=\s*("[^"]*"|\'[^\']*\'|[^\]\s]*)\s*[iIsS]?\s*)?\]')
+STATEMENT_AT_RULES = frozenset(('@media','@supports','@layer','@container','@document'))
+def __css_block__(text:str,start:int) -> int:
+        """Returns the index after the '}' closing the block whose '{' is at start (strings and comments skipped)."""
+        depth, i, n = 0, start, len(text)
+        while i < n:
+            char = text[i]
+            if char in '"\'':
+                i += 1
+                while i < n and text[i] != char:
+                    i += 2 if text[i] == '\\' else 1
+            elif text.startswith('/*',i):
+                i = text.find('*/',i+2)
+                i = n if i < 0 else i+1
+            elif char == '{':
+                depth += 1
+            elif char == '}':
+                depth -= 1
+                if not depth:
+                    return i+1
+            i += 1
+        return n
+def __parse_css__(text:str) -> list:
+        """
+        Split a stylesheet into it's rules, for cssPruner. Returns a list of nodes:
+            ['rule', selector list, declarations] -> a style rule
+            ['at', prelude, children] -> a grouping at-rule (@media, @supports...) with the nodes inside it
+            ['at', prelude, None or '{...}'] -> any other at-rule (@import, @font-face, @keyframes...), kept as it is
+        Comments are dropped.
+        """
+        nodes, i, n = [], 0, len(text)
+        while i < n:
+            # the prelude runs to the '{' or ';' that is not in a string, a comment or brackets
+            j, depth, prelude = i, 0, []
+            while j < n:
+                char = text[j]
+                if char in '"\'':
+                    k = j+1
+                    while k < n and text[k] != char:
+                        k += 2 if text[k] == '\\' else 1
+                    prelude.append(text[j:k+1])
+                    j = k+1
+                    continue
+                if text.startswith('/*',j):
+                    k = text.find('*/',j+2)
+                    j = n if k < 0 else k+2
+                    prelude.append(' ')
+                    continue
+                if char in '([':
+                    depth += 1
+                elif char in ')]':
+                    depth -= 1
+                elif depth <= 0 and char in '{;}':
+                    break
+                prelude.append(char)
+                j += 1
+            prelude = ' '.join(''.join(prelude).split())
+            if j >= n or text[j] != '{':
+                if prelude.startswith('@'):
+                    nodes.append(['at',prelude,None])
+                i = j+1
+                continue
+            end = __css_block__(text,j)
+            body = text[j+1:end-1]
+            if prelude.startswith('@'):
+                if prelude.split()[0].lower() in STATEMENT_AT_RULES:
+                    nodes.append(['at',prelude,__parse_css__(body)])
+                else:
+                    nodes.append(['at',prelude,text[j:end]])
+            elif prelude:
+                nodes.append(['rule',prelude,' '.join(re.sub(r'/\*.*?\*/','',body,flags=re.S).split())])
+            i = end
+        return nodes
+def __strip_pseudo__(compound:str) -> str:
+        """Remove the pseudo-classes and pseudo-elements (with their arguments) of a compound selector, and the attribute operators."""
+        out, i, n = [], 0, len(compound)
+        while i < n:
+            char = compound[i]
+            if char == '[':
+                j = compound.find(']',i)
+                j = n if j < 0 else j+1
+                out.append(__cssAttributeOperator__.sub(r'[\1]',compound[i:j]) if '=' in compound[i:j] else compound[i:j])
+                i = j
+                continue
+            match = __cssPseudo__.match(compound,i) if char == ':' else None
+            if match is None:
+                out.append(char)
+                i += 1
+                continue
+            i = match.end()
+            if i < n and compound[i] == '(':
+                depth = 0
+                while i < n:
+                    depth += {'(':1,')':-1}.get(compound[i],0)
+                    i += 1
+                    if not depth:
+                        break
+        return ''.join(out) or '*'
+def __css_requirements__(selector:str) -> list:
+        """
+        Returns the selectors (in the syntax of page.select) that must each match an element of a page for selector
+        to be able to match one, the last one for the element it styles. The pseudo-classes, pseudo-elements and attribute
+        operators are dropped and an 'A + B' or 'A ~ B' requires A and a B in the same place as A, so the requirements
+        match at least every element the selector can (they never drop a rule that is used). Returns None when the
+        selector can not be read (the rule is then kept).
+        """
+        steps, compound, combinator, depth, i, n = [], [], None, 0, 0, len(selector)
+        while i <= n:
+            char = selector[i] if i < n else ' '
+            if depth == 0 and (char in ' >+~' or i == n):
+                if compound:
+                    steps.append((combinator,__strip_pseudo__(''.join(compound))))
+                    compound, combinator = [], ' '
+                if char in '>+~':
+                    combinator = char
+                i += 1
+                continue
+            depth += {'(':1,'[':1,')':-1,']':-1}.get(char,0)
+            compound.append(char)
+            i += 1
+        # <html> is not in the page trees, it matches anyway
+        while steps and steps[0][1].lower().split(':')[0] == 'html':
+            steps = steps[1:]
+            if steps:
+                steps[0] = (None,steps[0][1])
+        if not steps:
+            return ['*']
+        requirements, path = [], []
+        for combinator, compound in steps:
+            if combinator in ('+','~'):
+                requirements.append(path[:])
+                path[-1] = (path[-1][0],compound)
+            else:
+                path.append((combinator,compound))
+        requirements.append(path)
+        result = []
+        for path in requirements:
+            text = ''.join((' > ' if x == '>' else ' ' if x else '')+y for x, y in path)
+            try:
+                __parse_selector__(text)
+            except SelectorError:
+                return None
+            result.append(text)
+        return result
+class cssPruner():
+    def __init__(self,sources=()):
+        """
+        Find the css rules that can match an element of some pages, and render the stylesheet without the others.
+
+        The selectors are checked against the tag, id and class indexes of the pages (see elementIndex), in two steps:
+        a selector that needs a tag, id or class that no page has is dropped at once; the others are looked up, like
+        page.select does, on the pages that have the rarest of them only, stopping at the first match. A selector with pseudo-classes, sibling combinators or attribute
+        operators is checked without them (see __css_requirements__), so a rule is only dropped when it can not match;
+        selectors that can not be read, and the at-rules other than @media, @supports, @layer and @container
+        (@font-face, @keyframes, @import...), are always kept.
+
+        Args:
+        sources: The css: stylesheets, cssSelector objects or css text (str).
+        """
+        self.nodes = []
+        for x in sources:
+            if isinstance(x,cssSelector):
+                x = x.render()
+            elif isinstance(x,stylesheet):
+                x = x.render()
+            self.nodes.extend(__parse_css__(x))
+        self.rules = []
+        self.__collect__(self.nodes)
+        self.__requirements__ = {}
+    def __collect__(self,nodes:list):
+        for x in nodes:
+            if x[0] == 'rule':
+                x.append(len(self.rules))
+                self.rules.append(x)
+            elif isinstance(x[2],list):
+                self.__collect__(x[2])
+    def __requirement__(self,selector:str):
+        """Returns the parsed requirements of one selector and the tags, ids and classes they need (see __css_requirements__), cached."""
+        value = self.__requirements__.get(selector,False)
+        if value is False:
+            texts = __css_requirements__(selector)
+            if texts is None:
+                value = None
+            else:
+                groups = [__parse_selector__(x)[0] for x in texts]
+                needs = []
+                for steps in groups:
+                    for combinator, compound in steps:
+                        needs.extend([('tag',compound['tag'])] if compound['tag'] is not None else [])
+                        needs.extend([('id',compound['id'])] if compound['id'] is not None else [])
+                        needs.extend(('class',x) for x in compound['classes'])
+                value = (groups,needs)
+            self.__requirements__[selector] = value
+        return value
+    @staticmethod
+    def vocabulary(pages) -> dict:
+        """Returns {key: [(page, index),...]} for the ('tag', '<p>'), ('id', x) and ('class', x) keys of the indexes of the pages."""
+        owners = {}
+        for p in pages:
+            index = p.indexed()
+            for kind, keys in (('tag',index.byTag),('id',index.byId),('class',index.byClass)):
+                for x, y in keys.items():
+                    if y:
+                        owners.setdefault((kind,x),[]).append((p,index))
+        return owners
+    def __matches__(self,requirement,index,within:set=None) -> bool:
+        if requirement is None:
+            return True
+        groups, needs = requirement
+        for i, steps in enumerate(groups):
+            last = len(steps)-1
+            compound = steps[-1][1]
+            subject = within is not None and i == len(groups)-1
+            for x in index.__candidates__(compound):
+                if (not subject or x in within) and __matches_compound__(x,compound) and __matches_steps__(x,steps,last,index.roots):
+                    break
+            else:
+                return False
+        return True
+    def used(self,pages,within:dict=None) -> set:
+        """
+        Returns the numbers (in self.rules) of the rules that can match an element of one of the pages.
+
+        Args:
+        pages: The page objects.
+        within (dict): {page: set of elements}, to only count the matches on these elements of each page (see critical).
+        """
+        pages = list(pages)
+        owners = cssPruner.vocabulary(pages)
+        indexes = [(p,p.indexed()) for p in pages]
+        used = set()
+        for rule in self.rules:
+            for selector in __split_selectors__(rule[1]):
+                requirement = self.__requirement__(selector)
+                candidates = indexes
+                if requirement is not None and requirement[1]:
+                    if any(x not in owners for x in requirement[1]):
+                        continue
+                    # only the pages that have the rarest tag, id or class the selector needs
+                    candidates = min((owners[x] for x in requirement[1]),key=len)
+                if any(self.__matches__(requirement,index,None if within is None else within.get(p,set())) for p, index in candidates):
+                    used.add(rule[3])
+                    break
+        return used
+    def critical(self,p,count:int=50) -> set:
+        """
+        Returns the numbers of the rules that can match the <head>, the <body> or one of the first count elements of
+        the body of a page, in document order (the part of the page that is shown first).
+        """
+        within = set()
+        if isinstance(p.head,elements.element):
+            within.add(p.head)
+        for x in p.indexed().__walk__():
+            if x is p.head or __is_ancestor__(p.head,x):
+                continue
+            if len(within) > count+1:
+                break
+            within.add(x)
+        return self.used((p,),{p:within})
+    def render(self,used:set,minify:bool=True,atRules:bool=True) -> str:
+        """
+        Render the stylesheet with the rules of used only (the grouping at-rules left empty are dropped).
+
+        Args:
+        used (set): The numbers of the rules to keep (see used).
+        minify (bool): Minify the output (see assetPipeline.minifyCSS). Defaults to True.
+        atRules (bool): Keep the other at-rules (@font-face, @import...). Defaults to True.
+        """
+        text = ''.join(self.__render__(self.nodes,used,atRules))
+        return assetPipeline.minifyCSS(text) if minify else text
+    def __render__(self,nodes:list,used:set,atRules:bool):
+        for x in nodes:
+            if x[0] == 'rule':
+                if x[3] in used:
+                    yield x[1]+' {'+x[2]+'}\n'
+            elif isinstance(x[2],list):
+                inner = ''.join(self.__render__(x[2],used,atRules))
+                if inner:
+                    yield x[1]+' {\n'+inner+'}\n'
+            elif atRules:
+                yield x[1]+(x[2] if x[2] is not None else ';')+'\n'
+def __is_ancestor__(node,x) -> bool:
+        """Returns True if node is an ancestor of x."""
+        return any(__reaches__(y,(node,)) for y in __parents__(x))
 def renderFile(self, fileName):
     """A func that can be used to open any file, with the filename provided. Make sure you are in the correct path"""
     try:
@@ -0,0 +1,51 @@
+'''
+Parallel project build.
+Makes a project of N pages (each with a body of R rows) in a temporary folder and times a full
+project.save(force=True) with 1 worker and with the given numbers of workers, checking the files written are the same.
+
+Usage::
+    python benchmarks/bench_build.py [pages] [rows] [workers...]
+'''
+import hashlib, importlib, os, sys, tempfile, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(ROOT))
+Builder = importlib.import_module(os.path.basename(ROOT))
+elements = Builder.elements
+
+def make_page(i, rows):
+    items = [elements.li(['Page '+str(i)+' item '+str(j), elements.b('bold')], {'class': 'row'}) for j in range(rows)]
+    return Builder.page('page'+str(i), elements.head([elements.title('Page '+str(i))]), elements.body([elements.ul(items)]))
+
+def digest(folder):
+    files = hashlib.sha256()
+    for name in sorted(os.listdir(folder)):
+        if name.endswith('.html'):
+            with open(os.path.join(folder, name), 'rb') as file:
+                files.update(file.read())
+    return files.hexdigest()
+
+def main(pages=200, rows=2000, workers=(2, 4)):
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as folder:
+        os.chdir(folder)
+        site = Builder.project('site')
+        os.chdir(cwd)
+        for i in range(pages):
+            site.addPage(make_page(i, rows))
+        # render caches are turned off so every run renders the pages, like a fresh process would
+        elements.element.caching = False
+        results, outputs = {}, {}
+        for n in (1,)+tuple(workers):
+            start = time.perf_counter()
+            report = site.save(force=True, workers=n)
+            results[n] = time.perf_counter()-start
+            outputs[n] = digest(site.root)
+            print(f'workers={n}: {len(report["rebuilt"])} pages in {results[n]:.2f}s, speedup {results[1]/results[n]:.2f}x, output {outputs[n][:12]}')
+        elements.element.caching = True
+        assert len(set(outputs.values())) == 1, 'the html files differ between the numbers of workers'
+    print(f'{os.cpu_count()} CPUs')
+
+if __name__ == '__main__':
+    args = [int(x) for x in sys.argv[1:]]
+    main(*args[:2], workers=tuple(args[2:]) or (2, 4))
@@ -0,0 +1,33 @@
+'''
+Memory per element node.
+Builds a page body of N list items, each <li class="row"> holding a text and a <b> element
+(2 nodes per item), and measures the memory it takes with tracemalloc.
+
+Usage::
+    python benchmarks/bench_memory.py [items]
+'''
+import gc, importlib, os, sys, tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(ROOT))
+Builder = importlib.import_module(os.path.basename(ROOT))
+elements = Builder.elements
+
+def build(n):
+    rows = [elements.li(['Item '+str(i), elements.b('bold')], {'class': 'row'}) for i in range(n)]
+    return elements.body([elements.ul(rows)])
+
+def main(n=100000):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    body = build(n)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    nodes = 2*n+2
+    text = sum(sys.getsizeof('Item '+str(i)) for i in range(n))
+    print(f'{nodes} nodes: {(after-before)/2**20:.1f} MiB, {(after-before-text)/nodes:.0f} bytes per node (text excluded)')
+    return body
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,55 @@
+'''
+Project packaging.
+Makes a project with N text resources (stylesheets and scripts of about K KiB each) and M images of random bytes in a
+temporary folder, then times the old way of packing it (every file written with ZipFile.write, stored, and the same with
+deflate for every file) against project.package() with the given numbers of workers, printing the archive sizes.
+
+Usage::
+    python benchmarks/bench_package.py [texts] [kib] [images] [workers...]
+'''
+import importlib, os, random, sys, tempfile, time
+from zipfile import ZipFile, ZIP_STORED, ZIP_DEFLATED
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(ROOT))
+Builder = importlib.import_module(os.path.basename(ROOT))
+
+def make_text(i, kib):
+    rule = '.item-%d-{n} {{ margin: {n}px; color: #%06x; }}\n' % (i, random.randrange(1 << 24))
+    lines, size = [], 0
+    while size < kib*1024:
+        lines.append(rule.format(n=len(lines)))
+        size += len(lines[-1])
+    return ''.join(lines).encode()
+
+def old_package(site, path, compression):
+    # what project.package did before: one ZipFile.write per file, in the calling thread
+    with ZipFile(path, 'w', compression) as zipped:
+        for source, name, digest in site.__members__():
+            zipped.write(source, name)
+    return path
+
+def main(texts=200, kib=256, images=50, workers=(1, 2, 4)):
+    random.seed(0)
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as folder:
+        os.chdir(folder)
+        site = Builder.project('site')
+        os.chdir(cwd)
+        for i in range(texts):
+            site.addResource('file'+str(i), ('css', 'js')[i % 2], make_text(i, kib))
+        for i in range(images):
+            site.addResource('image'+str(i), 'png', os.urandom(kib*1024))
+        runs = [('old, stored', lambda: old_package(site, os.path.join(folder, 'old-stored.zip'), ZIP_STORED)),
+                ('old, deflate', lambda: old_package(site, os.path.join(folder, 'old-deflate.zip'), ZIP_DEFLATED))]
+        runs += [(f'package(workers={n})', lambda n=n: site.package(workers=n)) for n in workers]
+        for label, run in runs:
+            start = time.perf_counter()
+            path = run()
+            took = time.perf_counter()-start
+            print(f'{label}: {took:.2f}s, {os.path.getsize(path)/2**20:.1f} MiB')
+    print(f'{os.cpu_count()} CPUs')
+
+if __name__ == '__main__':
+    args = [int(x) for x in sys.argv[1:]]
+    main(*args[:3], workers=tuple(args[3:]) or (1, 2, 4))
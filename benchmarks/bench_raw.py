@@ -0,0 +1,50 @@
+'''
+Raw page files.
+Builds a body of N rows (<li class="row"> with a text and a <b>) and compares pickle with the raw binary format of
+page.exportRaw (compactDocument.dump/load): file size, dump time, load time (lazy, and with every element built),
+and the time to read one element deep in the tree after loading.
+
+Usage::
+    python benchmarks/bench_raw.py [rows]
+'''
+import importlib, os, pickle, sys, tempfile, time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(ROOT))
+Builder = importlib.import_module(os.path.basename(ROOT))
+elements = Builder.elements
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter()-start
+
+def last_row(body):
+    return body.innerhtml[0].innerhtml[-1].innerhtml[0]
+
+def main(rows=100000):
+    items = [elements.li(['Row '+str(i), elements.b('bold')], {'class': 'row'}) for i in range(rows)]
+    body = elements.body([elements.ul(items)])
+    with tempfile.TemporaryDirectory() as folder:
+        pickled = os.path.join(folder, 'Body.pickle')
+        raw = os.path.join(folder, 'Body.RBCode')
+        def dump_pickle():
+            with open(pickled, 'wb') as file:
+                pickle.dump(body, file)
+        def load_pickle():
+            with open(pickled, 'rb') as file:
+                return pickle.load(file)
+        _, pickle_dump = timed(dump_pickle)
+        loaded, pickle_load = timed(load_pickle)
+        _, pickle_touch = timed(lambda: last_row(loaded))
+        _, raw_dump = timed(lambda: Builder.compactDocument.fromElements(body).dump(raw))
+        lazy, raw_lazy = timed(lambda: elements.lazy(Builder.compactDocument.load(raw)))
+        _, raw_touch = timed(lambda: last_row(lazy))
+        _, raw_full = timed(lambda: Builder.compactDocument.load(raw).toElements())
+        assert last_row(lazy) == last_row(loaded)
+        print(f'{rows} rows, {2*rows+2} elements')
+        print(f'pickle: {os.path.getsize(pickled)/2**20:.1f} MiB, dump {pickle_dump:.3f}s, load {pickle_load:.3f}s, then last row {pickle_touch*1000:.2f}ms')
+        print(f'raw:    {os.path.getsize(raw)/2**20:.1f} MiB, dump {raw_dump:.3f}s, lazy load {raw_lazy*1000:.2f}ms, then last row {raw_touch*1000:.2f}ms, full load {raw_full:.3f}s')
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:2]])
@@ -0,0 +1,18 @@
+import importlib, os, sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(ROOT))
+Builder = importlib.import_module(os.path.basename(ROOT))
+
+@pytest.fixture
+def builder():
+    return Builder
+
+@pytest.fixture
+def folder(tmp_path):
+    # project() makes it's folder in the working directory and stays in it
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    yield tmp_path
+    os.chdir(cwd)
@@ -0,0 +1,79 @@
+import os
+import pytest
+
+@pytest.mark.parametrize('source, minified', [
+    ('var x = 1 .toString();', 'var x=1 .toString();'),
+    ('x = 1\n.toString()', 'x=1 .toString()'),
+    ('x = 1.5 .toFixed(1); y = 2..toFixed(1)', 'x=1.5 .toFixed(1);y=2..toFixed(1)'),
+    ('i++ + ++j; a - -b', 'i++ + ++j;a- -b'),
+    ('s = "a  b" + \'c // d\'', 's="a  b"+\'c // d\''),
+    ('t = `x ${ {a: "}"}.a } y`', 't=`x ${ {a: "}"}.a } y`'),
+    ('x = /a b\\/c/g.test(s) // note', 'x=/a b\\/c/g.test(s)'),
+    ('return /x/.test(y)', 'return/x/.test(y)'),
+    ('a = b\n/ 2 / c', 'a=b\n/2/c'),
+    ('/*! keep */ /* drop */ f ( a , b )', '/*! keep */f(a,b)'),
+    ('if (a)\n{\n  b()\n}\nc()', 'if(a)\n{b()}\nc()'),
+    ('var half = n++ / 2, msg = "a / b  c";', 'var half=n++/2,msg="a / b  c";'),
+    ('f(a--) / 2 / c', 'f(a--)/2/c'),
+    ('return ++i / 2', 'return++i/2'),
+    ('x = y[1] / 2; z = (b) / 2', 'x=y[1]/2;z=(b)/2'),
+    ('if (ok) / +x/.test(s)', 'if(ok)/ +x/.test(s)'),
+    ('while (x) /a b/.exec(s)', 'while(x)/a b/.exec(s)'),
+    ('for (;;) / c/.test(s)', 'for(;;)/ c/.test(s)'),
+])
+def test_minify_js(builder, source, minified):
+    assert builder.assetPipeline.minifyJS(source) == minified
+
+@pytest.mark.parametrize('source, minified', [
+    ('a , b > c { color : red ; margin : 0 auto ; }', 'a,b>c{color:red;margin:0 auto}'),
+    ('a:hover { x: "a  ;b" } /* c */ /*! keep */', 'a:hover{x:"a  ;b"}/*! keep */'),
+    ('div :first-child{x:y}', 'div :first-child{x:y}'),
+    ('.a::before{content:" "}', '.a::before{content:" "}'),
+    ('a{margin:0/**/auto}', 'a{margin:0 auto}'),
+    ('a /* x */ > b{c:d}', 'a>b{c:d}'),
+])
+def test_minify_css(builder, source, minified):
+    assert builder.assetPipeline.minifyCSS(source) == minified
+
+def make_site(builder):
+    E = builder.elements
+    site = builder.project('site')
+    site.addResource('app', 'css', b'a { color : red }')
+    for i in range(2):
+        link = E.tag('<link>', 'Empty', None, {'rel': 'stylesheet', 'href': 'Resources/CSS/app.css'})
+        site.addPage(builder.page('p%d' % i, E.head([link]), E.body([E.p('Text')])))
+    return site
+
+def html(site, name):
+    with open(os.path.join(site.root, name), encoding='utf-8') as file:
+        return file.read()
+
+def test_build_fingerprints_and_caches(builder, folder):
+    site = make_site(builder)
+    report = site.buildAssets()
+    assert report['built'] == ['app.css'] and sorted(report['pages']) == ['p0.html', 'p1.html']
+    asset = site.assets.assets['app.css']
+    assert asset['file'] == builder.assetPipeline.fingerprinted('app.css', asset['output'])
+    with open(site.store.path(asset['output']), encoding='utf-8') as file:
+        assert file.read() == 'a{color:red}'
+    assert site.buildAssets()['cached'] == ['app.css']
+    site.save()
+    assert 'Resources/CSS/'+asset['file'] in html(site, 'p0.html')
+    assert html(site, os.path.join('Resources', 'CSS', asset['file'])) == 'a{color:red}'
+
+def test_rewrite_saved_pages_after_reload(builder, folder):
+    site = make_site(builder)
+    site.buildAssets()
+    site.save()
+    old = site.assets.assets['app.css']['file']
+    loaded = builder.project.load(site.root)
+    loaded.addResource('app', 'css', b'a { color : blue }')
+    report = loaded.buildAssets()
+    new = loaded.assets.assets['app.css']['file']
+    assert new != old and sorted(report['pages']) == ['p0.html', 'p1.html']
+    assert sorted(loaded.save()['rebuilt']) == ['p0.html', 'p1.html']
+    for name in ('p0.html', 'p1.html'):
+        assert new in html(loaded, name) and old not in html(loaded, name)
+    assert new in builder.project.load(site.root).getPage('p1')[0].render()
+    assert os.path.exists(os.path.join(site.root, 'Resources', 'CSS', new))
+    assert not os.path.exists(os.path.join(site.root, 'Resources', 'CSS', old))
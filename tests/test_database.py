@@ -0,0 +1,81 @@
+import os, sqlite3
+import pytest
+
+def make_page(builder, name, text='Text'):
+    E = builder.elements
+    return builder.page(name, E.head([E.title(name)]), E.body([E.ul([E.li('1'), E.li('2')], {'class': 'nav'}), E.p(text)]))
+
+def test_round_trip(builder, tmp_path):
+    database = builder.pageDatabase(str(tmp_path / 'pages.db'))
+    pages = [make_page(builder, 'p%d' % i) for i in range(3)]
+    assert database.putMany(pages, batch=2) == 3
+    assert len(database) == 3 and 'p1' in database and 'p9' not in database
+    assert database.names() == ['p0', 'p1', 'p2']
+    for lazy in (True, False):
+        loaded = database.get('p1', lazy)
+        assert loaded.render() == pages[1].render()
+    assert [x.fileName for x in database.getMany(['p2', 'p9', 'p0'])] == ['p2', 'p0']
+    database.put(make_page(builder, 'p1', 'Changed'))
+    assert len(database) == 3 and 'Changed' in database.get('p1').render()
+    database.close()
+    reopened = builder.pageDatabase(str(tmp_path / 'pages.db'))
+    pages[1] = make_page(builder, 'p1', 'Changed')
+    assert [x.render() for x in reopened.getMany()] == [x.render() for x in pages]
+    with pytest.raises(builder.FileError):
+        reopened.get('p9')
+    reopened.close()
+
+def test_remove_and_compact(builder, tmp_path):
+    database = builder.pageDatabase(str(tmp_path / 'pages.db'))
+    database.putMany(make_page(builder, 'p%d' % i, 'Text ' * 200) for i in range(200))
+    for i in range(190):
+        database.remove('p%d' % i)
+    database.remove('missing')
+    assert len(database) == 10
+    assert database.compact() > 0
+    assert database.names() == ['p%d' % i for i in range(190, 200)]
+    database.close()
+
+def test_newer_format(builder, tmp_path):
+    path = str(tmp_path / 'pages.db')
+    builder.pageDatabase(path).close()
+    with sqlite3.connect(path) as connection:
+        connection.execute("UPDATE meta SET value=? WHERE key='format'", (builder.pageDatabase.FORMAT+1,))
+    connection.close()
+    with pytest.raises(builder.FileError):
+        builder.pageDatabase(path)
+
+def make_project(builder, storage):
+    site = builder.project('site', storage=storage)
+    for i in range(3):
+        site.addPage(make_page(builder, 'p%d' % i, 'Text %d' % i))
+    site.save()
+    return site
+
+def test_project_round_trip(builder, folder):
+    site = make_project(builder, 'database')
+    assert os.path.exists(os.path.join(site.root, builder.pageDatabase.FILE))
+    assert not os.path.exists(os.path.join(site.root, 'p0'))
+    loaded = builder.project.load(site.root)
+    assert loaded.getPage('p2')[0].render() == make_page(builder, 'p2', 'Text 2').render()
+
+@pytest.mark.parametrize('start, end', [('folders', 'database'), ('database', 'folders')])
+def test_set_storage(builder, folder, start, end):
+    site = make_project(builder, start)
+    expected = [site.getPage('p%d' % i)[0].render() for i in range(3)]
+    site.setStorage(end)
+    assert (site.database is None) == (end == 'folders')
+    assert os.path.isdir(os.path.join(site.root, 'p0')) == (end == 'folders')
+    loaded = builder.project.load(site.root)
+    assert loaded.manifest.storage == end
+    assert [loaded.getPage('p%d' % i)[0].render() for i in range(3)] == expected
+    assert loaded.save()['rebuilt'] == []
+
+def test_delete_page(builder, folder):
+    site = make_project(builder, 'database')
+    site.deletePage('p1')
+    assert 'p1' not in site.database and 'p1.html' not in site.manifest.pages
+    assert not os.path.exists(os.path.join(site.root, 'p1.html'))
+    with pytest.raises(builder.FileError):
+        site.getPage('p1')
+    assert builder.project.load(site.root).getPage('p0')[0].render() == make_page(builder, 'p0', 'Text 0').render()
@@ -0,0 +1,48 @@
+def make_page(builder, name='index'):
+    E = builder.elements
+    body = E.body([E.div([E.p('one', {'class': 'note', 'id': 'first'}), E.p('two')], {'class': 'box'})])
+    return builder.page(name, E.head([E.title('Index')]), body)
+
+def test_find_and_select(builder):
+    p = make_page(builder)
+    assert p.find(id='first').innerhtml == 'one'
+    assert [x.innerhtml for x in p.find_all(tag='<p>')] == ['one', 'two']
+    assert [x.innerhtml for x in p.select('div.box > p.note')] == ['one']
+
+def test_index_follows_mutations(builder):
+    E = builder.elements
+    p = make_page(builder)
+    assert p.find(className='late') is None
+    box = p.find(className='box')
+    box.addElement(E.p('three', {'class': 'late'}))
+    assert p.find(className='late').innerhtml == 'three'
+    p.find(id='first').attributes['class'] = 'moved'
+    assert p.select('p.note') == []
+    assert len(p.select('.box .moved')) == 1
+    box.innerhtml.remove(p.find(className='late'))
+    assert p.find(className='late') is None
+    p.body = E.body([E.p('new', {'id': 'first'})])
+    assert p.find(id='first').innerhtml == 'new'
+
+def test_shared_subtree_is_found_on_every_page(builder):
+    E = builder.elements
+    nav = E.ul([E.li('Home')], {'class': 'nav'})
+    pages = [make_page(builder, 'p%d' % i) for i in range(3)]
+    for p in pages:
+        p.find(className='box').addElement(nav)
+    assert all(p.find(className='nav') is nav for p in pages)
+    assert all(len(p.select('div.box > ul.nav > li')) == 1 for p in pages)
+    nav.addElement(E.li('About', {'class': 'about'}))
+    assert all(p.find(className='about') is not None for p in pages)
+    pages[0].find(className='box').innerhtml.remove(nav)
+    assert pages[0].find(className='nav') is None
+    assert pages[1].find(className='nav') is nav
+
+def test_shared_subtree_matches_the_queried_page_only(builder):
+    E = builder.elements
+    nav = E.ul([E.li('Home')], {'class': 'nav'})
+    home = builder.page('home', E.head([]), E.body([E.div([nav], {'class': 'home'})]))
+    other = builder.page('other', E.head([]), E.body([E.div([nav])]))
+    assert len(home.select('.home ul.nav')) == 1
+    assert other.select('.home ul.nav') == []
+    assert len(other.select('div > ul.nav')) == 1
@@ -0,0 +1,48 @@
+import pickle
+
+def make_pages(builder, nav, count=4):
+    E = builder.elements
+    pages = []
+    for i in range(count):
+        p = builder.page('p%d' % i, E.head([E.title('Page %d' % i)]), E.body([E.p('Text %d' % i)]))
+        p.body.addElement(nav)
+        pages.append(p)
+    return pages
+
+def test_edit_clears_cache_up_to_root(builder):
+    E = builder.elements
+    item = E.li('one')
+    body = E.body([E.ul([item, E.li('two')])])
+    assert '<li>one</li>' in body.render()
+    item.innerhtml = 'changed'
+    assert '<li>changed</li>' in body.render()
+    body.innerhtml[0].attributes['class'] = 'list'
+    assert 'class="list"' in body.render()
+
+def test_shared_subtree_invalidates_every_page(builder):
+    E = builder.elements
+    nav = E.ul([E.li('Home')], {'class': 'nav'})
+    pages = make_pages(builder, nav)
+    assert all('Home' in p.render() for p in pages)
+    nav.addElement(E.li('About'))
+    assert all('About' in p.render() for p in pages)
+    nav.innerhtml[0].innerhtml = 'Start'
+    assert all('Start' in p.render() and 'Home' not in p.render() for p in pages)
+
+def test_removed_parent_is_dropped(builder):
+    E = builder.elements
+    nav = E.ul([E.li('Home')])
+    pages = make_pages(builder, nav, 2)
+    pages[0].body.innerhtml.remove(nav)
+    assert nav._parent is pages[1].body
+    pages[1].body.innerhtml = []
+    assert nav._parent is None
+
+def test_shared_subtree_survives_pickle(builder):
+    E = builder.elements
+    nav = E.ul([E.li('Home')])
+    pages = pickle.loads(pickle.dumps(make_pages(builder, nav, 3)))
+    shared = pages[0].body.innerhtml[-1]
+    assert all(p.body.innerhtml[-1] is shared for p in pages)
+    shared.addElement(E.li('About'))
+    assert all('About' in p.render() for p in pages)
@@ -0,0 +1,54 @@
+import pickle
+import pytest
+
+SOURCE = ('<html><head><title>Lazy</title></head><body><div class="a"><p>One <b>bold</b></p><!-- note --><br>'
+          '<ul><li>1</li><li>2</li></ul></div><p>Two</p></body></html>')
+
+def parse(builder, lazy):
+    return builder.Reader(code=SOURCE, lazy=lazy).parse_code()
+
+def test_children_built_on_first_access(builder):
+    body = parse(builder, True)[1]
+    assert body._document is not None and body.tag == '<body>'
+    div = body.innerhtml[0]
+    assert body._document is None
+    assert isinstance(div, builder.elements.lazy) and div._document is not None
+    assert div.attributes['class'] == 'a'
+    assert [type(x).__name__ for x in div.innerhtml] == ['lazy', 'comment', 'lazy', 'lazy']
+    assert div.innerhtml[0].innerhtml[0] == 'One '
+
+@pytest.mark.parametrize('pretty', [True, False])
+def test_renders_like_eager(builder, pretty):
+    eager = [x.render(pretty) for x in parse(builder, False)]
+    head, body = parse(builder, True)
+    assert [head.render(pretty), body.render(pretty)] == eager
+    # partly built: the built levels render from the elements, the others from the document
+    body.innerhtml[0].innerhtml[3]
+    assert [head.render(pretty), body.render(pretty)] == eager
+    p = builder.page('lazy', *parse(builder, True))
+    assert p.render(pretty) == builder.page('eager', *parse(builder, False)).render(pretty)
+
+def test_edits_build_first(builder):
+    E = builder.elements
+    body = parse(builder, True)[1]
+    eager = parse(builder, False)[1]
+    for tree in (body, eager):
+        tree.addElement(E.p('Three'))
+        tree.innerhtml[0].attributes['id'] = 'main'
+    assert body.render() == eager.render()
+    assert pickle.loads(pickle.dumps(parse(builder, True)[1])).render() == parse(builder, False)[1].render()
+
+def test_registry(builder):
+    E = builder.elements
+    class section(E.element):
+        __slots__ = ()
+    code = '<html><head></head><body><section><p>x</p></section><custom>y</custom></body></html>'
+    E.register('section', section)
+    try:
+        eager = builder.Reader(code=code).parse_code()[1]
+        assert type(eager.innerhtml[0]) is section and isinstance(eager.innerhtml[0].innerhtml[0], E.p)
+        lazy = builder.Reader(code=code, lazy=True).parse_code()[1]
+        assert [x.token for x in lazy.innerhtml] == ['Verified', 'Unverified']
+        assert lazy.render() == eager.render()
+    finally:
+        del E.registry['section']
@@ -0,0 +1,92 @@
+import json, os
+from zipfile import ZipFile
+import pytest
+
+def make_site(builder):
+    E = builder.elements
+    site = builder.project('site')
+    site.addResource('style', 'css', b'p { color: red; }\n' * 500)
+    site.addResource('app', 'js', b'var x = 1;\n' * 500)
+    site.addResource('logo', 'png', os.urandom(4096))
+    for i in range(3):
+        site.addPage(builder.page('p%d' % i, E.head([E.title('Page %d' % i)]), E.body([E.p('Text %d' % i)])))
+    site.save()
+    return site
+
+def tree(folder):
+    files = {}
+    for root, dirs, names in os.walk(folder):
+        for name in names:
+            path = os.path.join(root, name)
+            with open(path, 'rb') as file:
+                files[os.path.relpath(path, folder).replace(os.sep, '/')] = file.read()
+    return files
+
+@pytest.mark.parametrize('method', ['deflate', 'bzip2', 'lzma', 'store'])
+def test_archive_round_trip(builder, folder, method):
+    site = make_site(builder)
+    members = {name: open(source, 'rb').read() for source, name, digest in site.__members__()}
+    with ZipFile(site.package(method, workers=2)) as zipped:
+        assert zipped.testzip() is None
+        assert {x: zipped.read(x) for x in members} == members
+        kinds = {x.filename: x.compress_type for x in zipped.infolist()}
+    assert kinds['Resources/Images/logo.png'] == builder.ARCHIVE_METHODS['store']
+    assert kinds['p0.html'] == builder.ARCHIVE_METHODS[method]
+
+def test_archive_does_not_depend_on_workers(builder, folder):
+    site = make_site(builder)
+    contents = []
+    for workers in (1, 3):
+        with ZipFile(site.package(workers=workers)) as zipped:
+            contents.append([(x.filename, x.CRC, x.compress_size) for x in zipped.infolist()])
+    assert contents[0] == contents[1]
+
+def test_unknown_method(builder, folder):
+    with pytest.raises(builder.BuilderError):
+        make_site(builder).package('zstd')
+
+def test_resources_have_their_named_path(builder, folder):
+    site = builder.project('site')
+    site.addResource('style', 'css', b'p { color: red; }')
+    path = os.path.join(site.root, 'Resources', 'CSS', 'style.css')
+    with open(path, 'rb') as file:
+        assert file.read() == b'p { color: red; }'
+    site.addResource('style', 'css', b'p { color: blue; }')
+    with open(path, 'rb') as file:
+        assert file.read() == b'p { color: blue; }'
+    site.removeResource('style.css')
+    assert not os.path.exists(path)
+
+def test_full_and_delta_equal_next_full(builder, folder):
+    E = builder.elements
+    site = make_site(builder)
+    old = site.package()
+    site.__changeSetting__('version', '0.0.2')
+    site.pages['p1.html'][0].body.addElement(E.p('More'))
+    site.addPage(builder.page('p3', E.head([E.title('New')]), E.body([E.p('New')])))
+    site.save()
+    site.addResource('style', 'css', b'p { color: blue; }\n')
+    site.removeResource('app.js')
+    delta = site.package(base_version='0.0.1')
+    new = site.package()
+    with ZipFile(delta) as zipped:
+        assert 'Resources/Images/logo.png' not in zipped.namelist() and 'p0.html' not in zipped.namelist()
+    builder.project.applyPackage(old, str(folder / 'updated'))
+    report = builder.project.applyPackage(delta, str(folder / 'updated'))
+    assert report['version'] == '0.0.2' and report['removed'] == ['Resources/Javascript/app.js']
+    builder.project.applyPackage(new, str(folder / 'fresh'))
+    updated, fresh = tree(folder / 'updated'), tree(folder / 'fresh')
+    # package.json also says what the archive was made from (base, removed), the version and files are the same
+    about = [json.loads(x.pop(builder.PACKAGE_FILE)) for x in (updated, fresh)]
+    assert [(x['version'], x['files']) for x in about] == [('0.0.2', about[1]['files'])] * 2
+    assert updated == fresh
+
+def test_delta_needs_its_base(builder, folder):
+    site = make_site(builder)
+    with pytest.raises(builder.BuilderError):
+        site.package(base_version='0.0.0')
+    site.package()
+    site.__changeSetting__('version', '0.0.2')
+    delta = site.package(base_version='0.0.1')
+    with pytest.raises(builder.BuilderError):
+        builder.project.applyPackage(delta, str(folder / 'empty'))
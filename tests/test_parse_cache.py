@@ -0,0 +1,54 @@
+import io
+
+SOURCE = '<html><head><title>Cached</title></head><body><p class="a">One</p><p>Two</p></body></html>'
+
+def test_key_depends_on_source_and_version(builder):
+    cache = builder.parseCache()
+    key = cache.key(SOURCE)
+    assert key == cache.key([SOURCE[:10], SOURCE[10:]])
+    assert key != cache.key(SOURCE.replace('One', 'Uno'))
+    version = builder.Reader.VERSION
+    try:
+        builder.Reader.VERSION = version+'-next'
+        assert cache.key(SOURCE) != key
+    finally:
+        builder.Reader.VERSION = version
+
+def test_hit_returns_same_tree(builder):
+    cache = builder.parseCache()
+    first = builder.Reader(code=SOURCE, cache=cache).parse_code()
+    second = builder.Reader(code=SOURCE, cache=cache).parse_code()
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+    assert [x.render() for x in first] == [x.render() for x in second]
+    assert second[1].render() == builder.Reader(code=SOURCE).parse_code()[1].render()
+
+def test_file_object_source(builder):
+    cache = builder.parseCache()
+    head, body = builder.Reader(io.StringIO(SOURCE), cache=cache).parse_file(chunkSize=16)
+    assert 'Two' in body.render() and 'Cached' in head.render()
+    # the tree cached under the key of the source is the parsed one, not an empty body
+    head, body = builder.Reader(code=SOURCE, cache=cache).parse_code()
+    assert cache.stats()['hits'] == 1 and 'Two' in body.render()
+
+def test_path_source_is_read_once(builder, tmp_path, monkeypatch):
+    path = tmp_path / 'page.html'
+    path.write_text(SOURCE, encoding='utf-8')
+    reads = []
+    iter_file = builder.Reader.iter_file
+    def counted(self, chunkSize=1 << 20):
+        reads.append(chunkSize)
+        return iter_file(self, chunkSize)
+    monkeypatch.setattr(builder.Reader, 'iter_file', counted)
+    cache = builder.parseCache(folder=str(tmp_path / 'cache'))
+    body = builder.Reader(str(path), cache=cache).parse_file()[1]
+    assert len(reads) == 1 and 'One' in body.render()
+    assert 'One' in builder.parseCache(folder=str(tmp_path / 'cache')).get(cache.key(SOURCE))[1].render()
+
+def test_compact_hits_are_copies(builder):
+    cache = builder.parseCache()
+    first = builder.Reader(code=SOURCE, cache=cache, compact=True).parse_code()
+    second = builder.Reader(code=SOURCE, cache=cache, compact=True).parse_code()
+    assert first[1] is not second[1] and first[1].kind is not second[1].kind
+    first[1].addText('extra')
+    third = builder.Reader(code=SOURCE, cache=cache, compact=True).parse_code()
+    assert third[1].render() == second[1].render() != first[1].render()
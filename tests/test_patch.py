@@ -0,0 +1,66 @@
+import copy, os, pickle, random
+
+def make_page(builder, rows=20):
+    E = builder.elements
+    items = [E.li(['Row %d' % i, E.b('bold')], {'class': 'row'}) for i in range(rows)]
+    return builder.page('patched', E.head([E.title('Patch')]), E.body([E.ul(items), E.p('End')]))
+
+def edit(builder, p, seed):
+    E = builder.elements
+    rng = random.Random(seed)
+    items = p.body.innerhtml[0].innerhtml
+    for _ in range(5):
+        choice = rng.randrange(6)
+        i = rng.randrange(len(items))
+        if choice == 0:
+            items.insert(i, E.li('New %d' % rng.randrange(100)))
+        elif choice == 1 and len(items) > 1:
+            del items[i]
+        elif choice == 2 and type(items[i].innerhtml) == list:
+            items[i].innerhtml[0] = 'Changed %d' % rng.randrange(100)
+        elif choice == 3:
+            items[i].attributes = {'class': 'row picked', 'id': 'r%d' % i}
+        elif choice == 4:
+            items[i] = E.p('Not a row')
+        else:
+            p.head.addElement(E.tag('<meta>', 'Empty', None, {'name': 'n%d' % i}))
+    return p
+
+def test_diff_apply_round_trips(builder):
+    for seed in range(30):
+        old = make_page(builder)
+        new = edit(builder, copy.deepcopy(old), seed)
+        patch = old.diff(new)
+        target = copy.deepcopy(old)
+        patch.apply(target)
+        assert target.render() == new.render(), seed
+        target = copy.deepcopy(old)
+        pickle.loads(pickle.dumps(patch)).apply(target)
+        assert target.render() == new.render(), seed
+
+def test_equal_pages_give_an_empty_patch(builder):
+    old = make_page(builder)
+    assert old.diff(copy.deepcopy(old)).operations == []
+
+def test_edit_deep_in_the_page_is_local(builder):
+    old = make_page(builder)
+    new = copy.deepcopy(old)
+    new.body.innerhtml[0].innerhtml[7].innerhtml[0] = 'Edited'
+    operations = old.diff(new).operations
+    assert len(operations) == 1 and operations[0][2][:2] == (0, 7)
+
+def test_compact_sections(builder):
+    old = make_page(builder)
+    new = edit(builder, copy.deepcopy(old), 1)
+    target = builder.page('patched', builder.compactDocument.fromElements(old.head), builder.compactDocument.fromElements(old.body))
+    old.diff(new).apply(target)
+    assert target.render() == new.render()
+
+def test_apply_raw(builder, folder):
+    old = make_page(builder)
+    new = edit(builder, copy.deepcopy(old), 2)
+    old.exportRaw()
+    old.diff(new).applyRaw(os.path.join(str(folder), 'patched'))
+    loaded = builder.page('patched')
+    loaded.head, loaded.body = loaded.importRaw('patched')
+    assert loaded.render() == new.render()
@@ -0,0 +1,61 @@
+CSS = '''p { a: b }
+.used > b { c: d }
+.unused { e: f }
+#main .row:hover, .missing { g: h }
+div.box li:nth-child(2n) { i: j }
+a[href^="http"] { k: l }
+@media (max-width: 10px) { .row { m: n } .gone { o: p } }
+@font-face { font-family: x; src: url(a.woff) }
+.x:not(.y) { u: v }
+ul ~ p { w: x }
+.only-second { y: z }
+'''
+
+def first_page(builder):
+    E = builder.elements
+    body = E.body([E.div([E.ul([E.li('1', {'class': 'row'}), E.li('2')])], {'class': 'box', 'id': 'main'}),
+                   E.p([E.b('b')], {'class': 'used'})])
+    return builder.page('first', E.head([E.title('First')]), body)
+
+def second_page(builder):
+    E = builder.elements
+    return builder.page('second', E.head([E.title('Second')]), E.body([E.div('x', {'class': 'only-second'})]))
+
+def test_keeps_used_selectors(builder):
+    pruner = builder.cssPruner([CSS])
+    css = pruner.render(pruner.used([first_page(builder)]), False)
+    for kept in ('p {a: b}', '.used > b', '#main .row:hover, .missing', 'div.box li:nth-child(2n)', '.row {m: n}', '@font-face', 'ul ~ p'):
+        assert kept in css
+    for dropped in ('.unused', 'a[href', '.gone', '.x:not', '.only-second'):
+        assert dropped not in css
+
+def test_site_and_per_page(builder):
+    pages = [first_page(builder), second_page(builder)]
+    pruner = builder.cssPruner([CSS])
+    site = pruner.render(pruner.used(pages), False)
+    assert '.only-second' in site and '.used > b' in site
+    second = pruner.render(pruner.used(pages[1:]), False)
+    assert '.only-second' in second and '.used > b' not in second
+
+def test_mutation_is_seen(builder):
+    E = builder.elements
+    p = first_page(builder)
+    pruner = builder.cssPruner([CSS])
+    assert '.unused' not in pruner.render(pruner.used([p]), False)
+    p.body.addElement(E.p('late', {'class': 'unused'}))
+    assert '.unused' in pruner.render(pruner.used([p]), False)
+
+def test_project_prune_with_saved_pages(builder, folder):
+    site = builder.project('site')
+    site.addResource('style', 'css', CSS.encode('utf-8'))
+    site.addPage(first_page(builder))
+    site.addPage(second_page(builder))
+    site.save()
+    loaded = builder.project.load(site.root)
+    report = loaded.pruneCSS(perPage=True, minify=False, critical=2, emit=True)
+    assert '.only-second' in report['css']['second.html'] and '.only-second' not in report['css']['first.html']
+    assert '.used > b' in report['css']['first.html']
+    assert 'pruned.second.css' in loaded.manifest.resources
+    assert sorted(loaded.pages) == ['first.html', 'second.html']
+    loaded.save()
+    assert 'data-critical' in loaded.getPage('second')[0].render()
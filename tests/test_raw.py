@@ -0,0 +1,71 @@
+import os, pickle
+import pytest
+
+def make_body(builder):
+    E = builder.elements
+    rows = [E.li(['Row %d é ✓' % i, E.b('bold')], {'class': ['row', 'r%d' % i], 'data-n': str(i)}) for i in range(50)]
+    return E.body([E.ul(rows), E.comment(' note '), E.img({'src': 'a.png'}), E.p('')])
+
+@pytest.mark.parametrize('mapped', [True, False])
+def test_dump_load_round_trip(builder, tmp_path, mapped):
+    body = make_body(builder)
+    path = str(tmp_path / 'Body.RBCode')
+    builder.compactDocument.fromElements(body).dump(path)
+    doc = builder.compactDocument.load(path, mapped)
+    assert doc.render() == body.render() and doc.render(True) == body.render(True)
+    assert doc.toElements().render() == body.render()
+    assert builder.elements.lazy(doc).render() == body.render()
+    copied = doc.copy()
+    del doc
+    assert copied.render() == body.render()
+
+def test_bytes_are_stable(builder):
+    body = make_body(builder)
+    doc = builder.compactDocument.fromElements(body)
+    data = b''.join(doc.iter_bytes())
+    assert data[:4] == builder.RAW_MAGIC
+    again = builder.compactDocument.fromBuffer(data)
+    assert b''.join(again.iter_bytes()) == data
+    assert b''.join(pickle.loads(pickle.dumps(again)).iter_bytes()) == data
+
+def test_empty_and_invalid(builder, tmp_path):
+    data = b''.join(builder.compactDocument().iter_bytes())
+    assert len(builder.compactDocument.fromBuffer(data)) == 0
+    with pytest.raises(builder.FileError):
+        builder.compactDocument.fromBuffer(b'not a raw document at all, really')
+    newer = bytearray(data)
+    newer[4] = builder.RAW_FORMAT+1
+    with pytest.raises(builder.FileError):
+        builder.compactDocument.fromBuffer(bytes(newer))
+
+@pytest.mark.parametrize('lazy', [True, False])
+def test_export_import_raw(builder, folder, lazy):
+    E = builder.elements
+    p = builder.page('raw', E.head([E.title('Raw')]), make_body(builder))
+    p.exportRaw()
+    head, body = builder.page('raw').importRaw('raw', lazy)
+    assert head.render() == p.head.render() and body.render() == p.body.render()
+    assert isinstance(body, builder.elements.lazy) == lazy
+    body.innerhtml[0].addElement(E.li('Added'))
+    assert 'Added' in body.render()
+
+def test_pickled_raw_files_still_load(builder, folder):
+    E = builder.elements
+    p = builder.page('old', E.head([E.title('Old')]), make_body(builder))
+    p.exportRaw(binary=False)
+    with open(os.path.join('old', 'Body.RBCode'), 'rb') as file:
+        assert file.read(4) != builder.RAW_MAGIC
+    head, body = builder.page('old').importRaw('old')
+    assert body.render() == p.body.render() and head.render() == p.head.render()
+
+def test_trees_pickled_before_slots_still_load(builder):
+    # the state of an element pickled before elements had __slots__: (None, it's __dict__)
+    E = builder.elements
+    child = E.b('bold')
+    x = E.p.__new__(E.p)
+    x.__setstate__((None, {'tag': '<p>', 'innerhtml': ['text ', child], 'attributes': {'class': 'old'}}))
+    assert x.render() == E.p(['text ', E.b('bold')], {'class': 'old'}).render()
+    assert child._parent is x and x.type == 'Container'
+    empty = E.br.__new__(E.br)
+    empty.__setstate__((None, {'tag': '<br>', 'innerhtml': None, 'attributes': {}}))
+    assert empty.type == 'Empty'
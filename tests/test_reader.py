@@ -0,0 +1,59 @@
+import pytest
+
+SOURCE = '''<html>
+<head><title>Reader</title><meta charset="utf-8"></head>
+<body>
+  <h1 class="top">Title</h1><h6>Small</h6>
+  <p>a <b>b</b> c</p><br><ul><li>1</li><li>2</li></ul><img src="a.png">
+</body>
+</html>'''
+
+RAW = [('head', [], [('title', [], ['Reader'], 'Container'), ('meta', [('charset', 'utf-8')], None, 'Empty')], 'Container'),
+       ('body', [], [('h1', [('class', 'top')], ['Title'], 'Container'), ('h6', [], ['Small'], 'Container'),
+                     ('p', [], ['a ', ('b', [], ['b'], 'Container'), ' c'], 'Container'), ('br', [], None, 'Empty'),
+                     ('ul', [], [('li', [], ['1'], 'Container'), ('li', [], ['2'], 'Container')], 'Container'),
+                     ('img', [('src', 'a.png')], None, 'Empty')], 'Container')]
+
+def rendered(tree):
+    return [x.render() for x in tree]
+
+def test_default(builder):
+    head, body = builder.Reader(code=SOURCE).parse_code()
+    assert isinstance(head, builder.elements.head) and isinstance(body, builder.elements.body)
+    assert '<title>Reader</title>' in head.render()
+    assert '<p>a <b>b</b>\n c</p>' in body.render() and '<img src="a.png" >' in body.render()
+
+def test_headings(builder):
+    body = builder.Reader(code=SOURCE).parse_code()[1]
+    h1, h6 = body.innerhtml[:2]
+    assert isinstance(h1, builder.elements.hn) and isinstance(h6, builder.elements.hn)
+    assert h1.tag == '<h1>' and h6.tag == '<h6>' and h1.attributes['class'] == 'top'
+
+def test_raw(builder):
+    assert builder.Reader(code=SOURCE, returnBuilder=False).parse_code() == RAW
+
+def test_compact(builder):
+    tree = builder.Reader(code=SOURCE, compact=True).parse_code()
+    assert all(isinstance(x, builder.compactDocument) for x in tree)
+    assert rendered(tree) == rendered(builder.Reader(code=SOURCE).parse_code())
+
+def test_lazy(builder):
+    tree = builder.Reader(code=SOURCE, lazy=True).parse_code()
+    assert all(isinstance(x, builder.elements.lazy) for x in tree)
+    assert rendered(tree) == rendered(builder.Reader(code=SOURCE).parse_code())
+
+@pytest.mark.parametrize('options', [{}, {'compact': True}, {'lazy': True}])
+def test_legacy(builder, options):
+    tree = builder.Reader(code=SOURCE, legacy=True, **options).parse_code()
+    assert rendered(tree) == rendered(builder.Reader(code=SOURCE).parse_code())
+    assert isinstance(builder.Reader(code=SOURCE, legacy=True).parse_code()[1].innerhtml[0], builder.elements.hn)
+
+def test_legacy_raw(builder):
+    assert builder.Reader(code=SOURCE, legacy=True, returnBuilder=False).parse_code() == RAW
+
+def test_file(builder, tmp_path):
+    path = tmp_path / 'page.html'
+    path.write_text(SOURCE, encoding='utf-8')
+    for legacy in (False, True):
+        tree = builder.Reader(str(path), legacy=legacy).parse_file(chunkSize=7)
+        assert rendered(tree) == rendered(builder.Reader(code=SOURCE).parse_code())
@@ -0,0 +1,73 @@
+import gc
+
+def make_page(builder, name='plan'):
+    E = builder.elements
+    return builder.page(name, E.head([E.title('Plan')]), E.body([E.ul([E.li('one'), E.li('two')]), E.p('text')]))
+
+def test_plan_renders_like_the_page(builder):
+    p = make_page(builder)
+    for pretty in (True, False):
+        expected = p.render(pretty)
+        p.compile(pretty)
+        assert p.render(pretty) == expected
+        p.plan = None
+
+def test_text_edit_keeps_the_plan(builder):
+    p = make_page(builder)
+    plan = p.compile(False)
+    p.body.innerhtml[1].innerhtml = 'changed'
+    assert plan.valid()
+    assert '<p>changed</p>' in p.render(False)
+
+def test_plan_recompiles_after_mutation(builder):
+    E = builder.elements
+    p = make_page(builder)
+    plan = p.compile(False)
+    ul = p.body.innerhtml[0]
+    ul.addElement(E.li('three'))
+    assert not plan.valid()
+    assert p.render(False) == ''.join(p.iter_render(False))
+    assert plan.valid() and '<li>three</li>' in p.render(False)
+    ul.innerhtml[0].attributes['class'] = 'first'
+    assert not plan.valid() and 'class="first"' in p.render(False)
+    ul.innerhtml.pop()
+    assert '<li>three</li>' not in p.render(False)
+    p.body = E.body([E.p('new body')])
+    assert not plan.valid() and 'new body' in p.render(False)
+
+def test_plans_are_per_tree(builder):
+    E = builder.elements
+    first, second = make_page(builder, 'first'), make_page(builder, 'second')
+    plans = first.compile(False), second.compile(False)
+    item = E.li('alone')
+    element = item.compile()
+    second.body.addElement(E.p('more'))
+    E.ul([]).addElement(E.li('detached'))
+    assert plans[0].valid() and element.valid() and not plans[1].valid()
+    item.attributes['id'] = 'x'
+    assert not element.valid() and plans[0].valid()
+    assert element.render() == item.render()
+
+def test_shared_subtree_edit_recompiles_every_plan(builder):
+    E = builder.elements
+    nav = E.ul([E.li('Home')])
+    pages = [make_page(builder, 'p%d' % i) for i in range(3)]
+    for p in pages:
+        p.body.addElement(nav)
+    plans = [p.compile(False) for p in pages]
+    nav.addElement(E.li('About'))
+    assert not any(x.valid() for x in plans)
+    assert all('<li>About</li>' in p.render(False) for p in pages)
+
+def test_plan_entries_go_with_their_plans(builder):
+    E = builder.elements
+    p = make_page(builder)
+    p.compile(False)
+    head, body = p.head, p.body
+    assert id(head) in builder.renderPlan.byRoot and id(body) in builder.renderPlan.byRoot
+    p.head = E.head([E.title('New')])
+    assert '<title>New</title>' in p.render(False)
+    assert id(head) not in builder.renderPlan.byRoot and id(p.head) in builder.renderPlan.byRoot
+    p.plan = None
+    gc.collect()
+    assert id(body) not in builder.renderPlan.byRoot
@@ -0,0 +1,68 @@
+import os
+import pytest
+
+def make_project(builder, count=4, storage='folders'):
+    E = builder.elements
+    site = builder.project('site', storage=storage)
+    nav = E.ul([E.li('Home')], {'class': 'nav'})
+    for i in range(count):
+        site.addPage(builder.page('p%d' % i, E.head([E.title('Page %d' % i)]), E.body([nav, E.p('Text %d' % i)])))
+    return site, nav
+
+def html(site, name):
+    with open(os.path.join(site.root, name), encoding='utf-8') as file:
+        return file.read()
+
+@pytest.mark.parametrize('storage', ['folders', 'database'])
+def test_incremental_counts(builder, folder, storage):
+    site, nav = make_project(builder, storage=storage)
+    first = site.save()
+    assert len(first['rebuilt']) == 4 and first['skipped'] == []
+    again = site.save()
+    assert again['rebuilt'] == [] and len(again['skipped']) == 4
+    site.pages['p2.html'][0].body.innerhtml[1].innerhtml = 'Edited'
+    report = site.save()
+    assert report['rebuilt'] == ['p2.html'] and len(report['skipped']) == 3
+    assert 'Edited' in html(site, 'p2.html')
+    assert len(site.save(force=True)['rebuilt']) == 4
+    assert len(site.save(pretty=False)['rebuilt']) == 4
+
+def test_shared_subtree_edit_rewrites_every_page(builder, folder):
+    E = builder.elements
+    site, nav = make_project(builder)
+    site.save()
+    nav.addElement(E.li('About'))
+    report = site.save()
+    assert sorted(report['rebuilt']) == ['p0.html', 'p1.html', 'p2.html', 'p3.html']
+    assert all('About' in html(site, 'p%d.html' % i) for i in range(4))
+    assert all('About' in site.getPage('p%d' % i)[0].render() for i in range(4))
+
+def test_deleted_file_is_rebuilt(builder, folder):
+    site, nav = make_project(builder, 2)
+    site.save()
+    os.remove(os.path.join(site.root, 'p1.html'))
+    assert site.save()['rebuilt'] == ['p1.html']
+
+def test_workers_only_convert_rebuilt_pages(builder, folder, monkeypatch):
+    E = builder.elements
+    site, nav = make_project(builder, 6)
+    single = site.save(workers=2)
+    assert len(single['rebuilt']) == 6
+    converted = []
+    fromElements = builder.compactDocument.fromElements.__func__
+    def counted(cls, root):
+        converted.append(root)
+        return fromElements(cls, root)
+    monkeypatch.setattr(builder.compactDocument, 'fromElements', classmethod(counted))
+    report = site.save(workers=2)
+    assert report['rebuilt'] == [] and len(report['skipped']) == 6 and converted == []
+    site.pages['p1.html'][0].body.innerhtml[1].innerhtml = 'Edited 1'
+    site.pages['p4.html'][0].body.innerhtml[1].innerhtml = 'Edited 4'
+    report = site.save(workers=2)
+    assert report['rebuilt'] == ['p1.html', 'p4.html']
+    assert report['skipped'] == ['p0.html', 'p2.html', 'p3.html', 'p5.html']
+    assert len(converted) == 4
+    assert 'Edited 4' in html(site, 'p4.html')
+    nav.addElement(E.li('About'))
+    assert len(site.save(workers=2)['rebuilt']) == 6
+    assert site.save()['skipped'] == ['p%d.html' % i for i in range(6)]
@@ -0,0 +1,50 @@
+import os
+
+def sheet(builder, *rules):
+    return builder.stylesheet([builder.cssSelector(selector, properties) for selector, properties in rules])
+
+def test_same_declaration_dropped(builder):
+    css = sheet(builder, ('a', {'color': 'red', 'x': '1'}), ('a', {'color': 'red'}))
+    assert css.render(True) == 'a{x:1}a{color:red}'
+    assert sheet(builder, ('a', {'x': '1'}), ('a', {'x': '1'})).render(True) == 'a{x:1}'
+
+def test_fallback_kept(builder):
+    css = sheet(builder, ('a', {'background': 'red'}), ('a', {'background': 'linear-gradient(red,blue)'}))
+    assert css.render(True) == 'a{background:red}a{background:linear-gradient(red,blue)}'
+
+def test_merge(builder):
+    css = sheet(builder, ('a', {'x': '1', 'y': '2'}), ('b', {'z': '3'}), ('c', {'y': '2', 'x': '1'}))
+    assert css.render(True) == 'a,c{x:1;y:2}b{z:3}'
+
+def test_merge_blocked(builder):
+    # a rule in between declares the same property, or a related one
+    css = sheet(builder, ('a', {'x': '1'}), ('b', {'x': '2'}), ('c', {'x': '1'}))
+    assert css.render(True) == 'a{x:1}b{x:2}c{x:1}'
+    css = sheet(builder, ('a', {'margin': '0'}), ('b', {'margin-top': '5px'}), ('c', {'margin': '0'}))
+    assert css.render(True) == 'a{margin:0}b{margin-top:5px}c{margin:0}'
+
+def test_order_kept_for_related_properties(builder):
+    css = sheet(builder, ('a', {'margin': '0', 'margin-top': '1px'}), ('b', {'margin-top': '1px', 'margin': '0'}))
+    assert css.render(True) == 'a{margin:0;margin-top:1px}b{margin-top:1px;margin:0}'
+
+def test_render_pretty(builder):
+    css = sheet(builder, ('a, b', {'x': ' 1  2 '}))
+    assert css.render() == 'a,\nb {\n    x: 1 2;\n}\n'
+
+def test_attach(builder):
+    E = builder.elements
+    p = builder.page('index', E.head([E.title('T')]), E.body([]))
+    css = sheet(builder, ('a', {'x': '1'}))
+    first = css.attach(p)
+    assert p.head.innerhtml[-1] is first
+    css.add(builder.cssSelector('b', {'y': '2'}))
+    second = css.attach(p)
+    assert len(p.head.innerhtml) == 2 and p.head.innerhtml[-1] is second
+    assert 'a{x:1}b{y:2}' in p.render(False)
+
+def test_export(builder, folder):
+    site = builder.project('site')
+    link = sheet(builder, ('a', {'x': '1'})).export(site, 'main')
+    assert link.attributes['href'] == 'Resources/CSS/main.css'
+    with open(site.get_resource_address('main.css'), encoding='utf-8') as file:
+        assert file.read() == 'a{x:1}'